@@ -3,6 +3,7 @@ import ScoreCard from './ScoreCard';
 import MetricsCard from './MetricsCard';
 import AIAnalysisCard from './AIAnalysisCard';
 import RecommendationsCard from './RecommendationsCard';
+import TelemetryCard from './TelemetryCard';
 
 const Dashboard = ({ data }) => {
   if (!data) return null;
@@ -26,6 +27,10 @@ const Dashboard = ({ data }) => {
         metrics={data.metrics}
         score={data.performance_score}
       />
+
+      <TelemetryCard
+        telemetry={data.provider_telemetry}
+      />
     </div>
   );
 };
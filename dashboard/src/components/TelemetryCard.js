@@ -0,0 +1,78 @@
+import React from 'react';
+
+const TelemetryCard = ({ telemetry }) => {
+  if (!telemetry || !telemetry.providers || Object.keys(telemetry.providers).length === 0) {
+    return (
+      <div className="card telemetry">
+        <div className="card-header">
+          <h2 className="card-title">LLM Providers</h2>
+          <div className="card-icon">📡</div>
+        </div>
+        <p style={{ color: 'var(--text-secondary)' }}>
+          No provider calls in this run.
+        </p>
+      </div>
+    );
+  }
+
+  const formatSeconds = (value) => `${(value || 0).toFixed(2)}s`;
+  const formatTokens = (value) => (value || 0).toLocaleString();
+
+  const renderProvider = ([name, entry]) => (
+    <li key={name} className="metric-item">
+      <div className="metric-header">
+        <div className="metric-name">
+          <span>{name === 'anthropic' ? '🟠' : '🔵'}</span>
+          <span>{name.charAt(0).toUpperCase() + name.slice(1)}</span>
+        </div>
+        <div style={{ color: 'var(--text-secondary)', fontSize: '0.875rem' }}>
+          {entry.calls} call{entry.calls === 1 ? '' : 's'}
+          {entry.failures > 0 && ` · ${entry.failures} failed`}
+          {entry.retries > 0 && ` · ${entry.retries} retries`}
+        </div>
+      </div>
+
+      <div className="metric-details">
+        <div className="metric-detail">
+          <span className="metric-detail-label">P50</span>
+          <span className="metric-detail-value">{formatSeconds(entry.latency_p50)}</span>
+        </div>
+        <div className="metric-detail">
+          <span className="metric-detail-label">P95</span>
+          <span className="metric-detail-value">{formatSeconds(entry.latency_p95)}</span>
+        </div>
+        <div className="metric-detail">
+          <span className="metric-detail-label">Tokens In</span>
+          <span className="metric-detail-value">{formatTokens(entry.input_tokens)}</span>
+        </div>
+        <div className="metric-detail">
+          <span className="metric-detail-label">Tokens Out</span>
+          <span className="metric-detail-value">{formatTokens(entry.output_tokens)}</span>
+        </div>
+        <div className="metric-detail">
+          <span className="metric-detail-label">Est. Cost</span>
+          <span className="metric-detail-value">${(entry.cost_usd || 0).toFixed(4)}</span>
+        </div>
+      </div>
+    </li>
+  );
+
+  return (
+    <div className="card telemetry">
+      <div className="card-header">
+        <h2 className="card-title">LLM Providers</h2>
+        <div className="card-icon">📡</div>
+      </div>
+
+      <ul className="metrics-list">
+        {Object.entries(telemetry.providers).map(renderProvider)}
+      </ul>
+
+      <div style={{ marginTop: '1rem', color: 'var(--text-muted)', fontSize: '0.875rem' }}>
+        Fallbacks: {telemetry.fallbacks || 0} · Hedged requests: {telemetry.hedges || 0}
+      </div>
+    </div>
+  );
+};
+
+export default TelemetryCard;
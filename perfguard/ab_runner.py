@@ -0,0 +1,201 @@
+"""
+PerfGuard AI A/B Benchmarking
+Interleaves benchmark rounds of the merge-base and the PR head on the same machine and compares them pairwise
+
+A stored baseline was measured on another runner, possibly weeks ago, so
+runner speed differences show up as regressions. Here the merge-base is
+checked out in a worktree and each round runs the base suite, then the
+head suite (ABAB...). Both sides of a round share the machine's state at
+that moment, so the per-round head/base ratio cancels runner speed and
+slow drift, and its spread across rounds bounds the remaining noise.
+"""
+import os
+import sys
+import json
+import math
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+from range_runner import WorktreePool, checkout
+from perf_suite import test_environment
+
+logger = get_logger(__name__)
+
+# Two-sided 95% Student t quantiles by degrees of freedom (rounds - 1)
+_T_975 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26}
+
+
+def merge_base(base_ref: str) -> Optional[str]:
+    """Commit the PR branched from: git merge-base of base_ref and HEAD"""
+    result = subprocess.run(["git", "merge-base", base_ref, "HEAD"], capture_output=True, text=True, timeout=30)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def paired_change(base: List[float], head: List[float]) -> Dict[str, Any]:
+    """
+    Relative change from per-round head/base ratios
+
+    Returns:
+        {"change_percent", "ci_percent" (95% half-width), "significant", "rounds"}
+    """
+    ratios = [h / b - 1 for b, h in zip(base, head) if b > 0]
+    if not ratios:
+        return {"change_percent": 0.0, "ci_percent": None, "significant": False, "rounds": 0}
+    change = statistics.fmean(ratios)
+    if len(ratios) < 2:
+        return {"change_percent": change * 100, "ci_percent": None, "significant": False, "rounds": 1}
+    half_width = _T_975.get(len(ratios) - 1, 1.96) * statistics.stdev(ratios) / math.sqrt(len(ratios))
+    return {
+        "change_percent": change * 100,
+        "ci_percent": half_width * 100,
+        "significant": abs(change) > half_width,
+        "rounds": len(ratios),
+    }
+
+
+def _suite_command(json_path: str, targets: List[str], names: List[str]) -> List[str]:
+    cmd = [
+        sys.executable, "-m", "pytest",
+        "-m", config.PYTEST_MARKERS,
+        "--benchmark-only",
+        f"--benchmark-json={json_path}",
+        f"--benchmark-max-time={config.AB_ROUND_MAX_TIME}",
+        "-p", "no:cacheprovider",
+        "-q",
+    ]
+    if names:
+        cmd.extend(["-k", " or ".join(names)])
+    return cmd + targets
+
+
+def _run_round(cwd: str, node_ids: Optional[List[str]]) -> Dict[str, float]:
+    """
+    One benchmark pass over the selected tests in a checkout
+
+    Returns:
+        Dictionary of benchmark fullname -> mean seconds
+    """
+    targets, names = [], []
+    if node_ids:
+        # The base may lack tests the PR adds: run the selected tests' files that
+        # exist there, narrowed to the selected test names
+        targets = sorted({node_id.partition("::")[0] for node_id in node_ids})
+        targets = [path for path in targets if (Path(cwd) / path).exists()]
+        names = sorted({node_id.split("::")[-1].partition("[")[0] for node_id in node_ids})
+        if not targets:
+            return {}
+
+    with tempfile.TemporaryDirectory(prefix="perfguard-ab-") as scratch:
+        json_path = os.path.join(scratch, "benchmark.json")
+        try:
+            subprocess.run(
+                _suite_command(json_path, targets, names),
+                cwd=cwd,
+                env=test_environment(),
+                capture_output=True,
+                text=True,
+                timeout=config.AB_ROUND_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            logger.warning(f"A/B round in {cwd} timed out")
+            return {}
+        if not os.path.exists(json_path):
+            return {}
+        with open(json_path, 'r') as f:
+            benchmarks = json.loads(f.read() or "{}").get("benchmarks", [])
+
+    selected = set(node_ids or [])
+    return {
+        b["fullname"]: b["stats"]["mean"] for b in benchmarks
+        if not selected or b["fullname"] in selected
+    }
+
+
+def run_ab(base_ref: str, node_ids: List[str] = None, rounds: int = None) -> Optional[Dict[str, Any]]:
+    """
+    Benchmark the merge-base and the working tree in alternating rounds
+
+    Args:
+        base_ref: Git reference the PR is compared against
+        node_ids: Perf tests to run (default: the whole perf suite)
+        rounds: Base/head round pairs (default config.AB_ROUNDS)
+
+    Returns:
+        Execution time metric ("current", "baseline", "change_percent",
+        "benchmarks") plus "ab" details, or None if A/B is not possible
+        (no merge-base, or no benchmark measured on both sides)
+    """
+    rounds = rounds or config.AB_ROUNDS
+    base_sha = merge_base(base_ref)
+    if not base_sha:
+        logger.warning(f"No merge-base with {base_ref}, falling back to the stored baseline")
+        return None
+
+    try:
+        worktree = WorktreePool(1, name="ab-base").prepare()[0]
+        checkout(worktree, base_sha)
+    except Exception as e:
+        logger.warning(f"Could not check out the merge-base for A/B benchmarking: {e}")
+        return None
+
+    logger.info(f"A/B benchmarking against {base_sha[:12]}: {rounds} interleaved round pair(s)")
+    base_rounds: List[Dict[str, float]] = []
+    head_rounds: List[Dict[str, float]] = []
+    for number in range(rounds):
+        base_rounds.append(_run_round(worktree, node_ids))
+        head_rounds.append(_run_round(os.getcwd(), node_ids))
+        logger.info(f"A/B round {number + 1}/{rounds}: {len(base_rounds[-1])} base, {len(head_rounds[-1])} head benchmark(s)")
+
+    # Only benchmarks measured on both sides of every round can be paired
+    paired = set.intersection(*(set(r) for r in base_rounds + head_rounds)) if base_rounds else set()
+    if not paired:
+        logger.warning("No benchmark ran on both base and head, falling back to the stored baseline")
+        return None
+    names = sorted(paired)
+
+    per_benchmark = {}
+    for name in names:
+        base = [r[name] for r in base_rounds]
+        head = [r[name] for r in head_rounds]
+        per_benchmark[name] = {
+            "base": statistics.fmean(base),
+            "head": statistics.fmean(head),
+            **paired_change(base, head),
+        }
+
+    # Suite-level change from the per-round ratios of the suite means
+    base_means = [statistics.fmean(r[name] for name in names) for r in base_rounds]
+    head_means = [statistics.fmean(r[name] for name in names) for r in head_rounds]
+    suite = paired_change(base_means, head_means)
+    current = statistics.fmean(head_means)
+
+    change = suite["change_percent"]
+    if config.AB_REQUIRE_SIGNIFICANCE and not suite["significant"]:
+        change = 0.0
+    logger.info(
+        f"A/B execution time change: {suite['change_percent']:+.2f}% "
+        f"(±{suite['ci_percent'] or 0:.2f}%, {'significant' if suite['significant'] else 'within noise'})"
+    )
+
+    return {
+        "current": current,
+        # Baseline implied by the paired change, so current/baseline gives the same ratio to scoring
+        "baseline": current / (1 + change / 100),
+        "change_percent": change,
+        "benchmarks": {name: stats["head"] for name, stats in per_benchmark.items()},
+        "ab": {
+            "base_sha": base_sha,
+            "rounds": rounds,
+            "base_mean": statistics.fmean(base_means),
+            "head_mean": current,
+            "change_percent": suite["change_percent"],
+            "ci_percent": suite["ci_percent"],
+            "significant": suite["significant"],
+            "benchmarks": per_benchmark,
+            "unpaired": sorted(set().union(*head_rounds) - paired),
+        },
+    }
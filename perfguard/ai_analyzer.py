@@ -5,15 +5,92 @@ Uses Claude 3.5 Sonnet or Google Gemini to analyze code changes and predict perf
 import os
 import json
 import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
-from anthropic import Anthropic, APIError, APITimeoutError, RateLimitError
-import google.generativeai as genai
 from config import config
 from logger import get_logger
 from prompts import get_prompt
+from diff_parser import chunk_diff, estimate_tokens, parse_diff
+from diff_compressor import compress_diff
+from call_graph import call_graph_context, format_context
+from circuit_breaker import CircuitBreaker, OPEN, backoff_delay, retry_after_from_error
+from telemetry import telemetry
+from rate_limiter import RateLimiter
+from tracing import span, tracer
 
 logger = get_logger(__name__)
 
+RISK_LEVELS = ["low", "medium", "high"]
+
+# Provider SDK clients, created on first use and shared by every AIAnalyzer in the process
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_anthropic_client():
+    """Return the shared Anthropic client, importing the SDK on first use"""
+    with _clients_lock:
+        if "anthropic" not in _clients:
+            from anthropic import Anthropic
+            # Retries are handled by AIAnalyzer (backoff + circuit breaker), not the SDK
+            _clients["anthropic"] = Anthropic(
+                api_key=config.ANTHROPIC_API_KEY,
+                base_url=config.ANTHROPIC_BASE_URL,
+                max_retries=0
+            )
+            logger.info("Anthropic Claude initialized")
+        return _clients["anthropic"]
+
+
+def _get_gemini_model():
+    """Return the shared Gemini model, importing the SDK on first use"""
+    with _clients_lock:
+        if "gemini" not in _clients:
+            import google.generativeai as genai
+            if config.GEMINI_API_ENDPOINT:
+                genai.configure(
+                    api_key=config.GOOGLE_API_KEY,
+                    transport="rest",
+                    client_options={"api_endpoint": config.GEMINI_API_ENDPOINT}
+                )
+            else:
+                genai.configure(api_key=config.GOOGLE_API_KEY)
+            _clients["gemini"] = genai.GenerativeModel(config.GEMINI_MODEL)
+            logger.info("Google Gemini initialized")
+        return _clients["gemini"]
+
+
+# Successful responses by prompt, shared by every AIAnalyzer in the process (LRU)
+_responses: "OrderedDict[str, str]" = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def _response_key(prompt: str) -> str:
+    models = f"{config.CLAUDE_MODEL}\0{config.GEMINI_MODEL}\0{config.MAX_TOKENS}\0"
+    return hashlib.sha256((models + prompt).encode("utf-8")).hexdigest()
+
+
+def _cached_response(key: str) -> Optional[str]:
+    with _responses_lock:
+        if key in _responses:
+            _responses.move_to_end(key)
+            return _responses[key]
+    return None
+
+
+def _remember_response(key: str, response: str):
+    if config.LLM_RESPONSE_CACHE_SIZE <= 0:
+        return
+    with _responses_lock:
+        _responses[key] = response
+        _responses.move_to_end(key)
+        while len(_responses) > config.LLM_RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+
 
 class AIAnalyzer:
     """Analyzes code changes using Claude AI or Google Gemini (with automatic fallback)"""
@@ -24,18 +101,17 @@ class AIAnalyzer:
         self.gemini_model = None
 
         if config.ANTHROPIC_API_KEY:
-            self.anthropic_client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
-            logger.info("Anthropic Claude initialized")
+            self.anthropic_client = _get_anthropic_client()
 
         if config.GOOGLE_API_KEY:
-            genai.configure(api_key=config.GOOGLE_API_KEY)
-            self.gemini_model = genai.GenerativeModel(config.GEMINI_MODEL)
-            logger.info("Google Gemini initialized")
+            self.gemini_model = _get_gemini_model()
 
         if not self.anthropic_client and not self.gemini_model:
             raise ValueError("At least one AI API key (ANTHROPIC_API_KEY or GOOGLE_API_KEY) is required")
 
         self.max_tokens = config.MAX_TOKENS
+        self.circuit_breaker = CircuitBreaker()
+        self.rate_limiter = RateLimiter()
 
     def _sanitize_text(self, text: str) -> str:
         """
@@ -79,36 +155,113 @@ class AIAnalyzer:
         """Alias for _sanitize_text for backward compatibility"""
         return self._sanitize_text(prompt)
 
-    def _call_anthropic(self, prompt: str, max_retries: int) -> Optional[str]:
-        """Try calling Anthropic Claude API with retries"""
-        if not self.anthropic_client:
+    def _backoff(self, attempt: int, error: Exception, cancel_event: threading.Event = None):
+        """Sleep before the next attempt, honoring Retry-After; wakes early on cancellation"""
+        delay = backoff_delay(attempt, retry_after_from_error(error))
+        logger.info(f"Retrying in {delay:.1f}s...")
+        with span("llm.backoff", "llm", attempt=attempt + 1, delay=round(delay, 3)):
+            if cancel_event:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def _call_anthropic(
+        self,
+        prompt: str,
+        max_retries: int,
+        cancel_event: threading.Event = None
+    ) -> Optional[str]:
+        """Try calling Anthropic Claude API with retries (stops early once cancel_event is set)"""
+        if not self.anthropic_client or not self.circuit_breaker.allow("anthropic"):
             return None
+        try:
+            return self._anthropic_attempts(prompt, max_retries, cancel_event)
+        finally:
+            # Exits without a recorded outcome must not keep a half-open probe
+            self.circuit_breaker.release_probe("anthropic")
+
+    def _anthropic_attempts(
+        self,
+        prompt: str,
+        max_retries: int,
+        cancel_event: threading.Event = None
+    ) -> Optional[str]:
+        """Retry loop of _call_anthropic, run once the circuit breaker admitted the call"""
+        from anthropic import APIConnectionError, APIError, APIStatusError, APITimeoutError, RateLimitError
 
         # Sanitize prompt to handle Unicode characters
         sanitized_prompt = self._sanitize_prompt(prompt)
 
         last_error = None
+        call_started = time.monotonic()
+        attempts = 0
         for attempt in range(max_retries):
+            if cancel_event and cancel_event.is_set():
+                logger.info("Claude request cancelled (another provider answered first)")
+                if attempts:
+                    telemetry.record_call("anthropic", "cancelled", time.monotonic() - call_started, attempts)
+                return None
+            if attempt and not self.circuit_breaker.allow("anthropic"):
+                break
+            with span("rate_limit.acquire", "llm", provider="anthropic") as wait_span:
+                acquired = self.rate_limiter.acquire("anthropic", cancel_event=cancel_event)
+                wait_span.set(acquired=acquired)
+            if not acquired:
+                if cancel_event and cancel_event.is_set():
+                    logger.info("Claude request cancelled while waiting for a rate limit slot")
+                    if attempts:
+                        telemetry.record_call("anthropic", "cancelled", time.monotonic() - call_started, attempts)
+                    return None
+                last_error = last_error or TimeoutError("timed out waiting for a rate limit slot")
+                break
+            attempts += 1
             try:
                 logger.info(f"Calling Claude API (attempt {attempt + 1}/{max_retries})...")
 
-                response = self.anthropic_client.messages.create(
-                    model=config.CLAUDE_MODEL,
-                    max_tokens=self.max_tokens,
-                    messages=[{"role": "user", "content": sanitized_prompt}],
-                    timeout=config.API_TIMEOUT
+                started = time.monotonic()
+                with span("llm.request", "llm", provider="anthropic", attempt=attempts) as request_span:
+                    response = self.anthropic_client.messages.create(
+                        model=config.CLAUDE_MODEL,
+                        max_tokens=self.max_tokens,
+                        messages=[{"role": "user", "content": sanitized_prompt}],
+                        timeout=config.API_TIMEOUT
+                    )
+                    content = response.content[0].text
+                    usage = getattr(response, "usage", None)
+                    input_tokens = getattr(usage, "input_tokens", 0) or 0
+                    output_tokens = getattr(usage, "output_tokens", 0) or 0
+                    request_span.set(input_tokens=input_tokens, output_tokens=output_tokens, chars=len(content))
+
+                latency = time.monotonic() - started
+                self.circuit_breaker.record_success("anthropic")
+                telemetry.record_call(
+                    "anthropic", "ok", latency, attempts,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens
                 )
-
-                content = response.content[0].text
                 logger.info(f"✅ Received response from Claude ({len(content)} chars)")
                 return content
 
-            except (RateLimitError, APITimeoutError, APIError) as e:
+            except (RateLimitError, APITimeoutError, APIConnectionError, APIError) as e:
                 last_error = e
                 error_msg = self._sanitize_text(str(e))
+                status = getattr(e, "status_code", None)
+                transient = (
+                    isinstance(e, (RateLimitError, APITimeoutError, APIConnectionError))
+                    or not isinstance(e, APIStatusError)
+                    or (status is not None and status >= 500)
+                )
+                if not transient:
+                    # Client errors (bad request, auth) will not succeed on retry
+                    logger.error(f"Claude API error (status {status}): {error_msg}")
+                    break
+
                 logger.warning(f"Claude API error (attempt {attempt + 1}): {error_msg}")
-                if attempt < max_retries - 1:
-                    time.sleep(config.API_RETRY_DELAY * (attempt + 1))
+                if isinstance(e, RateLimitError):
+                    self.rate_limiter.penalize("anthropic", retry_after_from_error(e))
+                self.circuit_breaker.record_failure("anthropic")
+                if attempt < max_retries - 1 and self.circuit_breaker.state("anthropic") != OPEN:
+                    self._backoff(attempt, e, cancel_event)
 
             except Exception as e:
                 last_error = e
@@ -116,20 +269,72 @@ class AIAnalyzer:
                 logger.error(f"Unexpected Claude error: {error_msg}")
                 break
 
+        telemetry.record_call("anthropic", "failed", time.monotonic() - call_started, attempts)
         error_msg = self._sanitize_text(str(last_error)) if last_error else "Unknown error"
         logger.error(f"❌ Claude API failed after {max_retries} attempts: {error_msg}")
         return None
 
-    def _call_gemini(self, prompt: str, max_retries: int) -> Optional[str]:
-        """Try calling Google Gemini API with retries"""
-        if not self.gemini_model:
+    def _call_gemini(
+        self,
+        prompt: str,
+        max_retries: int,
+        cancel_event: threading.Event = None
+    ) -> Optional[str]:
+        """Try calling Google Gemini API with retries (stops early once cancel_event is set)"""
+        if not self.gemini_model or not self.circuit_breaker.allow("gemini"):
             return None
+        try:
+            return self._gemini_attempts(prompt, max_retries, cancel_event)
+        finally:
+            # Exits without a recorded outcome must not keep a half-open probe
+            self.circuit_breaker.release_probe("gemini")
+
+    def _gemini_attempts(
+        self,
+        prompt: str,
+        max_retries: int,
+        cancel_event: threading.Event = None
+    ) -> Optional[str]:
+        """Retry loop of _call_gemini, run once the circuit breaker admitted the call"""
+        from google.api_core import exceptions as google_exceptions
+
+        # Rate limits, quota exhaustion and server-side failures are worth retrying
+        transient_errors = (
+            google_exceptions.TooManyRequests,
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServerError,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.RetryError,
+            ConnectionError,
+            TimeoutError,
+        )
 
         # Sanitize prompt to handle Unicode characters
         sanitized_prompt = self._sanitize_prompt(prompt)
 
         last_error = None
+        call_started = time.monotonic()
+        attempts = 0
         for attempt in range(max_retries):
+            if cancel_event and cancel_event.is_set():
+                logger.info("Gemini request cancelled (another provider answered first)")
+                if attempts:
+                    telemetry.record_call("gemini", "cancelled", time.monotonic() - call_started, attempts)
+                return None
+            if attempt and not self.circuit_breaker.allow("gemini"):
+                break
+            with span("rate_limit.acquire", "llm", provider="gemini") as wait_span:
+                acquired = self.rate_limiter.acquire("gemini", cancel_event=cancel_event)
+                wait_span.set(acquired=acquired)
+            if not acquired:
+                if cancel_event and cancel_event.is_set():
+                    logger.info("Gemini request cancelled while waiting for a rate limit slot")
+                    if attempts:
+                        telemetry.record_call("gemini", "cancelled", time.monotonic() - call_started, attempts)
+                    return None
+                last_error = last_error or TimeoutError("timed out waiting for a rate limit slot")
+                break
+            attempts += 1
             try:
                 logger.info(f"Calling Google Gemini API (attempt {attempt + 1}/{max_retries})...")
 
@@ -139,29 +344,46 @@ class AIAnalyzer:
                     "temperature": 0.1,  # Low temperature for consistent analysis
                 }
 
-                response = self.gemini_model.generate_content(
-                    sanitized_prompt,
-                    generation_config=generation_config
+                started = time.monotonic()
+                with span("llm.request", "llm", provider="gemini", attempt=attempts) as request_span:
+                    response = self.gemini_model.generate_content(
+                        sanitized_prompt,
+                        generation_config=generation_config,
+                        request_options={"timeout": config.API_TIMEOUT}
+                    )
+                    content = response.text
+                    usage = getattr(response, "usage_metadata", None)
+                    input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+                    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+                    request_span.set(input_tokens=input_tokens, output_tokens=output_tokens, chars=len(content))
+
+                latency = time.monotonic() - started
+                self.circuit_breaker.record_success("gemini")
+                telemetry.record_call(
+                    "gemini", "ok", latency, attempts,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens
                 )
-
-                content = response.text
                 logger.info(f"✅ Received response from Gemini ({len(content)} chars)")
                 return content
 
-            except Exception as e:
+            except transient_errors as e:
                 last_error = e
                 error_msg = self._sanitize_text(str(e))
+                logger.warning(f"Gemini API error (attempt {attempt + 1}): {error_msg}")
+                if isinstance(e, (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted)):
+                    self.rate_limiter.penalize("gemini", retry_after_from_error(e))
+                self.circuit_breaker.record_failure("gemini")
+                if attempt < max_retries - 1 and self.circuit_breaker.state("gemini") != OPEN:
+                    self._backoff(attempt, e, cancel_event)
 
-                # Check if it's a rate limit or quota error
-                error_str = str(e).lower()
-                if 'rate' in error_str or 'quota' in error_str:
-                    logger.warning(f"Gemini API error (attempt {attempt + 1}): {error_msg}")
-                    if attempt < max_retries - 1:
-                        time.sleep(config.API_RETRY_DELAY * (attempt + 1))
-                else:
-                    logger.error(f"Unexpected Gemini error: {error_msg}")
-                    break
+            except Exception as e:
+                last_error = e
+                error_msg = self._sanitize_text(str(e))
+                logger.error(f"Unexpected Gemini error: {error_msg}")
+                break
 
+        telemetry.record_call("gemini", "failed", time.monotonic() - call_started, attempts)
         error_msg = self._sanitize_text(str(last_error)) if last_error else "Unknown error"
         logger.error(f"❌ Gemini API failed after {max_retries} attempts: {error_msg}")
         return None
@@ -170,7 +392,10 @@ class AIAnalyzer:
         """
         Call LLM API with automatic fallback to backup provider
 
-        Tries providers in order: Anthropic -> Google Gemini
+        Tries providers in order: Anthropic -> Google Gemini. With config.HEDGE_REQUESTS
+        and both providers available, the backup is fired as a hedge instead of waiting
+        for the primary to exhaust its retries (see _call_llm_hedged). A prompt already
+        answered in this process is served from the response cache.
 
         Args:
             prompt: The prompt to send
@@ -185,23 +410,100 @@ class AIAnalyzer:
         if max_retries is None:
             max_retries = config.API_RETRY_ATTEMPTS
 
+        key = _response_key(prompt)
+        cached = _cached_response(key)
+        if cached is not None:
+            logger.info("♻️ Reusing the cached LLM response for an identical prompt")
+            tracer.instant("llm.cache_hit", "llm")
+            return cached
+
+        if config.HEDGE_REQUESTS and self.anthropic_client and self.gemini_model:
+            result = asyncio.run(self._call_llm_hedged(prompt, max_retries))
+            _remember_response(key, result)
+            return result
+
         # Try Anthropic first
         if self.anthropic_client:
             logger.info("🔄 Trying Anthropic Claude...")
             result = self._call_anthropic(prompt, max_retries)
             if result:
+                _remember_response(key, result)
                 return result
 
         # Fallback to Google Gemini
         if self.gemini_model:
             logger.info("🔄 Falling back to Google Gemini...")
+            if self.anthropic_client:
+                telemetry.record_fallback()
             result = self._call_gemini(prompt, max_retries)
             if result:
+                _remember_response(key, result)
                 return result
 
         # All providers failed
         raise Exception(f"All LLM providers failed after {max_retries} attempts each")
 
+    async def _call_llm_hedged(self, prompt: str, max_retries: int) -> str:
+        """
+        Hedged LLM call: start the primary provider, and if it has not answered
+        within its historical latency percentile, start the backup as well.
+        The first successful response wins and the other request is cancelled.
+
+        Args:
+            prompt: The prompt to send
+            max_retries: Maximum retry attempts per provider
+
+        Returns:
+            Response text from whichever provider answered first
+
+        Raises:
+            Exception: If all providers fail
+        """
+        providers = [
+            ("anthropic", self._call_anthropic),
+            ("gemini", self._call_gemini),
+        ]
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        # Dedicated executor so a losing request never blocks loop shutdown
+        executor = ThreadPoolExecutor(max_workers=len(providers))
+        tasks = {}
+
+        def start(name, call):
+            logger.info(f"🔄 Trying {name}...")
+            future = loop.run_in_executor(executor, call, prompt, max_retries, cancel_event)
+            tasks[future] = name
+            return future
+
+        try:
+            primary_name, primary_call = providers[0]
+            hedge_delay = telemetry.hedge_delay(primary_name)
+            pending = {start(primary_name, primary_call)}
+
+            for name, call in providers[1:]:
+                done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        return task.result()
+                if done:
+                    logger.info(f"🔄 Primary provider failed, falling back to {name}...")
+                else:
+                    logger.info(f"⏱️ No response within {hedge_delay:.1f}s hedge delay, also firing {name}...")
+                telemetry.record_fallback(hedged=not done)
+                pending.add(start(name, call))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        logger.info(f"✅ {tasks[task]} answered first")
+                        return task.result()
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        raise Exception(f"All LLM providers failed after {max_retries} attempts each")
+
     def _extract_json_from_response(self, response_text: str) -> Dict[str, Any]:
         """
         Extract JSON from Claude's response (handles markdown code blocks)
@@ -282,17 +584,34 @@ class AIAnalyzer:
             }
 
         try:
-            # Use the diff analysis prompt
-            prompt = get_prompt("diff_analysis", diff=diff[:10000])  # Limit diff size
-
-            # Call Claude with retry
-            response_text = self._call_llm_with_fallback(prompt)
+            # Drop generated files and noise, keep the most relevant hunks within budget
+            compressed = compress_diff(diff, config.DIFF_TOKEN_BUDGET)
+            if not compressed["diff"].strip():
+                logger.info("Only generated, vendored or whitespace changes; skipping AI analysis")
+                return {
+                    "risk_score": 0.0,
+                    "critical_paths": [],
+                    "suggested_benchmarks": [],
+                    "reasoning": "Only generated, vendored or whitespace-only changes detected",
+                    "suggestions": []
+                }
 
-            # Extract JSON
-            result = self._extract_json_from_response(response_text)
+            # Callers and entry points of the changed functions share each chunk's budget
+            with span("call_graph.context"):
+                context = call_graph_context(compressed["diff"])
+            chunk_tokens = config.DIFF_CHUNK_TOKENS - (config.CALL_GRAPH_CONTEXT_TOKENS if context else 0)
+            chunks = chunk_diff(compressed["diff"], chunk_tokens)
+            tracer.instant("analysis.chunked", chars=len(compressed["diff"]), chunks=len(chunks))
 
-            # Validate and sanitize result
-            result = self._validate_analysis_result(result)
+            if len(chunks) == 1:
+                result = self._analyze_chunk(chunks[0], changed_files, context)
+            else:
+                logger.info(f"Diff split into {len(chunks)} chunks, analyzing concurrently...")
+                results = asyncio.run(self._analyze_chunks_concurrently(chunks, changed_files, context))
+                result = self.merge_analysis_results(
+                    results,
+                    weights=[estimate_tokens(chunk) for chunk in chunks]
+                )
 
             logger.info(f"AI Analysis: risk={result['risk_score']}, paths={len(result['critical_paths'])}")
 
@@ -304,12 +623,148 @@ class AIAnalyzer:
             # Return safe default
             return {
                 "risk_score": 0.5,
-                "critical_paths": changed_files or [],
+                "critical_paths": list(changed_files or []),
                 "suggested_benchmarks": ["test_general_performance"],
                 "reasoning": f"AI analysis failed: {str(e)}",
-                "suggestions": ["Manual review required", "Run full test suite"]
+                "suggestions": ["Manual review required", "Run full test suite"],
+                "degraded": True
             }
 
+    def _analyze_chunk(
+        self,
+        diff_chunk: str,
+        changed_files: List[str] = None,
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a single diff chunk (raises if all providers fail)
+
+        With config.COMBINED_ANALYSIS_PROMPT the same call also returns the overall
+        PR risk and perf-impact estimate, so no separate risk assessment is needed.
+        context is the call_graph_context() of the whole diff; only the summaries of
+        files in this chunk are sent.
+        """
+        paths = [entry["path"] for entry in parse_diff(diff_chunk)]
+        call_graph = format_context(context or {}, paths) or "unavailable"
+        if config.COMBINED_ANALYSIS_PROMPT:
+            prompt = get_prompt(
+                "combined_analysis",
+                files=", ".join(changed_files or []) or "unknown",
+                diff=diff_chunk,
+                context=call_graph
+            )
+        else:
+            prompt = get_prompt("diff_analysis", diff=diff_chunk, context=call_graph)
+        with span("analysis.chunk", files=len(paths), chars=len(diff_chunk)) as chunk_span:
+            response_text = self._call_llm_with_fallback(prompt)
+            result = self._validate_analysis_result(self._extract_json_from_response(response_text))
+            chunk_span.set(risk=result["risk_score"])
+        return result
+
+    async def _analyze_chunks_concurrently(
+        self,
+        chunks: List[str],
+        changed_files: List[str] = None,
+        context: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze diff chunks concurrently, bounded by config.MAX_CONCURRENT_ANALYSES
+
+        Provider SDK calls are blocking, so each chunk runs in a worker thread and
+        wall time tracks the slowest chunk rather than the sum. A chunk that fails
+        is treated as medium risk instead of failing the whole analysis.
+        """
+        semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_ANALYSES)
+
+        async def analyze(index: int, chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Analyzing chunk {index + 1}/{len(chunks)} (~{estimate_tokens(chunk)} tokens)")
+                return await asyncio.to_thread(self._analyze_chunk, chunk, changed_files, context)
+
+        outcomes = await asyncio.gather(
+            *(analyze(i, chunk) for i, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
+
+        results = []
+        failures = 0
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                failures += 1
+                error_msg = self._sanitize_text(str(outcome))
+                logger.warning(f"Chunk {index + 1} analysis failed: {error_msg}")
+                results.append({
+                    "risk_score": 0.5,
+                    "critical_paths": [],
+                    "suggested_benchmarks": [],
+                    "reasoning": f"Chunk {index + 1} could not be analyzed",
+                    "suggestions": ["Manual review required"]
+                })
+            else:
+                results.append(outcome)
+
+        if failures == len(chunks):
+            raise Exception(f"All {failures} diff chunks failed analysis")
+
+        return results
+
+    @staticmethod
+    def merge_analysis_results(
+        results: List[Dict[str, Any]],
+        weights: List[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Merge per-chunk (or per-push) analysis results into a single result
+
+        Risk is the max across chunks, or a size-weighted mean when
+        config.CHUNK_RISK_MERGE is "weighted". Lists are unioned in order
+        and suggestions are deduplicated case-insensitively.
+        """
+        if not results:
+            return AIAnalyzer._validate_analysis_result({})
+
+        risks = [r.get("risk_score", 0.5) for r in results]
+        if config.CHUNK_RISK_MERGE == "weighted":
+            weights = weights or [1] * len(results)
+            risk_score = sum(r * w for r, w in zip(risks, weights)) / max(sum(weights), 1)
+        else:
+            risk_score = max(risks)
+
+        def union(key: str, normalize=lambda item: item) -> List[Any]:
+            merged = []
+            seen = set()
+            for result in results:
+                for item in result.get(key, []):
+                    marker = normalize(item)
+                    if marker not in seen:
+                        seen.add(marker)
+                        merged.append(item)
+            return merged
+
+        reasonings = []
+        for result in results:
+            reasoning = result.get("reasoning", "")
+            if reasoning and reasoning not in reasonings:
+                reasonings.append(reasoning)
+
+        merged = {
+            "risk_score": risk_score,
+            "critical_paths": union("critical_paths"),
+            "suggested_benchmarks": union("suggested_benchmarks"),
+            "reasoning": " ".join(reasonings) or "No reasoning provided",
+            "suggestions": union("suggestions", lambda s: str(s).strip().lower())
+        }
+
+        # Overall risk is the highest level; perf impact comes from the riskiest result
+        assessed = [r for r in results if r.get("overall_risk") in RISK_LEVELS]
+        if assessed:
+            merged["overall_risk"] = max((r["overall_risk"] for r in assessed), key=RISK_LEVELS.index)
+            riskiest = max(assessed, key=lambda r: r.get("risk_score", 0))
+            if riskiest.get("perf_impact"):
+                merged["perf_impact"] = riskiest["perf_impact"]
+
+        return AIAnalyzer._validate_analysis_result(merged)
+
     def refine_score(
         self,
         raw_score: float,
@@ -337,7 +792,8 @@ class AIAnalyzer:
                 risk_score=risk_score
             )
 
-            response_text = self._call_llm_with_fallback(prompt)
+            with span("analysis.refine_score", raw_score=raw_score):
+                response_text = self._call_llm_with_fallback(prompt)
             result = self._extract_json_from_response(response_text)
 
             adjusted_score = result.get("adjusted_score", raw_score)
@@ -358,10 +814,56 @@ class AIAnalyzer:
                 "justification": "AI refinement unavailable"
             }
 
+    def generate_benchmark_test(
+        self,
+        code: str,
+        func_name: str,
+        import_line: str,
+        time_budget: float
+    ) -> Optional[str]:
+        """
+        Ask the LLM for a pytest-benchmark test covering a function
+
+        Args:
+            code: Source of the function
+            func_name: Function name
+            import_line: Import statement the test should use
+            time_budget: Expected seconds per call, as a hint for input sizes
+
+        Returns:
+            Python source of the test, or None if generation failed
+        """
+        logger.info(f"Generating benchmark for {func_name}...")
+
+        try:
+            prompt = get_prompt(
+                "test_generator",
+                code=code,
+                func_name=func_name,
+                import_line=import_line,
+                baseline_time=time_budget
+            )
+            response_text = self._call_llm_with_fallback(prompt)
+
+            # Strip a markdown code fence if the model added one
+            if "```" in response_text:
+                start = response_text.find("```")
+                start = response_text.find("\n", start) + 1
+                end = response_text.find("```", start)
+                response_text = response_text[start:end if end != -1 else None]
+
+            return response_text.strip() or None
+
+        except Exception as e:
+            error_msg = self._sanitize_text(str(e))
+            logger.error(f"Error generating benchmark: {error_msg}")
+            return None
+
     def assess_overall_risk(
         self,
         changed_files: List[str],
-        performance_history: Dict[str, Any] = None
+        performance_history: Dict[str, Any] = None,
+        analysis: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """
         Assess overall PR risk based on changed files and history
@@ -369,10 +871,19 @@ class AIAnalyzer:
         Args:
             changed_files: List of changed file paths
             performance_history: Historical performance data
+            analysis: Result of analyze_diff; if the combined prompt already
+                assessed the overall risk, it is returned without another call
 
         Returns:
             Dictionary with risk assessment
         """
+        if analysis and analysis.get("overall_risk"):
+            return {
+                "overall_risk": analysis["overall_risk"],
+                "perf_impact": analysis.get("perf_impact", "Unknown"),
+                "details": analysis
+            }
+
         logger.info("Assessing overall PR risk...")
 
         try:
@@ -382,7 +893,8 @@ class AIAnalyzer:
                 history=json.dumps(performance_history or {}, indent=2)
             )
 
-            response_text = self._call_llm_with_fallback(prompt)
+            with span("analysis.assess_risk", files=len(changed_files)):
+                response_text = self._call_llm_with_fallback(prompt)
             result = self._extract_json_from_response(response_text)
 
             return {
@@ -400,7 +912,8 @@ class AIAnalyzer:
                 "details": {}
             }
 
-    def _validate_analysis_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _validate_analysis_result(result: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and sanitize AI analysis result"""
 
         # Ensure required fields exist
@@ -426,6 +939,12 @@ class AIAnalyzer:
             else:
                 validated["suggestions"] = []
 
+        # Overall risk fields from the combined prompt are optional
+        overall_risk = str(result.get("overall_risk", "")).strip().lower()
+        if overall_risk in RISK_LEVELS:
+            validated["overall_risk"] = overall_risk
+            validated["perf_impact"] = str(result.get("perf_impact") or "Unknown")
+
         return validated
 
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+PerfGuard AI Analyzer Benchmark
+Measures end-to-end AIAnalyzer throughput and tail latency against the local LLM stand-in
+"""
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+from pathlib import Path
+
+PERFGUARD_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PERFGUARD_DIR))
+
+from config import config
+from logger import PerfGuardLogger
+from llm_stub_server import start_stub_server
+from telemetry import percentile
+
+
+def load_sample_diff(path: str = None) -> str:
+    """Diff to analyze: a file, or the sample app's slow functions rendered as an added file"""
+    if path:
+        return Path(path).read_text(encoding="utf-8")
+
+    source = PERFGUARD_DIR.parent / "sample-app" / "slow_function.py"
+    result = subprocess.run(
+        ["git", "diff", "--no-index", "/dev/null", str(source)],
+        capture_output=True,
+        text=True
+    )
+    return result.stdout
+
+
+def run_benchmark(diff: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Run analyze_diff repeatedly with a thread pool and collect latency stats
+
+    Returns:
+        Dictionary with throughput, latency percentiles and failure count
+    """
+    from ai_analyzer import AIAnalyzer
+
+    analyzer = AIAnalyzer()
+    latencies = []
+    failures = 0
+
+    def one_request(_):
+        started = time.perf_counter()
+        result = analyzer.analyze_diff(diff)
+        return time.perf_counter() - started, "failed" in result.get("reasoning", "")
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, failed in pool.map(one_request, range(requests)):
+            latencies.append(latency)
+            failures += failed
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AIAnalyzer against the local LLM stand-in")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--diff", help="Diff file to analyze (default: sample-app/slow_function.py)")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Stub latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--providers", choices=["anthropic", "gemini", "both"], default="anthropic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        PerfGuardLogger.get_logger()
+        PerfGuardLogger.set_level("WARNING")
+
+    server = start_stub_server(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point the analyzer at the stub and keep its local state out of the working tree
+    state_dir = tempfile.mkdtemp(prefix="perfguard-bench-")
+    config.ANTHROPIC_API_KEY = "stub-key" if args.providers in ("anthropic", "both") else None
+    config.GOOGLE_API_KEY = "stub-key" if args.providers in ("gemini", "both") else None
+    config.ANTHROPIC_BASE_URL = url
+    config.GEMINI_API_ENDPOINT = url
+    config.TELEMETRY_PATH = str(Path(state_dir) / "telemetry.json")
+    config.CIRCUIT_STATE_PATH = str(Path(state_dir) / "circuit.json")
+
+    try:
+        stats = run_benchmark(load_sample_diff(args.diff), args.requests, args.concurrency)
+    finally:
+        server.shutdown()
+
+    print(f"Analyzer benchmark ({args.providers}, stub latency {args.latency}, "
+          f"errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%})")
+    print(f"  requests:    {stats['requests']} @ concurrency {stats['concurrency']}")
+    print(f"  throughput:  {stats['throughput_rps']:.2f} req/s ({stats['wall_seconds']:.2f}s wall)")
+    print(f"  latency:     p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  "
+          f"p99 {stats['p99']:.3f}s  max {stats['max']:.3f}s")
+    print(f"  failures:    {stats['failures']}")
+    print(f"  stub served: {server.behavior.request_count} HTTP requests")
+
+
+if __name__ == '__main__':
+    main()
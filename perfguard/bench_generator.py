@@ -0,0 +1,293 @@
+"""
+PerfGuard AI Benchmark Generator
+Generates pytest-benchmark tests for changed functions without perf coverage
+"""
+import os
+import ast
+import sys
+import json
+import shutil
+import hashlib
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+from config import config
+from logger import get_logger
+from diff_parser import changed_lines
+from static_analyzer import changed_functions
+from perf_suite import is_test_path, test_environment
+
+logger = get_logger(__name__)
+
+TEST_HEADER = '''# Generated by PerfGuard AI for {function} (body hash {body_hash})
+# Regenerated automatically when the function body changes
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = next(p for p in Path(__file__).resolve().parents if (p / "{module_path}").exists())
+sys.path.insert(0, str(_ROOT / "{module_dir}"))
+
+'''
+
+
+def function_hash(node: ast.AST) -> str:
+    """Hash of a function's AST, stable across moves, whitespace and comment edits"""
+    return hashlib.sha256(ast.dump(node, include_attributes=False).encode("utf-8")).hexdigest()[:16]
+
+
+def find_uncovered_functions(diff: str, repo_root: str = ".") -> List[Dict[str, Any]]:
+    """
+    Changed top-level public functions that no perf test references
+
+    Args:
+        diff: Git diff string
+        repo_root: Repository root the diff paths are relative to
+
+    Returns:
+        List of {"path", "name", "source", "hash"} dictionaries
+    """
+    from test_selector import find_covering_tests
+
+    candidates = []
+    for path, lines in changed_lines(diff).items():
+        if not path.endswith(".py") or is_test_path(path):
+            continue
+        file_path = Path(repo_root) / path
+        if not file_path.exists():
+            continue
+
+        try:
+            source = file_path.read_text(encoding="utf-8")
+            functions = changed_functions(source, lines)
+        except (SyntaxError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not parse {path}: {e}")
+            continue
+
+        for function in functions:
+            # Methods, nested and private functions cannot be benchmarked in isolation
+            if function.col_offset != 0 or function.name.startswith("_"):
+                continue
+            if isinstance(function, ast.AsyncFunctionDef):
+                continue
+            candidates.append({
+                "path": path,
+                "name": function.name,
+                "source": ast.get_source_segment(source, function) or "",
+                "hash": function_hash(function),
+            })
+
+    if not candidates:
+        return []
+
+    # Generated tests do not count as coverage here: the cache decides whether
+    # they are still current for the function body
+    coverage = find_covering_tests([c["name"] for c in candidates])
+    uncovered = [
+        c for c in candidates
+        if not any(
+            config.GENERATED_TESTS_DIR not in Path(node_id.partition("::")[0]).parts
+            for node_id in coverage.get(c["name"], [])
+        )
+    ]
+    logger.info(f"{len(uncovered)}/{len(candidates)} changed function(s) have no perf test")
+    return uncovered
+
+
+def _limit_resources():
+    """Resource limits for the validation subprocess (POSIX only)"""
+    import resource
+
+    memory = config.GENERATED_TEST_MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (config.GENERATED_TEST_TIMEOUT, config.GENERATED_TEST_TIMEOUT + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (64 * 1024 * 1024, 64 * 1024 * 1024))
+
+
+def check_test_source(source: str) -> Optional[str]:
+    """
+    Static checks on generated test code before it is ever executed
+
+    Returns:
+        None if acceptable, otherwise the reason for rejecting it
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return f"syntax error: {e}"
+
+    tests = [
+        node for node in tree.body
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test_")
+    ]
+    if not tests:
+        return "no test function"
+    for test in tests:
+        if "benchmark" not in [arg.arg for arg in test.args.args]:
+            return f"{test.name} does not use the benchmark fixture"
+        if not any("mark.perf" in ast.unparse(decorator) for decorator in test.decorator_list):
+            return f"{test.name} is not marked @pytest.mark.perf"
+    return None
+
+
+def validate_test(test_file: Path, repo_root: str = ".") -> Tuple[bool, str]:
+    """
+    Run a generated test once in an isolated subprocess
+
+    The subprocess gets no credentials, a wall-clock timeout and CPU, memory and
+    file-size limits. Benchmarking is disabled so each test body runs once.
+
+    Returns:
+        (passed, output tail)
+    """
+    cmd = [
+        sys.executable, "-m", "pytest", str(test_file),
+        "-p", "no:cacheprovider", "-q", "-x", "--benchmark-disable"
+    ]
+
+    try:
+        result = subprocess.run(
+            cmd,
+            cwd=repo_root,
+            env=test_environment(),
+            capture_output=True,
+            text=True,
+            timeout=config.GENERATED_TEST_TIMEOUT,
+            preexec_fn=_limit_resources if os.name == "posix" else None
+        )
+    except subprocess.TimeoutExpired:
+        return False, f"timed out after {config.GENERATED_TEST_TIMEOUT}s"
+
+    output = (result.stdout + result.stderr).strip()
+    return result.returncode == 0, output[-2000:]
+
+
+class GeneratedTestCache:
+    """
+    Index of generated tests keyed by function body hash
+
+    Rejected generations are remembered too, so an unchanged function is never
+    sent to the LLM twice.
+    """
+
+    def __init__(self, tests_dir: str = None):
+        self.tests_dir = Path(tests_dir or config.GENERATED_TESTS_DIR)
+        self.index_path = self.tests_dir / "index.json"
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f).get("functions", {})
+        except Exception as e:
+            logger.warning(f"Could not load generated test index: {e}")
+            return {}
+
+    def save(self):
+        self.tests_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, 'w') as f:
+            json.dump({"functions": self.entries}, f, indent=2)
+
+    def get(self, body_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(body_hash)
+        if entry and entry.get("accepted") and not (self.tests_dir / entry["file"]).exists():
+            return None
+        return entry
+
+    def record(self, function: str, body_hash: str, file_name: Optional[str], accepted: bool, reason: str = ""):
+        """Record an outcome, dropping tests generated for earlier versions of the function"""
+        for old_hash, entry in list(self.entries.items()):
+            if entry["function"] == function and old_hash != body_hash:
+                if entry.get("file"):
+                    (self.tests_dir / entry["file"]).unlink(missing_ok=True)
+                del self.entries[old_hash]
+
+        self.entries[body_hash] = {
+            "function": function,
+            "file": file_name,
+            "accepted": accepted,
+            "reason": reason,
+            "created": datetime.now().isoformat()
+        }
+
+
+def generate_missing_benchmarks(diff: str, repo_root: str = ".") -> Dict[str, Any]:
+    """
+    Generate, validate and cache benchmarks for uncovered changed functions
+
+    Args:
+        diff: Git diff string
+        repo_root: Repository root the diff paths are relative to
+
+    Returns:
+        Dictionary with "generated", "reused" and "rejected" lists of functions
+    """
+    summary = {"generated": [], "reused": [], "rejected": []}
+    uncovered = find_uncovered_functions(diff, repo_root)
+    if not uncovered:
+        return summary
+
+    from ai_analyzer import AIAnalyzer
+
+    cache = GeneratedTestCache(str(Path(repo_root) / config.GENERATED_TESTS_DIR))
+    staging = cache.tests_dir / ".staging"
+    analyzer = None
+
+    for function in uncovered:
+        qualified = f"{function['path']}::{function['name']}"
+        cached = cache.get(function["hash"])
+        if cached:
+            summary["reused" if cached["accepted"] else "rejected"].append(qualified)
+            continue
+        if len(summary["generated"]) + len(summary["rejected"]) >= config.MAX_GENERATED_TESTS:
+            logger.info(f"Generated test limit reached, skipping {qualified}")
+            continue
+
+        module_path = Path(function["path"])
+        analyzer = analyzer or AIAnalyzer()
+        body = analyzer.generate_benchmark_test(
+            function["source"],
+            function["name"],
+            f"from {module_path.stem} import {function['name']}",
+            config.GENERATED_TEST_TIME_BUDGET
+        )
+
+        reason = check_test_source(body) if body else "generation failed"
+        file_name = f"test_gen_{module_path.stem}_{function['name']}_{function['hash'][:8]}.py"
+
+        if reason is None:
+            header = TEST_HEADER.format(
+                function=qualified,
+                body_hash=function["hash"],
+                module_path=module_path.as_posix(),
+                module_dir=module_path.parent.as_posix()
+            )
+            staging.mkdir(parents=True, exist_ok=True)
+            candidate = staging / file_name
+            candidate.write_text(header + body + "\n", encoding="utf-8")
+
+            passed, output = validate_test(candidate, repo_root)
+            if passed:
+                shutil.move(str(candidate), str(cache.tests_dir / file_name))
+            else:
+                candidate.unlink(missing_ok=True)
+                errors = [line for line in output.splitlines() if line.startswith("E ")]
+                detail = (errors or output.splitlines() or ["no output"])[-1].lstrip("E ").strip()
+                reason = f"validation failed: {detail}"
+
+        if reason is None:
+            logger.info(f"✅ Generated benchmark for {qualified}: {file_name}")
+            cache.record(qualified, function["hash"], file_name, True)
+            summary["generated"].append(qualified)
+        else:
+            logger.warning(f"Rejected generated benchmark for {qualified}: {reason}")
+            cache.record(qualified, function["hash"], None, False, reason)
+            summary["rejected"].append(qualified)
+
+    shutil.rmtree(staging, ignore_errors=True)
+    cache.save()
+    return summary
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+PerfGuard AI Startup Benchmark
+Measures the import cost of main.py with `python -X importtime` and enforces a budget
+"""
+import os
+import sys
+import subprocess
+import argparse
+from typing import Dict, Any, List
+from pathlib import Path
+
+PERFGUARD_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PERFGUARD_DIR))
+
+from config import config
+
+# Heavy dependencies that must not be imported before the diff is known
+DEFERRED_MODULES = [
+    "anthropic",
+    "google.generativeai",
+    "pytest",
+    "radon",
+    "memory_profiler",
+    "psutil",
+]
+
+
+def measure_import_time(module: str = "main") -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter under -X importtime
+
+    Args:
+        module: Module to import from the perfguard directory
+
+    Returns:
+        Dictionary with total import time (ms), the module's direct imports by
+        cumulative time and the set of all imported module names
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PERFGUARD_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    direct: List[Dict[str, Any]] = []
+    imported = set()
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us = int(fields[0]), int(fields[1])
+        name = fields[2].rstrip()
+        total_us += self_us
+        imported.add(name.strip())
+        # Nesting is shown as two extra spaces per level; depth 1 = imported by the module itself
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            direct.append({"module": name.strip(), "cumulative_ms": cumulative_us / 1000})
+
+    direct.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+    return {"total_ms": total_us / 1000, "direct": direct, "imported": imported}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PerfGuard startup import-time benchmark")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, default=config.STARTUP_IMPORT_BUDGET_MS,
+                        help="Fail if total import time exceeds this many milliseconds")
+    parser.add_argument("--runs", type=int, default=5, help="Take the best of N runs")
+    parser.add_argument("--top", type=int, default=10, help="Show the N most expensive imports")
+    args = parser.parse_args()
+
+    runs = [measure_import_time(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["total_ms"])
+
+    print(f"Import time for '{args.module}': {best['total_ms']:.1f} ms "
+          f"(best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for item in best["direct"][:args.top]:
+        print(f"  {item['cumulative_ms']:8.1f} ms  {item['module']}")
+
+    failed = False
+
+    eager = [m for m in DEFERRED_MODULES if m in best["imported"]]
+    if eager:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+
+    if best["total_ms"] > args.budget_ms:
+        print(f"FAIL: import time {best['total_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("PASS: startup within budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+PerfGuard AI Machine Calibration
+Fixed micro-benchmarks giving a machine speed vector, used to compare metrics measured on different runners
+
+The vector holds the best-of-N seconds for a pure-Python kernel, a memory
+copy and a syscall loop. It is saved with every baseline; when the current
+runner's vector differs from the baseline's, baselines of timing-sensitive
+metrics are rescaled to what they would have been on this runner.
+"""
+import os
+import json
+import math
+import time
+import platform
+from datetime import date, datetime
+from typing import Dict, Any, Optional
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+_MEMORY_BYTES = 32 * 1024 * 1024
+
+
+def _python_kernel():
+    """Interpreter-bound work: arithmetic, dict and string operations"""
+    table = {}
+    total = 0
+    for i in range(100_000):
+        total += (i * i) % 7
+        table[i % 1000] = str(i)
+    return total, len("".join(table.values()))
+
+
+def _memory_kernel(source: bytearray, target: bytearray):
+    """Bandwidth-bound work: copy a buffer larger than the CPU caches"""
+    for _ in range(4):
+        target[:] = source
+
+
+def _syscall_kernel():
+    """Kernel-entry-bound work: a stat() loop on the working directory"""
+    for _ in range(20_000):
+        os.stat(".")
+
+
+def _best_of(kernel, *args) -> float:
+    best = float('inf')
+    for _ in range(config.CALIBRATION_REPEATS):
+        started = time.perf_counter()
+        kernel(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure() -> Dict[str, float]:
+    """
+    Run the calibration suite
+
+    Returns:
+        Speed vector: seconds per kernel ("python", "memory", "syscall"), lower is faster
+    """
+    source = bytearray(_MEMORY_BYTES)
+    target = bytearray(_MEMORY_BYTES)
+    return {
+        "python": _best_of(_python_kernel),
+        "memory": _best_of(_memory_kernel, source, target),
+        "syscall": _best_of(_syscall_kernel),
+    }
+
+
+def host_key() -> str:
+    """Identifies the machine the cached calibration belongs to"""
+    from fingerprint import cpu_model
+
+    return f"{platform.node()}|{cpu_model()}|{os.cpu_count()}"
+
+
+def get_calibration(force: bool = False) -> Dict[str, Any]:
+    """
+    Speed vector of this machine, measured at most once per host and day
+
+    Args:
+        force: Measure again even if today's result is cached
+
+    Returns:
+        {"host", "date", "vector", "measured"}
+    """
+    host = host_key()
+    today = date.today().isoformat()
+    cache = {}
+    try:
+        with open(config.CALIBRATION_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    entry = cache.get(host)
+    if entry and entry.get("date") == today and not force:
+        logger.info(f"Using today's calibration for this host: {entry['vector']}")
+        return entry
+
+    started = time.perf_counter()
+    entry = {"host": host, "date": today, "vector": measure(), "measured": datetime.now().isoformat()}
+    logger.info(f"Calibrated machine in {time.perf_counter() - started:.2f}s: {entry['vector']}")
+
+    # Entries of other hosts from earlier days are of no further use
+    cache = {key: value for key, value in cache.items() if value.get("date") == today}
+    cache[host] = entry
+    try:
+        tmp_path = f"{config.CALIBRATION_CACHE_PATH}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, config.CALIBRATION_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not cache calibration: {e}")
+    return entry
+
+
+def speed_factor(metric: str, current: Dict[str, float], recorded: Dict[str, float]) -> Optional[float]:
+    """
+    How much slower this machine is than the one a baseline was recorded on, for a metric
+
+    Weighted geometric mean of the per-kernel time ratios, with the weights in
+    config.CALIBRATION_WEIGHTS; 1.2 means the metric is expected to be 20% higher
+    here with no code change.
+
+    Returns:
+        The factor, or None if the metric is not normalized or a vector is incomplete
+    """
+    weights = config.CALIBRATION_WEIGHTS.get(metric)
+    if not weights or not current or not recorded:
+        return None
+    try:
+        log_ratio = sum(weight * math.log(current[kernel] / recorded[kernel]) for kernel, weight in weights.items())
+    except (KeyError, ValueError, ZeroDivisionError):
+        return None
+    return math.exp(log_ratio / sum(weights.values()))
+
+
+def normalize_baseline(metric: str, baseline: Dict[str, Any], current: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Rescale a stored baseline to this machine's speed
+
+    Args:
+        metric: Metric name (see config.CALIBRATION_WEIGHTS)
+        baseline: Stored baseline metrics, with the "calibration" vector it was recorded with
+        current: This machine's speed vector
+
+    Returns:
+        The baseline with "current" and per-benchmark means multiplied by the
+        speed factor and "calibration_factor" set, or the baseline unchanged
+    """
+    factor = speed_factor(metric, current, baseline.get("calibration"))
+    if factor is None or abs(factor - 1) < config.CALIBRATION_MIN_CHANGE:
+        return baseline
+
+    normalized = dict(baseline)
+    normalized["current"] = baseline["current"] * factor
+    if baseline.get("benchmarks"):
+        normalized["benchmarks"] = {name: mean * factor for name, mean in baseline["benchmarks"].items()}
+    normalized["calibration_factor"] = factor
+    logger.info(f"Runner speed differs from the {metric} baseline's: scaling the baseline by {factor:.3f}")
+    return normalized
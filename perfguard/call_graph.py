@@ -0,0 +1,370 @@
+"""
+PerfGuard AI Call Graph
+Static caller/entry-point index of the repository, used to tell the LLM how hot a changed function is
+"""
+import os
+import ast
+import json
+import hashlib
+import threading
+import subprocess
+from fnmatch import fnmatch
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
+from pathlib import Path
+from config import config
+from logger import get_logger
+from diff_parser import changed_lines, estimate_tokens
+from perf_suite import is_test_path
+
+logger = get_logger(__name__)
+
+# Bump when the per-file record format changes so stale caches are rebuilt
+INDEX_VERSION = 1
+
+# Decorator attributes that register a function as a web entry point (Flask/FastAPI style)
+ROUTE_DECORATORS = {"route", "get", "post", "put", "patch", "delete"}
+
+
+def blob_sha(data: bytes) -> str:
+    """Git blob SHA of file contents, so cache keys match `git ls-files -s`"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _route_label(decorator: ast.AST) -> Optional[str]:
+    """'GET /api/movies' for @app.route('/api/movies') and friends, else None"""
+    if not isinstance(decorator, ast.Call) or not isinstance(decorator.func, ast.Attribute):
+        return None
+    kind = decorator.func.attr
+    if kind not in ROUTE_DECORATORS or not decorator.args:
+        return None
+    route = decorator.args[0]
+    if not isinstance(route, ast.Constant) or not isinstance(route.value, str):
+        return None
+
+    methods = [kind.upper()] if kind != "route" else ["GET"]
+    for keyword in decorator.keywords:
+        if keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+            methods = [
+                element.value.upper() for element in keyword.value.elts
+                if isinstance(element, ast.Constant) and isinstance(element.value, str)
+            ] or methods
+    return f"{'/'.join(methods)} {route.value}"
+
+
+class _CallVisitor(ast.NodeVisitor):
+    """Records every function in a module with its calls and whether each is made in a loop"""
+
+    def __init__(self):
+        self.scope: List[str] = []
+        self.loop_depth = 0
+        self.functions: Dict[str, Dict[str, Any]] = {}
+
+    def visit_ClassDef(self, node):
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        qualname = ".".join(self.scope + [node.name])
+        start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+        self.functions[qualname] = {
+            "line": start,
+            "end": node.end_lineno,
+            "calls": [],
+            "entry": next(filter(None, map(_route_label, node.decorator_list)), None),
+        }
+
+        outer_depth, self.loop_depth = self.loop_depth, 0
+        self.scope.append(node.name)
+        for statement in node.body:
+            self.visit(statement)
+        self.scope.pop()
+        self.loop_depth = outer_depth
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _visit_loop(self, node):
+        self.loop_depth += 1
+        self.generic_visit(node)
+        self.loop_depth -= 1
+
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+    visit_ListComp = _visit_loop
+    visit_SetComp = _visit_loop
+    visit_DictComp = _visit_loop
+    visit_GeneratorExp = _visit_loop
+
+    def visit_Call(self, node):
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+        caller = self.functions.get(".".join(self.scope)) if self.scope else None
+        if name and caller is not None:
+            call = [name, self.loop_depth > 0]
+            if call not in caller["calls"]:
+                caller["calls"].append(call)
+        self.generic_visit(node)
+
+
+def index_source(source: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Functions defined in a module
+
+    Returns:
+        Dictionary of qualified name -> {"line", "end", "calls": [[name, in_loop]], "entry"}
+    """
+    visitor = _CallVisitor()
+    visitor.visit(ast.parse(source))
+    return visitor.functions
+
+
+class CallGraphIndex:
+    """
+    Repository-wide call graph, cached per file by git blob SHA
+
+    Calls are resolved by name only: a call to `get_movie_by_id` or
+    `self.get_movie_by_id` links to every function of that name. This
+    over-approximates callers, which is the safe direction for risk context.
+    """
+
+    def __init__(self, repo_root: str = ".", cache_path: str = None):
+        self.repo_root = Path(repo_root)
+        self.cache_path = Path(cache_path or config.CALL_GRAPH_CACHE_PATH)
+        self.files: Dict[str, Dict[str, Any]] = self._load()
+        self._callers: Dict[str, List[Tuple[str, bool]]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            return data.get("files", {}) if data.get("version") == INDEX_VERSION else {}
+        except Exception as e:
+            logger.warning(f"Could not load call graph cache: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save call graph cache: {e}")
+
+    def _source_files(self) -> List[str]:
+        """Python files tracked by git (or found on disk outside a git checkout)"""
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard", "*.py"],
+            cwd=self.repo_root,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode == 0:
+            paths = result.stdout.splitlines()
+        else:
+            paths = [p.relative_to(self.repo_root).as_posix() for p in self.repo_root.rglob("*.py")]
+
+        return sorted(
+            path for path in paths
+            if not is_test_path(path)
+            and not any(fnmatch(path, pattern) for pattern in config.DIFF_EXCLUDE_PATTERNS)
+        )
+
+    def refresh(self) -> "CallGraphIndex":
+        """Re-index files whose blob SHA changed and drop deleted ones"""
+        paths = self._source_files()
+        reindexed = 0
+
+        for path in paths:
+            try:
+                data = (self.repo_root / path).read_bytes()
+            except OSError:
+                continue
+            sha = blob_sha(data)
+            if self.files.get(path, {}).get("sha") == sha:
+                continue
+
+            try:
+                functions = index_source(data.decode("utf-8"))
+            except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+                logger.debug(f"Could not index {path}: {e}")
+                functions = {}
+            self.files[path] = {"sha": sha, "functions": functions}
+            reindexed += 1
+
+        removed = set(self.files) - set(paths)
+        for path in removed:
+            del self.files[path]
+
+        if reindexed or removed:
+            self._save()
+        logger.info(f"Call graph: {len(paths)} files, {reindexed} re-indexed, {len(removed)} removed")
+
+        self._callers = {}
+        for path, entry in self.files.items():
+            for qualname, function in entry["functions"].items():
+                for name, in_loop in function["calls"]:
+                    self._callers.setdefault(name, []).append((f"{path}::{qualname}", in_loop))
+        return self
+
+    def _function(self, key: str) -> Dict[str, Any]:
+        path, _, qualname = key.partition("::")
+        return self.files[path]["functions"][qualname]
+
+    def functions_at(self, path: str, lines: Set[int]) -> List[str]:
+        """Keys ("path::qualname") of indexed functions overlapping the given lines"""
+        functions = self.files.get(path, {}).get("functions", {})
+        return [
+            f"{path}::{qualname}" for qualname, function in functions.items()
+            if any(function["line"] <= line <= function["end"] for line in lines)
+        ]
+
+    def reach(self, key: str) -> Dict[str, Any]:
+        """
+        Transitive callers of a function, up to config.CALL_GRAPH_MAX_DEPTH
+
+        Returns:
+            Dictionary with "callers" (direct caller -> called in a loop),
+            "transitive_callers" count and "entry_points" (label -> reached
+            through a loop somewhere on the path)
+        """
+        name = key.partition("::")[2].rsplit(".", 1)[-1]
+        direct = {}
+        for caller, in_loop in self._callers.get(name, []):
+            if caller != key:
+                direct[caller] = direct.get(caller, False) or in_loop
+
+        entry_points = {}
+        own_entry = self._function(key)["entry"]
+        if own_entry:
+            entry_points[own_entry] = False
+
+        seen = {key: False}
+        queue = deque((caller, in_loop, 1) for caller, in_loop in direct.items())
+        while queue:
+            caller, looped, depth = queue.popleft()
+            if caller in seen and (seen[caller] or not looped):
+                continue
+            seen[caller] = looped
+
+            entry = self._function(caller)["entry"]
+            if entry:
+                entry_points[entry] = entry_points.get(entry, False) or looped
+            if depth >= config.CALL_GRAPH_MAX_DEPTH:
+                continue
+            caller_name = caller.partition("::")[2].rsplit(".", 1)[-1]
+            for next_caller, in_loop in self._callers.get(caller_name, []):
+                queue.append((next_caller, looped or in_loop, depth + 1))
+
+        return {
+            "callers": direct,
+            "transitive_callers": len(seen) - 1,
+            "entry_points": entry_points,
+        }
+
+    def describe(self, key: str) -> Tuple[int, str]:
+        """
+        One-line hotness summary of a function
+
+        Returns:
+            (hotness rank, summary line); entry points reached through loops rank highest
+        """
+        reach = self.reach(key)
+        callers = reach["callers"]
+        entry_points = reach["entry_points"]
+
+        if not callers and not entry_points:
+            return 0, f"- {key}: no callers found in the repository"
+
+        parts = []
+        if callers:
+            looped = [c.partition("::")[2] for c, in_loop in callers.items() if in_loop]
+            caller_text = f"{len(callers)} direct caller(s)"
+            if looped:
+                caller_text += f", called in a loop by {', '.join(looped[:3])}"
+            if reach["transitive_callers"] > len(callers):
+                caller_text += f", {reach['transitive_callers']} transitive"
+            parts.append(caller_text)
+
+        if entry_points:
+            ordered = sorted(entry_points, key=lambda label: (not entry_points[label], label))
+            limit = config.CALL_GRAPH_MAX_ENTRY_POINTS
+            labels = [f"{label} (loop)" if entry_points[label] else label for label in ordered[:limit]]
+            if len(ordered) > limit:
+                labels.append(f"+{len(ordered) - limit} more")
+            parts.append(f"reaches {len(entry_points)} entry point(s): {', '.join(labels)}")
+
+        rank = len(entry_points) * 10 + sum(entry_points.values()) * 10 + len(callers)
+        return rank, f"- {key}: {'; '.join(parts)}"
+
+
+# Indexes stay loaded between runs in one process (daemon jobs), refreshed incrementally
+_indexes: Dict[str, CallGraphIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def call_graph_context(diff: str, repo_root: str = ".") -> Dict[str, List[Tuple[int, str]]]:
+    """
+    Hotness summaries for the functions a diff changes
+
+    Args:
+        diff: Git diff string
+        repo_root: Repository root the diff paths are relative to
+
+    Returns:
+        Dictionary of file path -> [(rank, summary line)]; empty if disabled or on error
+    """
+    if not config.CALL_GRAPH_ENABLED:
+        return {}
+
+    try:
+        root = str(Path(repo_root).resolve())
+        with _indexes_lock:
+            if root not in _indexes:
+                _indexes[root] = CallGraphIndex(repo_root)
+            index = _indexes[root].refresh()
+            context = {}
+            for path, lines in changed_lines(diff).items():
+                if path.endswith(".py"):
+                    described = [index.describe(key) for key in index.functions_at(path, lines)]
+                    if described:
+                        context[path] = described
+            return context
+    except Exception as e:
+        logger.warning(f"Could not build call graph context: {e}")
+        return {}
+
+
+def format_context(context: Dict[str, List[Tuple[int, str]]], paths: List[str], max_tokens: int = None) -> str:
+    """
+    Hottest summary lines for the given files that fit the token budget
+
+    Args:
+        context: Result of call_graph_context()
+        paths: Files in the diff chunk being analyzed
+        max_tokens: Budget (defaults to config.CALL_GRAPH_CONTEXT_TOKENS)
+
+    Returns:
+        Newline-separated summary lines, or "" when there is nothing to add
+    """
+    if max_tokens is None:
+        max_tokens = config.CALL_GRAPH_CONTEXT_TOKENS
+
+    described = sorted(
+        (entry for path in paths for entry in context.get(path, [])),
+        key=lambda entry: -entry[0]
+    )
+    lines = []
+    used = 0
+    for _, line in described:
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
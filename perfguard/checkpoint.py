@@ -0,0 +1,175 @@
+"""
+PerfGuard AI Checkpoints
+Stage outputs saved to disk so a rerun of the same commit and configuration resumes where the last run stopped
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+from diff_parser import parse_diff
+
+logger = get_logger(__name__)
+
+# Settings that identify the run or only affect how PerfGuard itself operates;
+# everything else in config can change a stage's output and is hashed
+_NOT_HASHED = {
+    "PR_NUMBER", "PR_HEAD_SHA", "TRACE_ENABLED", "TRACE_PATH",
+    "CHECKPOINT_ENABLED", "CHECKPOINT_DIR", "CHECKPOINT_KEEP_RUNS",
+    "DAEMON_SOCKET_PATH", "DAEMON_PORT", "DAEMON_QUEUE_SIZE",
+    "DAEMON_JOB_HISTORY", "DAEMON_JOB_TIMEOUT", "DASHBOARD_PORT", "API_PORT",
+    "STARTUP_IMPORT_BUDGET_MS",
+}
+# Only whether these are set matters (it decides between LLM and local analysis)
+_SECRETS = {"ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "GITHUB_TOKEN"}
+
+
+def config_hash() -> str:
+    """Hash of every configuration value that can change a stage's output"""
+    values = {}
+    for name in dir(config):
+        if not name.isupper() or name in _NOT_HASHED:
+            continue
+        value = getattr(config, name)
+        values[name] = bool(value) if name in _SECRETS else value
+    encoded = json.dumps(values, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _state_files() -> set:
+    """Names of the files PerfGuard itself writes (baselines, results, caches)"""
+    names = {"benchmark_results.json"}
+    for name in dir(config):
+        value = getattr(config, name)
+        if name.isupper() and name.endswith(("_PATH", "_DIR")) and isinstance(value, str):
+            names.add(Path(value).name)
+    return names
+
+
+def run_key(head_sha: Optional[str], *diffs: str) -> str:
+    """
+    Checkpoint key of a run: commit, the diffs it analyzes and the configuration
+
+    The gate diffs the working tree, and a run rewrites tracked state such as
+    the baseline store; changes to PerfGuard's own files are left out of the
+    key so that a rerun in the same checkout still finds its checkpoints.
+
+    Args:
+        head_sha: Commit being analyzed
+        diffs: Diff text the stages work on (the full diff, and the interdiff on incremental runs)
+    """
+    state_files = _state_files()
+    digest = hashlib.sha256()
+    digest.update(f"{head_sha or 'unknown'}\0{config_hash()}\0".encode("utf-8"))
+    for diff in diffs:
+        for entry in parse_diff(diff or ""):
+            if Path(entry["path"]).name in state_files:
+                continue
+            digest.update(entry["header"].encode("utf-8"))
+            for hunk in entry["hunks"]:
+                digest.update(hunk.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+def _keep(value: Any) -> bool:
+    """Missing and fallback results (failed LLM analysis, collectors or scoring) are recomputed on the next run"""
+    if value is None:
+        return False
+    if isinstance(value, dict):
+        if any(isinstance(item, dict) and item.get("failed") for item in value.values()):
+            return False  # A stage output holding a failed collector result (the metrics stage)
+        return not value.get("degraded") and not value.get("failed") and value.get("verdict") != "ERROR"
+    return True
+
+
+class CheckpointStore:
+    """
+    Completed stage outputs of one run, one JSON file per stage
+
+    Stored as <config.CHECKPOINT_DIR>/<run key>/<stage>.json. With force=True
+    nothing is loaded but every stage is saved again, replacing older outputs.
+    Only the config.CHECKPOINT_KEEP_RUNS most recently used runs are kept.
+    """
+
+    def __init__(self, key: str, directory: str = None, force: bool = False):
+        self.key = key
+        self.force = force
+        self.root = Path(directory or config.CHECKPOINT_DIR)
+        self.path = self.root / key
+        self.resumed: List[str] = []
+        self._lock = threading.Lock()
+
+    def _file(self, stage: str) -> Path:
+        return self.path / f"{stage}.json"
+
+    def load(self, stage: str) -> Optional[Dict[str, Any]]:
+        """
+        Saved output of a stage
+
+        Returns:
+            {"value", "saved"} or None if the stage has not completed in an earlier run
+        """
+        if self.force:
+            return None
+        try:
+            with open(self._file(stage), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint for stage '{stage}': {e}")
+            return None
+
+    def save(self, stage: str, value: Any):
+        """Persist a stage's output (written atomically; unserializable outputs are skipped)"""
+        try:
+            with self._lock:
+                if not self.path.exists():
+                    self.path.mkdir(parents=True, exist_ok=True)
+                    self._prune()
+            tmp_path = self._file(stage).with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"value": value, "saved": datetime.now().isoformat()}, f)
+            os.replace(tmp_path, self._file(stage))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not checkpoint stage '{stage}': {e}")
+
+    def resume(self, stage: str, compute: Callable[[], Any]) -> Any:
+        """
+        Output of a stage: the saved one if it completed before, else computed and saved
+
+        Args:
+            stage: Stage name, unique within the run ("metrics.memory_rss" for sub-steps)
+            compute: Runs the stage
+        """
+        saved = self.load(stage)
+        if saved is not None:
+            logger.info(f"Resuming stage '{stage}' from checkpoint ({saved['saved']})")
+            with self._lock:
+                self.resumed.append(stage)
+            return saved["value"]
+
+        value = compute()
+        if _keep(value):
+            self.save(stage, value)
+        return value
+
+    def discard(self):
+        """Remove this run's checkpoints once it has finished, so a rerun recomputes every stage"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _prune(self):
+        """Remove the oldest runs beyond config.CHECKPOINT_KEEP_RUNS (this run included)"""
+        runs = sorted(
+            (entry for entry in self.root.iterdir() if entry.is_dir()),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for stale in runs[config.CHECKPOINT_KEEP_RUNS:]:
+            shutil.rmtree(stale, ignore_errors=True)
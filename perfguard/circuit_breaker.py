@@ -0,0 +1,211 @@
+"""
+PerfGuard AI Provider Circuit Breaker
+Per-provider circuit breaker persisted to local disk, plus retry backoff helpers
+"""
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+from rate_limiter import pid_alive
+
+try:
+    import fcntl
+except ImportError:  # Windows: coordination is limited to threads of one process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures per provider across runs
+
+    closed    -> calls allowed; CIRCUIT_FAILURE_THRESHOLD consecutive failures open the circuit
+    open      -> calls skipped until CIRCUIT_RESET_TIMEOUT has elapsed
+    half_open -> one probe call allowed; success closes the circuit, failure re-opens it
+
+    State is shared by every PerfGuard process on the host: each change is a
+    read-modify-write under an exclusive flock on a sibling lock file, and the
+    half-open probe belongs to the one caller recorded as its owner. A probe
+    whose owner died or has run longer than CIRCUIT_PROBE_TIMEOUT is handed over.
+    """
+
+    def __init__(self, state_path: str = None):
+        self.state_path = Path(state_path or config.CIRCUIT_STATE_PATH)
+        self.lock_path = self.state_path.with_suffix(".lock")
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked_state(self):
+        """Read-modify-write the shared state under process and thread locks"""
+        with self._thread_lock:
+            with open(self.lock_path, 'a+') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    state = self._read()
+                    before = json.dumps(state, sort_keys=True)
+                    yield state
+                    if json.dumps(state, sort_keys=True) != before:
+                        self._save(state)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f).get("providers", {})
+        except Exception as e:
+            logger.warning(f"Could not load circuit breaker state: {e}")
+            return {}
+
+    def _save(self, state: Dict[str, Dict[str, Any]]):
+        """Write state atomically so readers never see a partial file"""
+        try:
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"providers": state}, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Could not save circuit breaker state: {e}")
+
+    @staticmethod
+    def _provider(state: Dict[str, Dict[str, Any]], provider: str) -> Dict[str, Any]:
+        return state.setdefault(provider, {"state": CLOSED, "failures": 0, "opened_at": 0.0})
+
+    @staticmethod
+    def _caller() -> str:
+        return f"{os.getpid()}-{threading.get_ident()}"
+
+    def state(self, provider: str) -> str:
+        """Current circuit state for a provider"""
+        return self._read().get(provider, {}).get("state", CLOSED)
+
+    def _probe_abandoned(self, entry: Dict[str, Any], now: float) -> bool:
+        owner = entry.get("probe_owner")
+        if not owner:
+            return True
+        if now - entry.get("probe_started", 0.0) > config.CIRCUIT_PROBE_TIMEOUT:
+            return True
+        return not pid_alive(int(owner.split("-")[0]))
+
+    def allow(self, provider: str) -> bool:
+        """Whether a call to the provider should be attempted now"""
+        now = time.time()
+        caller = self._caller()
+        with self._locked_state() as state:
+            entry = self._provider(state, provider)
+            if entry["state"] == CLOSED:
+                return True
+
+            if entry["state"] == HALF_OPEN:
+                if entry.get("probe_owner") == caller:
+                    return True
+                if not self._probe_abandoned(entry, now):
+                    logger.warning(f"⚡ {provider} circuit half-open and another run is probing it, skipping provider")
+                    return False
+                logger.info(f"{provider} circuit probe abandoned, taking it over")
+            else:
+                elapsed = now - entry["opened_at"]
+                if elapsed < config.CIRCUIT_RESET_TIMEOUT:
+                    logger.warning(
+                        f"⚡ {provider} circuit open ({config.CIRCUIT_RESET_TIMEOUT - elapsed:.0f}s "
+                        f"until retry), skipping provider"
+                    )
+                    return False
+                logger.info(f"{provider} circuit half-open, allowing a probe request")
+
+            entry.update({"state": HALF_OPEN, "probe_owner": caller, "probe_started": now})
+            return True
+
+    def release_probe(self, provider: str):
+        """
+        Hand back this caller's half-open probe if it ended without an outcome
+
+        A probe that was cancelled, hit a client error or never got a rate limit
+        slot says nothing about the provider's health; the next caller probes.
+        """
+        caller = self._caller()
+        with self._locked_state() as state:
+            entry = state.get(provider)
+            if entry and entry["state"] == HALF_OPEN and entry.get("probe_owner") == caller:
+                entry.pop("probe_owner", None)
+                entry.pop("probe_started", None)
+
+    def record_success(self, provider: str):
+        with self._locked_state() as state:
+            entry = self._provider(state, provider)
+            if entry["state"] != CLOSED:
+                logger.info(f"✅ {provider} circuit closed")
+            entry.update({"state": CLOSED, "failures": 0, "opened_at": 0.0})
+            entry.pop("probe_owner", None)
+            entry.pop("probe_started", None)
+
+    def record_failure(self, provider: str):
+        with self._locked_state() as state:
+            entry = self._provider(state, provider)
+            entry["failures"] += 1
+            if entry["state"] == HALF_OPEN or entry["failures"] >= config.CIRCUIT_FAILURE_THRESHOLD:
+                if entry["state"] != OPEN:
+                    logger.warning(f"⚡ {provider} circuit opened after {entry['failures']} consecutive failures")
+                entry["state"] = OPEN
+                entry["opened_at"] = time.time()
+                entry.pop("probe_owner", None)
+                entry.pop("probe_started", None)
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Read a server retry hint from response headers
+
+    Supports 'retry-after-ms', and 'retry-after' as seconds or an HTTP date.
+    """
+    if not headers:
+        return None
+    try:
+        retry_ms = headers.get("retry-after-ms")
+        if retry_ms is not None:
+            return max(0.0, float(retry_ms) / 1000)
+
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    """Extract a Retry-After hint from an SDK exception carrying an HTTP response"""
+    response = getattr(error, "response", None)
+    return parse_retry_after(getattr(response, "headers", None))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Delay before the next retry attempt
+
+    Honors the server's Retry-After hint when present, otherwise uses exponential
+    backoff with full jitter. Both are capped at config.API_BACKOFF_MAX.
+    """
+    if retry_after is not None:
+        return min(retry_after, config.API_BACKOFF_MAX)
+    ceiling = min(config.API_BACKOFF_MAX, config.API_RETRY_DELAY * (2 ** attempt))
+    return random.uniform(0, ceiling)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+PerfGuard AI Gate Client
+Runs the performance gate through a warm `main.py serve` daemon, falling back
+to running main.py directly when no daemon serves this checkout
+
+Drop-in replacement for `python perfguard/main.py` in CI: writes the same
+score and report files and exits with the same code.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import http.client
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds each long-poll request asks the daemon to wait
+POLL_WAIT = 30
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """JSON requests to the daemon over its Unix socket or localhost port"""
+
+    def __init__(self, socket_path: str = None, port: int = None):
+        self.socket_path = socket_path or config.DAEMON_SOCKET_PATH
+        self.port = port if port is not None else config.DAEMON_PORT
+
+    def request(self, method: str, path: str, body: Dict[str, Any] = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Send one request
+
+        Returns:
+            (HTTP status, decoded JSON body)
+
+        Raises:
+            OSError: If the daemon is not reachable
+        """
+        timeout = POLL_WAIT + 30
+        if self.port:
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+        else:
+            connection = UnixHTTPConnection(self.socket_path, timeout=timeout)
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload is not None else {}
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read() or b"{}")
+        finally:
+            connection.close()
+
+    def run(self, options: Dict[str, Any], timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Submit a job and wait for it to finish
+
+        Args:
+            options: Job options (see server.py)
+            timeout: Seconds to wait at most (default config.DAEMON_JOB_TIMEOUT)
+
+        Returns:
+            The finished job, or None when the daemon cannot take it
+            (not running, serving another checkout, or queue full)
+        """
+        timeout = timeout or config.DAEMON_JOB_TIMEOUT
+        try:
+            status, job = self.request("POST", "/jobs", options)
+        except OSError as e:
+            logger.info(f"No PerfGuard daemon reachable ({e})")
+            return None
+        if status != 202:
+            logger.warning(f"Daemon declined the job: {job.get('error', status)}")
+            return None
+
+        logger.info(f"Submitted job {job['id']} to the PerfGuard daemon")
+        deadline = time.monotonic() + timeout
+        while job["state"] not in ("done", "failed", "cancelled"):
+            if time.monotonic() > deadline:
+                self.request("DELETE", f"/jobs/{job['id']}")
+                raise TimeoutError(f"Job {job['id']} did not finish within {timeout}s")
+            status, job = self.request("GET", f"/jobs/{job['id']}?wait={POLL_WAIT}")
+            if status != 200:
+                raise RuntimeError(f"Daemon lost job: {job.get('error', status)}")
+        return job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PerfGuard gate through the warm daemon")
+    parser.add_argument("--base", default="HEAD~1", help="Git reference to diff against")
+    parser.add_argument("--socket", help="Daemon Unix socket (default config.DAEMON_SOCKET_PATH)")
+    parser.add_argument("--port", type=int, help="Daemon localhost HTTP port instead of the socket")
+    parser.add_argument("--timeout", type=float, help="Seconds to wait for the job")
+    parser.add_argument("--no-fallback", action="store_true", help="Fail instead of running main.py directly")
+    parser.add_argument("--force", action="store_true", help="Recompute every stage, ignoring checkpoints")
+    args = parser.parse_args()
+
+    # Per-run settings come from this process's environment, not the daemon's
+    options = {
+        "cwd": os.getcwd(),
+        "base_ref": args.base,
+        "pr_number": config.PR_NUMBER,
+        "head_sha": config.PR_HEAD_SHA,
+        "update_impact_index": config.IMPACT_INDEX_UPDATE,
+        "force": args.force,
+    }
+
+    try:
+        job = DaemonClient(args.socket, args.port).run(options, args.timeout)
+        if job and job["state"] == "cancelled":
+            raise RuntimeError(f"Job {job['id']} was cancelled")
+    except (OSError, TimeoutError, RuntimeError) as e:
+        # The daemon may still be benchmarking, so do not start a competing run
+        from main import write_results, error_results
+
+        logger.error(f"Daemon job failed: {e}")
+        write_results(*error_results(e))
+        sys.exit(1)
+
+    if job is None:
+        if args.no_fallback:
+            sys.exit(1)
+        logger.info("Running the gate in this process instead")
+        main_py = str(Path(__file__).resolve().parent / "main.py")
+        command = [sys.executable, main_py, "run", "--base", args.base] + (["--force"] if args.force else [])
+        os.execv(sys.executable, command)
+
+    from main import write_results
+
+    write_results(job["score"], job["report"])
+    score = job["score"]
+    logger.info("=" * 60)
+    logger.info(f"FINAL SCORE: {score['performance_score']:.1f}/100")
+    logger.info(f"VERDICT: {score['verdict']}")
+    logger.info(f"MERGE: {'BLOCKED' if score['block_merge'] else 'APPROVED'}")
+    logger.info(f"Daemon job {job['id']} ran in {job['finished'] - job['started']:.1f}s")
+    logger.info("=" * 60)
+    sys.exit(job["exit_code"])
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ PerfGuard AI Configuration Management
 Centralized configuration for thresholds, weights, and settings
 """
 import os
+import tempfile
 from typing import Dict, Any
 
 class Config:
@@ -13,14 +14,62 @@ class Config:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     GITHUB_TOKEN = os.getenv("GH_TOKEN")
 
+    # Provider endpoints (point at llm_stub_server.py for offline benchmarking)
+    ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
+    GEMINI_API_ENDPOINT = os.getenv("PERFGUARD_GEMINI_ENDPOINT")
+
     # LLM Configuration
     CLAUDE_MODEL = "claude-3-5-sonnet-20241022"  # Latest model
     GEMINI_MODEL = "gemini-2.5-pro"  # Backup model (Google's latest)
     MAX_TOKENS = 2048
 
+    COMBINED_ANALYSIS_PROMPT = True  # One call returns diff analysis, overall risk and perf impact
+
     # LLM Priority (tries in order: anthropic -> gemini)
     LLM_PROVIDERS = ["gemini", "anthropic"]
 
+    # Diff Chunking Configuration
+    CHARS_PER_TOKEN = 4              # Rough estimate used for token budgeting
+    DIFF_CHUNK_TOKENS = 3000         # Token budget per analyzed chunk
+    MAX_CONCURRENT_ANALYSES = 4      # Concurrent LLM calls for chunked diffs
+    CHUNK_RISK_MERGE = "max"         # "max" or "weighted" (by chunk size)
+
+    # Git Diff Configuration
+    GIT_DIFF_MAX_CHARS = 8_000_000   # Patch text kept in memory; later hunks are dropped
+    GIT_DIFF_TIMEOUT = 120           # seconds before the git diff process is killed
+
+    # Diff Compression Configuration
+    DIFF_TOKEN_BUDGET = 12000        # Total tokens of diff sent to the LLM
+    DATA_LITERAL_MIN_LINES = 10      # Smallest hunk considered for collapsing
+    DATA_LITERAL_RATIO = 0.8         # Share of literal lines needed to collapse a hunk
+    DIFF_EXCLUDE_PATTERNS = [
+        "*package-lock.json", "*pnpm-lock.yaml", "*.lock",
+        "*.min.js", "*.min.css", "*.map",
+        "node_modules/*", "*/node_modules/*", "vendor/*", "*/vendor/*",
+        "dist/*", "build/*", "*_pb2.py", "*.svg",
+        "*benchmark_results.json", "*perfguard_baselines.json",
+    ]
+
+    # Local Static Analysis Configuration
+    LOCAL_ANALYSIS_ENABLED = True    # AST hotspot analysis of changed Python functions
+    LOCAL_RISK_SKIP_THRESHOLD = 0.2  # Skip the LLM when local risk is below this
+    LARGE_ITERATION_COUNT = 1000     # range() size treated as a large comprehension
+
+    # Call Graph Context Configuration
+    CALL_GRAPH_ENABLED = True        # Add callers/entry points of changed functions to the prompt
+    CALL_GRAPH_CACHE_PATH = "perfguard_call_graph.json"
+    CALL_GRAPH_CONTEXT_TOKENS = 300  # Taken from each chunk's diff budget
+    CALL_GRAPH_MAX_DEPTH = 6         # Caller levels followed to find entry points
+    CALL_GRAPH_MAX_ENTRY_POINTS = 4  # Entry points listed per function
+
+    # Request Hedging Configuration
+    HEDGE_REQUESTS = True            # Fire the backup provider when the primary is slow
+    HEDGE_PERCENTILE = 90            # Hedge after the primary's historical P90 latency
+    HEDGE_DEFAULT_DELAY = 15         # seconds, used until enough history exists
+    HEDGE_MIN_DELAY = 2              # seconds
+    HEDGE_MIN_SAMPLES = 5            # history needed before the percentile is trusted
+    HEDGE_LATENCY_SAMPLES = 100      # most recent successful calls per provider, from the telemetry history
+
     # Performance Thresholds (as per spec)
     THRESHOLDS = {
         "execution_time": 0.15,      # +15% vs baseline
@@ -44,6 +93,9 @@ class Config:
     # Scoring Configuration
     MIN_PASSING_SCORE = 80
     SCORE_PRECISION = 1  # Decimal places
+    SCORE_REFINEMENT_ENABLED = True
+    SCORE_REFINEMENT_BAND = 5        # Refine with the LLM only within +/- this of MIN_PASSING_SCORE
+    SCORE_REFINEMENT_MAX_ADJUSTMENT = 10  # Largest change the LLM may make to the score
 
     # Storage Configuration
     BASELINE_STORAGE_PATH = "perfguard_baselines.json"
@@ -54,11 +106,150 @@ class Config:
     PYTEST_MARKERS = "perf"
     BENCHMARK_ROUNDS = 5
     MEMORY_PRECISION = 3
+    # Bumped when a collector starts measuring differently; baselines stored
+    # with another version (none counts as 1) are re-established, not compared
+    METRIC_METHOD_VERSIONS = {
+        "memory_rss": 3,        # v2: the pytest subprocess, not the orchestrator; v3: full suite, one pass per test
+        "cpu_utilization": 3,
+        "io_latency": 3,
+    }
+
+    # Benchmark Selection Configuration
+    BENCHMARK_SELECTION_ENABLED = os.getenv("PERFGUARD_BENCHMARK_SELECTION", "true").lower() == "true"
+    BENCHMARK_MATCH_CUTOFF = 0.75  # difflib similarity for fuzzy benchmark name matches
+    CANARY_BENCHMARKS = [           # Always run, even when selecting a subset
+        "test_api_get_all_movies",
+        "test_home_page_load",
+    ]
+
+    # Test Impact Index Configuration (line-level coverage of the perf suite)
+    IMPACT_INDEX_ENABLED = True      # Select perf tests by the lines a PR changes
+    IMPACT_INDEX_UPDATE = os.getenv(  # Refresh the index on main-branch runs
+        "PERFGUARD_UPDATE_IMPACT_INDEX",
+        str(os.getenv("GITHUB_REF") == "refs/heads/main")
+    ).lower() == "true"
+    IMPACT_INDEX_TIMEOUT = 900       # seconds for one coverage run of the perf suite
+    IMPACT_INDEX_PATH = "perfguard_impact_index.json"  # Local state, cached between CI runs
+    IMPACT_IGNORE_PATTERNS = [       # Changes that never affect perf test results
+        "*.md", "*.rst", "docs/*", "LICENSE*", ".gitignore", ".github/*",
+    ]
+
+    # Benchmark Reuse Configuration (skip perf tests whose inputs are unchanged)
+    BENCHMARK_REUSE_ENABLED = os.getenv("PERFGUARD_BENCHMARK_REUSE", "true").lower() == "true"
+    BENCHMARK_REUSE_MAX_AGE_DAYS = 30  # Older stored results are measured again
+    BENCHMARK_REUSE_ENTRIES = 3        # Stored results kept per test (distinct fingerprints)
+    BENCHMARK_CACHE_PATH = "perfguard_benchmark_cache.json"  # Local state, cached between CI runs
+    FINGERPRINT_EXTRA_PATTERNS = [     # Non-import inputs hashed into every test fingerprint
+        "pytest.ini", "setup.cfg", "tox.ini", "pyproject.toml", "*/templates/*", "*/static/*",
+    ]
+
+    # Machine Calibration Configuration (normalizes timing metrics across runners)
+    CALIBRATION_ENABLED = os.getenv("PERFGUARD_CALIBRATION", "true").lower() == "true"
+    CALIBRATION_CACHE_PATH = "perfguard_calibration.json"  # Per host, measured once a day
+    CALIBRATION_REPEATS = 5          # Best of this many runs per kernel
+    CALIBRATION_MIN_CHANGE = 0.03    # Speed differences below this are left as noise
+    CALIBRATION_WEIGHTS = {          # Kernel weights of each normalized metric
+        "execution_time": {"python": 0.6, "memory": 0.25, "syscall": 0.15},
+        "cpu_utilization": {"python": 0.5, "syscall": 0.5},
+    }
+
+    # Regression Profiling Configuration
+    PROFILE_ON_REGRESSION = os.getenv("PERFGUARD_PROFILE", "true").lower() == "true"
+    PROFILE_METRICS = ["execution_time", "cpu_utilization"]  # Regressions of these are profiled
+    PROFILE_SCORE_THRESHOLD = 80     # Profile when one of them scores below this
+    PROFILE_MAX_BENCHMARKS = 3       # Most regressed benchmarks profiled per run
+    PROFILE_REPEATS = 3              # Profiled passes averaged per side
+    PROFILE_TOP_N = 10               # Functions listed per benchmark in the report
+    PROFILE_STORED_FUNCTIONS = 150   # Kept per baseline profile, by self and by cumulative time
+    PROFILE_TIMEOUT = 600            # seconds per profiled pass
+
+    # A/B Benchmarking Configuration (merge-base vs head, interleaved in the same job)
+    AB_BENCHMARKING = os.getenv("PERFGUARD_AB", "false").lower() == "true"
+    AB_ROUNDS = 5                    # Base/head round pairs (ABAB...)
+    AB_ROUND_MAX_TIME = 0.5          # seconds per benchmark per round (--benchmark-max-time)
+    AB_ROUND_TIMEOUT = 600           # seconds for one side of one round
+    AB_REQUIRE_SIGNIFICANCE = True   # Changes within the 95% interval score as no change
+
+    # Benchmark Generation Configuration
+    GENERATE_BENCHMARKS = os.getenv("PERFGUARD_GENERATE_BENCHMARKS", "false").lower() == "true"
+    GENERATED_TESTS_DIR = "perfguard_generated_tests"
+    MAX_GENERATED_TESTS = 3          # New tests generated per run
+    GENERATED_TEST_TIME_BUDGET = 1.0  # seconds per call, hint for input sizes
+    GENERATED_TEST_TIMEOUT = 60      # seconds to validate a generated test
+    GENERATED_TEST_MEMORY_MB = 1024  # Address-space limit while validating
 
     # Retry Configuration
     API_RETRY_ATTEMPTS = 3
     API_RETRY_DELAY = 2  # seconds
     API_TIMEOUT = 30  # seconds
+    API_BACKOFF_MAX = 30  # seconds, cap for backoff and Retry-After waits
+
+    # Rate Limit Configuration (shared by all PerfGuard processes on the host)
+    RATE_LIMIT_ENABLED = os.getenv("PERFGUARD_RATE_LIMIT", "true").lower() == "true"
+    RATE_LIMIT_STATE_PATH = os.getenv(
+        "PERFGUARD_RATE_LIMIT_PATH",
+        os.path.join(tempfile.gettempdir(), "perfguard_rate_limit.json")
+    )
+    RATE_LIMITS = {                  # Match these to your provider account tier
+        "anthropic": {"requests_per_minute": 50, "burst": 5},
+        "gemini": {"requests_per_minute": 60, "burst": 5},
+    }
+    REQUEST_PRIORITY = int(os.getenv("PERFGUARD_PRIORITY", "0"))  # Higher is served first
+    RATE_LIMIT_MAX_WAIT = 120        # seconds queued before giving up on a provider
+    RATE_LIMIT_429_PENALTY = 10      # seconds all processes pause after a 429 without Retry-After
+
+    # Provider Telemetry Configuration
+    TELEMETRY_PATH = "perfguard_telemetry.json"  # Local state, cached between CI runs
+    TELEMETRY_HISTORY_SIZE = 1000    # Provider call records kept in TELEMETRY_PATH
+    PROVIDER_TOKEN_PRICES = {        # USD per million tokens, for cost estimates
+        "anthropic": {"input": 3.00, "output": 15.00},
+        "gemini": {"input": 1.25, "output": 10.00},
+    }
+
+    # Tracing Configuration (PerfGuard's own stages, Chrome/Perfetto trace-event format)
+    TRACE_ENABLED = os.getenv("PERFGUARD_TRACE", "true").lower() == "true"
+    TRACE_PATH = "perfguard_trace.json"  # Open in ui.perfetto.dev or chrome://tracing
+
+    # Circuit Breaker Configuration
+    CIRCUIT_STATE_PATH = "perfguard_circuit_state.json"
+    CIRCUIT_FAILURE_THRESHOLD = 3    # Consecutive transient failures before opening
+    CIRCUIT_RESET_TIMEOUT = 300      # seconds an open circuit skips the provider
+    CIRCUIT_PROBE_TIMEOUT = 120      # seconds before a stalled half-open probe is handed to another caller
+
+    # Incremental PR Analysis Configuration
+    INCREMENTAL_ANALYSIS_ENABLED = os.getenv("PERFGUARD_INCREMENTAL", "true").lower() == "true"
+    PR_NUMBER = os.getenv("PR_NUMBER")
+    PR_HEAD_SHA = os.getenv("PR_HEAD_SHA")  # PR head commit (HEAD is a merge commit in CI)
+    PR_STATE_PATH = "perfguard_pr_state.json"
+    PR_STATE_MAX_ENTRIES = 50        # Least recently analyzed PRs are dropped beyond this
+
+    # Checkpoint Configuration (a rerun of the same commit resumes after the last completed stage)
+    CHECKPOINT_ENABLED = os.getenv("PERFGUARD_CHECKPOINTS", "true").lower() == "true"
+    CHECKPOINT_DIR = ".perfguard_checkpoints"
+    CHECKPOINT_KEEP_RUNS = 5         # Most recently used runs kept on disk
+
+    # Commit Range Configuration (`main.py range A..B`)
+    RANGE_WORKERS = 2                # Parallel worktrees; concurrent suites add timing noise
+    RANGE_COMMIT_TIMEOUT = 900       # seconds for one commit's perf suite
+    RANGE_TIMESERIES = "commit_metrics"  # Baseline store series the per-commit results go to
+    RANGE_HISTORY_SIZE = 5000        # Commit results kept in the series
+    RANGE_PRELOAD_MODULES = [        # Imported once per worker, before forking per commit
+        "flask",
+    ]
+
+    # Daemon Configuration (`main.py serve`, used by client.py)
+    DAEMON_SOCKET_PATH = os.getenv(
+        "PERFGUARD_SOCKET",
+        os.path.join(tempfile.gettempdir(), "perfguard.sock")
+    )
+    DAEMON_PORT = int(os.getenv("PERFGUARD_DAEMON_PORT", "0"))  # Client uses localhost HTTP when set
+    DAEMON_QUEUE_SIZE = 8            # Queued jobs beyond this are rejected
+    DAEMON_JOB_HISTORY = 50          # Finished jobs kept for result lookups
+    DAEMON_JOB_TIMEOUT = 1800        # seconds a client waits for its job
+    LLM_RESPONSE_CACHE_SIZE = 128    # Identical prompts answered from memory (0 disables)
+
+    # Startup Configuration
+    STARTUP_IMPORT_BUDGET_MS = 150   # Budget for importing main.py (bench_startup.py)
 
     # Git Configuration
     DEFAULT_BASE_BRANCH = "main"
@@ -71,7 +262,8 @@ class Config:
     @classmethod
     def validate(cls) -> bool:
         """Validate configuration"""
-        if not cls.ANTHROPIC_API_KEY and not cls.GOOGLE_API_KEY:
+        # Without an API key, local static analysis stands in for the LLM
+        if not cls.ANTHROPIC_API_KEY and not cls.GOOGLE_API_KEY and not cls.LOCAL_ANALYSIS_ENABLED:
             raise ValueError("At least one AI API key (ANTHROPIC_API_KEY or GOOGLE_API_KEY) is required")
 
         # Validate weights sum to 100
@@ -0,0 +1,200 @@
+"""
+PerfGuard AI Diff Compression
+Drops noise from a diff and packs the most performance-relevant hunks into a token budget
+"""
+import re
+from fnmatch import fnmatch
+from typing import Dict, Any, List
+from config import config
+from logger import get_logger
+from diff_parser import parse_diff, estimate_tokens
+
+logger = get_logger(__name__)
+
+# Static hotspot signals on added lines: (pattern, weight)
+HOTSPOT_SIGNALS = [
+    (re.compile(r"\btime\.sleep\s*\("), 6),
+    (re.compile(r"^\s*(for|while)\b"), 3),
+    (re.compile(r"\bfor\b.+\bin\b.+[\]\)]\s*$"), 1),                     # comprehensions
+    (re.compile(r"\b(open|urlopen)\s*\(|\brequests\.\w+\(|\bhttpx\.\w+\("), 4),
+    (re.compile(r"\.(execute|executemany|query|fetchall|fetchone)\s*\("), 4),
+    (re.compile(r"\bsubprocess\.|\bos\.system\s*\("), 4),
+    (re.compile(r"\.(read|write|readlines)\s*\("), 2),
+    (re.compile(r"\.copy\s*\(|\bdeepcopy\s*\("), 2),
+    (re.compile(r"\bsorted\s*\(|\.sort\s*\("), 2),
+    (re.compile(r"\+=\s*(f?[\"']|str\()"), 2),                             # string building
+    (re.compile(r"\bglobal\b|\bcache\b|\blru_cache\b", re.IGNORECASE), 1),
+]
+
+# Lines that are pure data: braces, quoted strings, numbers, "key": literal entries
+_LITERAL_LINE = re.compile(
+    r"""^\s*(
+        [\[\]{}(),]+                                    # brackets and separators
+        | [rbuf]?(["']).*\2\s*,?                        # quoted string
+        | -?\d[\d_.eE+-]*\s*,?                          # number
+        | [rbuf]?(["'])[^"']*\3\s*:                     # "key": entry whose value is made of
+          ( [rbuf]?"[^"]*" | [rbuf]?'[^']*'               #   literal tokens only, no names or calls
+          | -?\d[\d_.eE+-]* | True | False | None
+          | [\[\]{}(),:\s]
+          )+
+        | (True|False|None)\s*,?
+    )\s*$""",
+    re.VERBOSE
+)
+
+# Languages where indentation is syntax: a re-indent can move code into or out of a loop
+INDENT_SENSITIVE_EXTENSIONS = (".py", ".pyx", ".pyi")
+
+SOURCE_EXTENSIONS = (".py", ".js", ".ts", ".go", ".java", ".rb", ".rs", ".c", ".cc", ".cpp", ".sql")
+
+
+def is_excluded_path(path: str) -> bool:
+    """True for generated, vendored or lock files that carry no performance signal"""
+    return any(fnmatch(path, pattern) for pattern in config.DIFF_EXCLUDE_PATTERNS)
+
+
+def _changed_lines(hunk: str) -> Dict[str, List[str]]:
+    """Split a hunk body into removed and added line contents"""
+    added, removed = [], []
+    for line in hunk.splitlines()[1:]:
+        if line.startswith("+") and not line.startswith("+++"):
+            added.append(line[1:])
+        elif line.startswith("-") and not line.startswith("---"):
+            removed.append(line[1:])
+    return {"added": added, "removed": removed}
+
+
+def is_whitespace_only_hunk(hunk: str, path: str = "") -> bool:
+    """
+    True if the hunk only changes whitespace
+
+    Trailing spaces and blank lines never count. Indentation and spacing
+    inside a line count only in files where indentation is not syntax.
+    """
+    lines = _changed_lines(hunk)
+
+    def squash(items):
+        if path.endswith(INDENT_SENSITIVE_EXTENSIONS):
+            return [item.rstrip() for item in items if item.strip()]
+        return [re.sub(r"\s+", "", item) for item in items if item.strip()]
+
+    return squash(lines["added"]) == squash(lines["removed"])
+
+
+def is_data_literal_hunk(hunk: str) -> bool:
+    """True if the hunk is a large change made almost entirely of data literals"""
+    lines = _changed_lines(hunk)
+    changed = [line for line in lines["added"] + lines["removed"] if line.strip()]
+    if len(changed) < config.DATA_LITERAL_MIN_LINES:
+        return False
+    literal = sum(1 for line in changed if _LITERAL_LINE.match(line))
+    return literal / len(changed) >= config.DATA_LITERAL_RATIO
+
+
+def collapse_hunk(hunk: str) -> str:
+    """Replace a data-literal hunk body with a one-line summary"""
+    lines = _changed_lines(hunk)
+    hunk_header = hunk.splitlines(keepends=True)[0]
+    return (
+        hunk_header +
+        f"  # [PerfGuard] data literal change collapsed: "
+        f"+{len(lines['added'])}/-{len(lines['removed'])} lines\n"
+    )
+
+
+def score_hunk(path: str, hunk: str) -> float:
+    """Relevance score from static hotspot signals on the added lines"""
+    score = 0.0
+    for line in _changed_lines(hunk)["added"]:
+        for pattern, weight in HOTSPOT_SIGNALS:
+            if pattern.search(line):
+                score += weight
+
+    if path.endswith(SOURCE_EXTENSIONS):
+        score += 1.0
+    return score
+
+
+def compress_diff(diff: str, token_budget: int = None) -> Dict[str, Any]:
+    """
+    Preprocess a diff before prompting
+
+    Drops excluded files and whitespace-only hunks, collapses data-literal hunks,
+    ranks the remaining hunks by hotspot signals and packs the top-ranked ones into
+    the token budget. Kept hunks are emitted in their original order.
+
+    Args:
+        diff: Git diff string
+        token_budget: Total token budget (defaults to config.DIFF_TOKEN_BUDGET)
+
+    Returns:
+        Dictionary with the compressed "diff" and "stats" describing what was dropped
+    """
+    if token_budget is None:
+        token_budget = config.DIFF_TOKEN_BUDGET
+
+    stats = {
+        "original_tokens": estimate_tokens(diff) if diff else 0,
+        "excluded_files": [],
+        "whitespace_hunks": 0,
+        "collapsed_hunks": 0,
+        "omitted_hunks": 0,
+    }
+
+    # Candidate hunks: (score, file index, hunk index, text)
+    files = parse_diff(diff)
+    candidates = []
+    for file_index, file_entry in enumerate(files):
+        path = file_entry["path"]
+        if is_excluded_path(path) or "Binary files" in file_entry["header"]:
+            stats["excluded_files"].append(path)
+            continue
+
+        for hunk_index, hunk in enumerate(file_entry["hunks"]):
+            if is_whitespace_only_hunk(hunk, path):
+                stats["whitespace_hunks"] += 1
+                continue
+            if is_data_literal_hunk(hunk):
+                hunk = collapse_hunk(hunk)
+                stats["collapsed_hunks"] += 1
+            candidates.append((score_hunk(path, hunk), file_index, hunk_index, hunk))
+
+    # Pack highest-scoring hunks first, counting each file header once
+    selected = set()
+    used_tokens = 0
+    headers_used = set()
+    for score, file_index, hunk_index, hunk in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        cost = estimate_tokens(hunk)
+        if file_index not in headers_used:
+            cost += estimate_tokens(files[file_index]["header"])
+        if used_tokens + cost > token_budget:
+            stats["omitted_hunks"] += 1
+            continue
+        used_tokens += cost
+        headers_used.add(file_index)
+        selected.add((file_index, hunk_index))
+
+    kept = {}
+    for score, file_index, hunk_index, hunk in candidates:
+        if (file_index, hunk_index) in selected:
+            kept.setdefault(file_index, []).append(hunk)
+
+    compressed = "".join(
+        files[file_index]["header"] + "".join(hunks)
+        for file_index, hunks in sorted(kept.items())
+    )
+
+    if compressed and (stats["excluded_files"] or stats["omitted_hunks"]):
+        compressed += (
+            f"\n# [PerfGuard] omitted {stats['omitted_hunks']} low-relevance hunks "
+            f"and {len(stats['excluded_files'])} generated/vendored files\n"
+        )
+
+    stats["compressed_tokens"] = estimate_tokens(compressed) if compressed else 0
+    logger.info(
+        f"Diff compressed: ~{stats['original_tokens']} -> ~{stats['compressed_tokens']} tokens "
+        f"({len(stats['excluded_files'])} files excluded, {stats['whitespace_hunks']} whitespace hunks, "
+        f"{stats['collapsed_hunks']} collapsed, {stats['omitted_hunks']} omitted)"
+    )
+
+    return {"diff": compressed, "stats": stats}
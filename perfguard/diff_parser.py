@@ -0,0 +1,205 @@
+"""
+PerfGuard AI Diff Parsing
+Splits unified git diffs into per-file sections and hunks, and packs them into token-budgeted chunks
+"""
+from typing import Dict, Any, List
+from config import config
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for LLM budgeting (characters / CHARS_PER_TOKEN)"""
+    return max(1, len(text) // config.CHARS_PER_TOKEN)
+
+
+def _path_from_header(header_line: str) -> str:
+    """Extract the new-side path from a 'diff --git a/x b/y' line"""
+    parts = header_line.split(" b/", 1)
+    if len(parts) == 2:
+        return parts[1].strip()
+    return header_line[len("diff --git "):].strip()
+
+
+def parse_diff(diff: str) -> List[Dict[str, Any]]:
+    """
+    Split a unified diff into files and hunks
+
+    Args:
+        diff: Git diff string
+
+    Returns:
+        List of dicts with "path", "header" (file header text) and "hunks" (list of hunk texts)
+    """
+    files = []
+    current = None
+    hunk_lines = None
+
+    def close_hunk():
+        if current is not None and hunk_lines:
+            current["hunks"].append("".join(hunk_lines))
+
+    for line in diff.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            close_hunk()
+            hunk_lines = None
+            current = {"path": _path_from_header(line), "header": line, "hunks": []}
+            files.append(current)
+        elif current is None:
+            # Text before the first file header (e.g. a bare patch) becomes its own section
+            current = {"path": "", "header": "", "hunks": []}
+            files.append(current)
+            hunk_lines = [line]
+        elif line.startswith("@@"):
+            close_hunk()
+            hunk_lines = [line]
+        elif hunk_lines is not None:
+            hunk_lines.append(line)
+        else:
+            current["header"] += line
+
+    close_hunk()
+    return files
+
+
+def _split_oversized_hunk(hunk: str, max_chars: int) -> List[str]:
+    """Split a single hunk that exceeds the budget on line boundaries"""
+    lines = hunk.splitlines(keepends=True)
+    hunk_header = lines[0] if lines and lines[0].startswith("@@") else ""
+    pieces = []
+    buffer = ""
+
+    for line in lines[1:] if hunk_header else lines:
+        if buffer and len(buffer) + len(line) > max_chars:
+            pieces.append(buffer)
+            buffer = hunk_header
+        if not buffer:
+            buffer = hunk_header
+        buffer += line
+
+    if buffer and buffer != hunk_header:
+        pieces.append(buffer)
+    return pieces
+
+
+def chunk_diff(diff: str, max_tokens: int = None) -> List[str]:
+    """
+    Pack a diff into chunks that each fit the token budget
+
+    Whole files are kept together where possible. Files that are too large are split
+    on hunk boundaries (repeating the file header), and single hunks that are still too
+    large are split on line boundaries.
+
+    Args:
+        diff: Git diff string
+        max_tokens: Token budget per chunk (defaults to config.DIFF_CHUNK_TOKENS)
+
+    Returns:
+        List of diff chunks
+    """
+    if max_tokens is None:
+        max_tokens = config.DIFF_CHUNK_TOKENS
+    max_chars = max_tokens * config.CHARS_PER_TOKEN
+
+    if len(diff) <= max_chars:
+        return [diff] if diff.strip() else []
+
+    # Break files into units that each fit the budget
+    units = []
+    for file_entry in parse_diff(diff):
+        header = file_entry["header"]
+        file_text = header + "".join(file_entry["hunks"])
+        if len(file_text) <= max_chars:
+            units.append(file_text)
+            continue
+
+        hunk_budget = max(max_chars - len(header), max_chars // 2)
+        for hunk in file_entry["hunks"]:
+            if len(hunk) <= hunk_budget:
+                units.append(header + hunk)
+            else:
+                units.extend(header + piece for piece in _split_oversized_hunk(hunk, hunk_budget))
+
+    # Greedily pack units into chunks
+    chunks = []
+    buffer = ""
+    for unit in units:
+        if buffer and len(buffer) + len(unit) > max_chars:
+            chunks.append(buffer)
+            buffer = ""
+        buffer += unit
+    if buffer:
+        chunks.append(buffer)
+
+    return chunks
+
+
+def _hunk_start(hunk_header: str, side: str) -> int:
+    """Starting line number of a hunk header ('@@ -a,b +c,d @@') for side '-' or '+'"""
+    for token in hunk_header.split():
+        if token.startswith(side) and token[1:2].isdigit():
+            return int(token[1:].split(",")[0])
+    return 0
+
+
+def changed_lines(diff: str) -> Dict[str, set]:
+    """
+    Map each file in a diff to the new-side line numbers it touches
+
+    Added lines contribute their own line number; deletions contribute the
+    line they were removed at, so the enclosing function still counts as changed.
+
+    Args:
+        diff: Git diff string
+
+    Returns:
+        Dictionary of file path -> set of line numbers in the new version
+    """
+    result = {}
+    for file_entry in parse_diff(diff):
+        if not file_entry["path"]:
+            continue
+        lines = result.setdefault(file_entry["path"], set())
+        for hunk in file_entry["hunks"]:
+            hunk_lines = hunk.splitlines()
+            line_no = _hunk_start(hunk_lines[0], "+")
+            for line in hunk_lines[1:]:
+                if line.startswith("+"):
+                    lines.add(line_no)
+                    line_no += 1
+                elif line.startswith("-"):
+                    lines.add(max(line_no, 1))
+                elif not line.startswith("\\"):
+                    line_no += 1
+    return result
+
+
+def changed_base_lines(diff: str) -> Dict[str, set]:
+    """
+    Map each file in a diff to the old-side line numbers it touches
+
+    Removed lines contribute their own line number; insertions contribute the
+    lines on either side of the insertion point, since code run before and after
+    it is what the new lines sit between.
+
+    Args:
+        diff: Git diff string
+
+    Returns:
+        Dictionary of file path -> set of line numbers in the base version
+    """
+    result = {}
+    for file_entry in parse_diff(diff):
+        if not file_entry["path"]:
+            continue
+        lines = result.setdefault(file_entry["path"], set())
+        for hunk in file_entry["hunks"]:
+            hunk_lines = hunk.splitlines()
+            line_no = _hunk_start(hunk_lines[0], "-")
+            for line in hunk_lines[1:]:
+                if line.startswith("-"):
+                    lines.add(line_no)
+                    line_no += 1
+                elif line.startswith("+"):
+                    lines.update(n for n in (line_no - 1, line_no) if n >= 1)
+                elif not line.startswith("\\"):
+                    line_no += 1
+    return result
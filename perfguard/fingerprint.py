@@ -0,0 +1,310 @@
+"""
+PerfGuard AI Benchmark Fingerprints
+Content hashes of perf tests and their import closures, so unchanged benchmarks are reused instead of re-run
+"""
+import os
+import ast
+import sys
+import hashlib
+import platform
+import subprocess
+import importlib.util
+import importlib.metadata
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from typing import Dict, Any, List, Optional, Set
+from pathlib import Path
+from config import config
+from logger import get_logger
+from storage import load_state, save_state
+from call_graph import blob_sha
+
+logger = get_logger(__name__)
+
+
+def cpu_model() -> str:
+    """CPU model name from /proc/cpuinfo, or platform.processor() elsewhere"""
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.partition(":")[2].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def environment_key() -> str:
+    """
+    Hash of everything outside the repository that affects benchmark timings
+
+    Interpreter, OS, CPU model and count, and every installed distribution's
+    version; results are only reused on a runner with the same key.
+    """
+    distributions = sorted(
+        f"{dist.metadata['Name']}=={dist.version}" for dist in importlib.metadata.distributions()
+    )
+    parts = [
+        platform.python_implementation(), platform.python_version(),
+        platform.system(), platform.machine(), cpu_model(), str(os.cpu_count()),
+    ] + distributions
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _imported_modules(tree: ast.AST) -> List[tuple]:
+    """(module name, relative level, imported names) for every import, including ones inside functions"""
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0, []) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append((node.module or "", node.level, [alias.name for alias in node.names]))
+    return imports
+
+
+class Fingerprinter:
+    """
+    Fingerprints perf tests by the content of every repository file they load
+
+    A test's closure is its file, the conftest.py and __init__.py files pytest
+    loads with it, and every repository module it imports, transitively.
+    Imports are resolved statically against the importing file's ancestor
+    directories (rootdir-relative imports and the sys.path.insert(parent)
+    idiom), then against a unique module path anywhere in the repository.
+    Files matching config.FINGERPRINT_EXTRA_PATTERNS are hashed into every
+    fingerprint. A test with an import that resolves neither to the repository
+    nor to an installed package has no fingerprint and always runs.
+    """
+
+    def __init__(self, repo_root: str = "."):
+        self.repo_root = Path(repo_root).resolve()
+        self.repo_files = self._repo_files()
+        self._shas: Dict[str, str] = {}
+        self._closures: Dict[str, Optional[Set[str]]] = {}
+        self._extra = sorted(
+            path for path in self.repo_files
+            if any(fnmatch(path, pattern) for pattern in config.FINGERPRINT_EXTRA_PATTERNS)
+        )
+
+    def _repo_files(self) -> Set[str]:
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+            cwd=self.repo_root,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode == 0:
+            return set(result.stdout.splitlines())
+        return {p.relative_to(self.repo_root).as_posix() for p in self.repo_root.rglob("*") if p.is_file()}
+
+    def _sha(self, path: str) -> Optional[str]:
+        if path not in self._shas:
+            try:
+                self._shas[path] = blob_sha((self.repo_root / path).read_bytes())
+            except OSError:
+                self._shas[path] = None
+        return self._shas[path]
+
+    def _module_file(self, base: Path, dotted: str) -> List[str]:
+        """Repository files for a dotted module under base: package __init__s plus the module, or []"""
+        files = []
+        current = base
+        for part in dotted.split("."):
+            current = current / part
+            init = (current / "__init__.py").relative_to(self.repo_root).as_posix()
+            module = current.with_suffix(".py").relative_to(self.repo_root).as_posix()
+            if init in self.repo_files:
+                files.append(init)
+            elif module in self.repo_files:
+                files.append(module)
+                return files
+            else:
+                return []
+        return files
+
+    def _resolve(self, path: str, module: str, level: int, names: List[str]) -> Optional[List[str]]:
+        """
+        Repository files an import statement loads
+
+        Returns:
+            List of repository paths ([] for stdlib or installed packages), or None if unresolvable
+        """
+        source_dir = (self.repo_root / path).parent
+        if level:
+            base = source_dir
+            for _ in range(level - 1):
+                base = base.parent
+            if self.repo_root not in (base, *base.parents):
+                return None
+            bases = [base]
+        else:
+            top = module.split(".")[0]
+            if top in sys.stdlib_module_names or top == "__future__":
+                return []
+            bases = [source_dir, *[p for p in source_dir.parents if self.repo_root in (p, *p.parents)]]
+
+        for base in bases:
+            files = self._module_file(base, module) if module else []
+            if module and not files:
+                continue
+            # "from package import name" may name submodules as well as attributes
+            for name in names:
+                submodule = self._module_file(base, f"{module}.{name}" if module else name)
+                files.extend(f for f in submodule if f not in files)
+            init = (base / "__init__.py").relative_to(self.repo_root).as_posix()
+            if level and init in self.repo_files:
+                files.insert(0, init)
+            if files or not module:
+                return files
+
+        if level:
+            return None
+
+        suffix = module.replace(".", "/")
+        matches = [
+            f for f in self.repo_files
+            if f == f"{suffix}.py" or f.endswith(f"/{suffix}.py") or f.endswith(f"/{suffix}/__init__.py")
+        ]
+        if len(matches) == 1:
+            return matches
+
+        try:
+            spec = importlib.util.find_spec(module.split(".")[0])
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None:
+            return None
+        origin = Path(spec.origin).resolve() if spec.origin else None
+        if origin and self.repo_root in origin.parents:
+            return [origin.relative_to(self.repo_root).as_posix()]
+        return []  # Installed package, covered by environment_key()
+
+    def closure(self, test_file: str) -> Optional[Set[str]]:
+        """
+        Repository files a test file loads, or None if an import could not be resolved
+
+        Args:
+            test_file: Repository-relative path of the test file
+        """
+        if test_file in self._closures:
+            return self._closures[test_file]
+
+        files = {test_file}
+        for parent in Path(test_file).parents:
+            for name in ("conftest.py", "__init__.py"):
+                candidate = (parent / name).as_posix()
+                if candidate in self.repo_files:
+                    files.add(candidate)
+
+        pending = sorted(files)
+        seen = set(files)
+        while pending:
+            path = pending.pop()
+            if not path.endswith(".py"):
+                continue
+            try:
+                tree = ast.parse((self.repo_root / path).read_bytes())
+            except (OSError, SyntaxError, ValueError) as e:
+                logger.debug(f"Could not parse {path} for fingerprinting: {e}")
+                continue
+            for module, level, names in _imported_modules(tree):
+                resolved = self._resolve(path, module, level, names)
+                if resolved is None:
+                    logger.info(f"Cannot resolve import '{module}' in {path}, {test_file} always runs")
+                    self._closures[test_file] = None
+                    return None
+                for dependency in resolved:
+                    if dependency not in seen:
+                        seen.add(dependency)
+                        pending.append(dependency)
+
+        self._closures[test_file] = seen
+        return seen
+
+    def fingerprint(self, node_id: str) -> Optional[str]:
+        """Content hash of a test's file, import closure and extra files, or None"""
+        closure = self.closure(node_id.partition("::")[0])
+        if closure is None:
+            return None
+        digest = hashlib.sha256()
+        for path in sorted(closure | set(self._extra)):
+            sha = self._sha(path)
+            if sha is None:
+                return None
+            digest.update(f"{path}\0{sha}\n".encode("utf-8"))
+        return digest.hexdigest()[:24]
+
+
+class BenchmarkCache:
+    """
+    Benchmark means keyed by test fingerprint and environment, kept in config.BENCHMARK_CACHE_PATH
+
+    Stored format: {node_id: [{"fingerprint", "environment", "mean", "recorded"}]},
+    newest first, at most config.BENCHMARK_REUSE_ENTRIES per test. A mean of
+    None records a perf test that ran without using the benchmark fixture.
+    """
+
+    def __init__(self, path: str = None, repo_root: str = "."):
+        self.path = path or config.BENCHMARK_CACHE_PATH
+        self.fingerprinter = Fingerprinter(repo_root)
+        self.environment = environment_key()
+
+    def lookup(self, node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored results whose fingerprint and environment match the current tree
+
+        Returns:
+            Dictionary of node ID -> {"mean" (None if not a benchmark), "recorded"}
+        """
+        stored = load_state(self.path)
+        oldest = datetime.now() - timedelta(days=config.BENCHMARK_REUSE_MAX_AGE_DAYS)
+        reused = {}
+        for node_id in node_ids:
+            entries = stored.get(node_id)
+            if not entries:
+                continue
+            fingerprint = self.fingerprinter.fingerprint(node_id)
+            if fingerprint is None:
+                continue
+            for entry in entries:
+                if entry["fingerprint"] == fingerprint and entry["environment"] == self.environment \
+                        and datetime.fromisoformat(entry["recorded"]) >= oldest:
+                    reused[node_id] = {"mean": entry["mean"], "recorded": entry["recorded"]}
+                    break
+
+        logger.info(f"Reusing {len(reused)}/{len(node_ids)} benchmark result(s) with unchanged fingerprints")
+        return reused
+
+    def record(self, benchmarks: Dict[str, float], ran: List[str] = None):
+        """
+        Store freshly measured benchmark means under their current fingerprints
+
+        Args:
+            benchmarks: Node ID -> mean of the benchmarks that ran
+            ran: Node IDs that were run, when known; those without a benchmark are recorded too
+        """
+        stored = load_state(self.path)
+        recorded = datetime.now().isoformat()
+        results = {**{node_id: None for node_id in ran or []}, **benchmarks}
+        count = 0
+        for node_id, mean in results.items():
+            fingerprint = self.fingerprinter.fingerprint(node_id)
+            if fingerprint is None:
+                continue
+            entries = [
+                entry for entry in stored.get(node_id, [])
+                if (entry["fingerprint"], entry["environment"]) != (fingerprint, self.environment)
+            ]
+            entries.insert(0, {
+                "fingerprint": fingerprint,
+                "environment": self.environment,
+                "mean": mean,
+                "recorded": recorded
+            })
+            stored[node_id] = entries[:config.BENCHMARK_REUSE_ENTRIES]
+            count += 1
+
+        if count:
+            save_state(self.path, stored)
+            logger.info(f"Saved benchmark cache ({len(stored)} tests)")
@@ -0,0 +1,213 @@
+"""
+PerfGuard AI Git Front End
+One streaming `git diff` pass yielding the patch, changed files, statuses and line counts
+"""
+import io
+import threading
+import subprocess
+from typing import Dict, Any, List, Iterator, Optional, Tuple, IO
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+READ_SIZE = 64 * 1024
+
+# Longer patch lines (minified or generated files) are cut here rather than buffered
+MAX_LINE_CHARS = 1024 * 1024
+
+
+def _numstat_records(stream: IO[bytes], buffer: bytearray) -> Iterator[bytes]:
+    """
+    NUL-terminated numstat fields, up to the empty field that ends the section
+
+    Whatever follows the section is left in buffer for _patch_lines.
+    """
+    position = 0
+    while True:
+        end = buffer.find(b"\0", position)
+        if end == -1:
+            del buffer[:position]
+            position = 0
+            chunk = stream.read1(READ_SIZE)
+            if not chunk:
+                return
+            buffer += chunk
+            continue
+        record = bytes(buffer[position:end])
+        position = end + 1
+        if not record:
+            del buffer[:position]
+            return
+        yield record
+
+
+def _patch_lines(stream: IO[bytes], buffer: bytearray) -> Iterator[str]:
+    """Decoded patch lines (with their newline), read one at a time after the buffered prefix"""
+    prefix = io.BytesIO(bytes(buffer))
+    buffer.clear()
+
+    def read_line() -> bytes:
+        line = prefix.readline(MAX_LINE_CHARS)
+        if line.endswith(b"\n") or len(line) >= MAX_LINE_CHARS:
+            return line
+        return line + stream.readline(MAX_LINE_CHARS - len(line))
+
+    while True:
+        line = read_line()
+        if not line:
+            return
+        if not line.endswith(b"\n") and len(line) >= MAX_LINE_CHARS:
+            # Skip the rest of an overlong line without holding it in memory
+            rest = read_line()
+            while rest and not rest.endswith(b"\n"):
+                rest = read_line()
+            line += b"\n"
+        yield line.decode("utf-8", errors="replace")
+
+
+def _parse_numstat(stream: IO[bytes], buffer: bytearray) -> List[Dict[str, Any]]:
+    files = []
+    records = _numstat_records(stream, buffer)
+    for record in records:
+        added, deleted, path = record.decode("utf-8", errors="replace").split("\t", 2)
+        old_path = None
+        if not path:
+            # Renames and copies: "added\tdeleted\t" NUL old NUL new
+            old_path = next(records).decode("utf-8", errors="replace")
+            path = next(records).decode("utf-8", errors="replace")
+        binary = added == "-"
+        files.append({
+            "path": path,
+            "old_path": old_path,
+            "status": "renamed" if old_path else "modified",
+            "binary": binary,
+            "added": 0 if binary else int(added),
+            "deleted": 0 if binary else int(deleted),
+            "header": "",
+            "hunks": [],
+            "truncated": False,
+        })
+    return files
+
+
+def _parse_patch(lines: Iterator[str], files: List[Dict[str, Any]], max_chars: int) -> int:
+    """
+    Attach headers and hunks to the numstat entries, which git emits in patch order
+
+    Hunks are kept whole or not at all; once max_chars of patch text are retained,
+    later hunks are dropped (and their file marked truncated) as they stream past.
+
+    Returns:
+        Number of patch characters retained
+    """
+    index = -1
+    current = None
+    hunk: List[str] = []
+    hunk_chars = 0
+    in_hunk = dropping = False
+    retained = 0
+
+    def close_hunk():
+        nonlocal retained
+        if current is not None and hunk and not dropping:
+            current["hunks"].append("".join(hunk))
+            retained += hunk_chars
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            close_hunk()
+            hunk, hunk_chars, in_hunk, dropping = [], 0, False, False
+            index += 1
+            current = files[index] if index < len(files) else None
+            if current is not None:
+                current["header"] = line
+            continue
+        if current is None:
+            continue
+
+        if line.startswith("@@"):
+            close_hunk()
+            hunk, hunk_chars, in_hunk, dropping = [], 0, True, False
+        elif not in_hunk:
+            current["header"] += line
+            if line.startswith("new file mode"):
+                current["status"] = "added"
+            elif line.startswith("deleted file mode"):
+                current["status"] = "deleted"
+            continue
+
+        if dropping:
+            continue
+        hunk.append(line)
+        hunk_chars += len(line)
+        if retained + len(current["header"]) + hunk_chars > max_chars:
+            # Too large to keep: discard as it streams rather than buffering it
+            hunk, hunk_chars, dropping = [], 0, True
+            current["truncated"] = True
+
+    close_hunk()
+    return retained
+
+
+def read_diff(base_ref: str = "HEAD~1", head_ref: str = None, max_chars: int = None) -> Optional[Dict[str, Any]]:
+    """
+    Diff from the merge base of base_ref to head_ref (or the working tree) in one git call
+
+    Runs `git diff -z --numstat --patch --merge-base` and parses its output as a
+    stream, so memory is bounded by max_chars however large the diff is.
+
+    Args:
+        base_ref: Base git reference
+        head_ref: Head reference (default: the working tree)
+        max_chars: Patch text retained at most (default config.GIT_DIFF_MAX_CHARS)
+
+    Returns:
+        Dictionary with "diff" (patch text) and "files" (path, old_path, status
+        added/modified/deleted/renamed/binary, binary, added/deleted line counts,
+        header, hunks, truncated), or None if git failed
+    """
+    if max_chars is None:
+        max_chars = config.GIT_DIFF_MAX_CHARS
+
+    refs = [base_ref] + ([head_ref] if head_ref else [])
+    result, stderr = _run_diff(["--merge-base"] + refs, max_chars)
+    if result is None and "merge-base" in stderr:
+        # git < 2.30 has no --merge-base; a plain diff matches it for ancestor bases
+        result, stderr = _run_diff(refs, max_chars)
+    if result is None:
+        logger.error(f"git diff {' '.join(refs)} failed: {stderr or 'killed after timeout'}")
+    return result
+
+
+def _run_diff(args: List[str], max_chars: int) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Run one git diff and parse it; returns (result or None on failure, stderr)"""
+    cmd = ["git", "diff", "-z", "--numstat", "--patch", "--find-renames", "--no-color", "--no-ext-diff"] + args
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timer = threading.Timer(config.GIT_DIFF_TIMEOUT, process.kill)
+    timer.start()
+    try:
+        buffer = bytearray()
+        files = _parse_numstat(process.stdout, buffer)
+        retained = _parse_patch(_patch_lines(process.stdout, buffer), files, max_chars)
+        stderr = process.stderr.read().decode("utf-8", errors="replace").strip()
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        process.stdout.close()
+        process.stderr.close()
+
+    if returncode != 0:
+        return None, stderr
+
+    for entry in files:
+        if entry["binary"] and entry["status"] == "modified":
+            entry["status"] = "binary"
+
+    truncated = [entry["path"] for entry in files if entry["truncated"]]
+    if truncated:
+        logger.warning(f"Diff exceeds {max_chars} chars, dropped hunks of {len(truncated)} file(s)")
+
+    diff = "".join(entry["header"] + "".join(entry["hunks"]) for entry in files)
+    logger.info(f"Git diff retrieved: {len(files)} files, {retained} chars of hunks")
+    return {"diff": diff, "files": files}, stderr
@@ -0,0 +1,295 @@
+"""
+PerfGuard AI Test Impact Index
+Maps source lines to the perf tests that execute them, so a PR runs exactly the affected tests
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from datetime import datetime
+from fnmatch import fnmatch
+from typing import Dict, Any, List, Optional, Set
+from pathlib import Path
+from config import config
+from logger import get_logger
+from diff_parser import parse_diff, changed_base_lines
+from storage import load_state, save_state
+from perf_suite import is_test_path, test_environment
+from call_graph import blob_sha
+
+logger = get_logger(__name__)
+
+PLUGIN_DIR = str(Path(__file__).resolve().parent)
+OUTPUT_ENV = "PERFGUARD_IMPACT_OUTPUT"  # Read by impact_plugin.py
+
+
+def _to_ranges(lines: Set[int]) -> str:
+    """Compact line set encoding: {1, 2, 3, 7} -> "1-3,7\""""
+    ranges = []
+    for line in sorted(lines):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def _from_ranges(text: str) -> Set[int]:
+    lines = set()
+    for part in filter(None, text.split(",")):
+        start, _, end = part.partition("-")
+        lines.update(range(int(start), int(end or start) + 1))
+    return lines
+
+
+def _base_path(file_entry: Dict[str, Any]) -> str:
+    """Old-side path of a diff file entry (differs from "path" for renames)"""
+    for line in file_entry["header"].splitlines():
+        if line.startswith("rename from "):
+            return line[len("rename from "):]
+    return file_entry["path"]
+
+
+def _base_blob(file_entry: Dict[str, Any]) -> Optional[str]:
+    """Abbreviated old-side blob SHA from the 'index abc..def' header line"""
+    for line in file_entry["header"].splitlines():
+        if line.startswith("index ") and ".." in line:
+            return line.split()[1].split("..")[0]
+    return None
+
+
+class ImpactIndex:
+    """
+    Line-to-test coverage of the perf suite, kept in config.IMPACT_INDEX_PATH
+
+    Built by running the perf tests once each (benchmarking disabled) with
+    impact_plugin recording executed lines. Stored format:
+
+        {"commit", "updated", "tests": [node IDs],
+         "files": {path: {"sha": blob SHA, "imports": "1-9,12",
+                          "tests": {"<test index>": "3-8,15"}}}}
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or config.IMPACT_INDEX_PATH
+        self.commit: Optional[str] = None
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.tests: Set[str] = set()  # Every indexed test, including ones that touch no source file
+        self._load()
+
+    def _load(self):
+        stored = load_state(self.path)
+        if not stored:
+            return
+        names = stored.get("tests", [])
+        self.commit = stored.get("commit")
+        self.tests = set(names)
+        self.files = {
+            path: {
+                "sha": record["sha"],
+                "imports": _from_ranges(record.get("imports", "")),
+                "tests": {names[int(i)]: _from_ranges(lines) for i, lines in record["tests"].items()},
+            }
+            for path, record in stored.get("files", {}).items()
+        }
+
+    def save(self):
+        names = sorted(self.tests)
+        position = {name: i for i, name in enumerate(names)}
+        save_state(self.path, {
+            "commit": self.commit,
+            "updated": datetime.now().isoformat(),
+            "tests": names,
+            "files": {
+                path: {
+                    "sha": record["sha"],
+                    "imports": _to_ranges(record["imports"]),
+                    "tests": {str(position[test]): _to_ranges(lines) for test, lines in record["tests"].items()},
+                }
+                for path, record in sorted(self.files.items())
+            }
+        })
+        logger.info(f"Saved impact index ({len(self.files)} files)")
+
+    def run_coverage(self, node_ids: List[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run perf tests once under line recording
+
+        Args:
+            node_ids: Tests to run (default: the whole perf suite)
+
+        Returns:
+            {"tests": {node_id: {path: [lines]}}, "imports": {path: [lines]}}, or None
+        """
+        fd, output_path = tempfile.mkstemp(prefix="perfguard-impact-", suffix=".json")
+        os.close(fd)
+        env = test_environment()
+        env[OUTPUT_ENV] = output_path
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PLUGIN_DIR, env.get("PYTHONPATH")]))
+        cmd = [
+            sys.executable, "-m", "pytest", "-m", config.PYTEST_MARKERS,
+            "-p", "impact_plugin", "-p", "no:cacheprovider", "--benchmark-disable", "-q"
+        ] + (node_ids or [])
+
+        logger.info(f"Recording perf test coverage ({len(node_ids) if node_ids else 'all'} tests)...")
+        try:
+            result = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=config.IMPACT_INDEX_TIMEOUT)
+            with open(output_path, 'r') as f:
+                coverage = json.load(f)
+            if result.returncode not in (0, 1):
+                logger.warning(f"Coverage run exited with {result.returncode}: {result.stdout[-500:]}")
+            return coverage
+        except subprocess.TimeoutExpired:
+            logger.error(f"Coverage run timed out after {config.IMPACT_INDEX_TIMEOUT}s")
+        except (OSError, ValueError) as e:
+            logger.error(f"Coverage run produced no results: {e}")
+        finally:
+            Path(output_path).unlink(missing_ok=True)
+        return None
+
+    def _apply(self, coverage: Dict[str, Any], replaced: Set[str], changed_paths: Set[str]):
+        """Swap in fresh coverage for the re-run tests and the files that changed"""
+        self.tests = (self.tests - replaced) | set(coverage["tests"])
+        for path in changed_paths:
+            self.files.pop(path, None)
+        for record in self.files.values():
+            record["tests"] = {test: lines for test, lines in record["tests"].items() if test not in replaced}
+
+        for test, files in coverage["tests"].items():
+            for path, lines in files.items():
+                record = self.files.setdefault(path, {"sha": None, "imports": set(), "tests": {}})
+                record["tests"][test] = set(lines)
+        for path, lines in coverage.get("imports", {}).items():
+            if path in self.files:
+                self.files[path]["imports"] |= set(lines)
+
+        for path in list(self.files):
+            record = self.files[path]
+            if not record["tests"]:
+                del self.files[path]
+            elif record["sha"] is None:
+                try:
+                    record["sha"] = blob_sha(Path(path).read_bytes())
+                except OSError:
+                    del self.files[path]
+
+    def update(self, head_sha: str) -> Dict[str, Any]:
+        """
+        Bring the index up to date with head_sha (run on the main branch)
+
+        Re-runs only the tests that touch files changed since the indexed commit,
+        plus new and modified tests; anything the index cannot map rebuilds it.
+
+        Returns:
+            Summary with "mode" ("full", "incremental" or "unchanged") and "tests_run"
+        """
+        from test_selector import collect_perf_tests
+        from git_diff import read_diff
+
+        current_tests = set(collect_perf_tests())
+        rerun: Optional[Set[str]] = None
+        changed_paths: Set[str] = set()
+
+        if self.files and self.commit:
+            if self.commit == head_sha:
+                return {"mode": "unchanged", "tests_run": 0}
+            changes = read_diff(self.commit, head_sha)
+            impacted = self.select(changes["diff"], per_file=True) if changes else None
+            if impacted is not None:
+                changed_paths = {entry["path"] for entry in changes["files"]} | {
+                    entry["old_path"] for entry in changes["files"] if entry["old_path"]
+                }
+                rerun = set(impacted) | (current_tests - self.tests) | {
+                    test for test in current_tests if test.partition("::")[0] in changed_paths
+                }
+
+        if rerun is None:
+            coverage = self.run_coverage()
+            if coverage is None:
+                return {"mode": "failed", "tests_run": 0}
+            self.files, self.tests = {}, set()
+            self._apply(coverage, set(), set())
+            mode = "full"
+        else:
+            rerun &= current_tests
+            coverage = self.run_coverage(sorted(rerun)) if rerun else {"tests": {}, "imports": {}}
+            if coverage is None:
+                return {"mode": "failed", "tests_run": 0}
+            self._apply(coverage, rerun | (self.tests - current_tests), changed_paths)
+            mode = "incremental"
+
+        self.commit = head_sha
+        self.save()
+        logger.info(f"Impact index updated ({mode}): {len(coverage['tests'])} test(s) run, {len(self.files)} files")
+        return {"mode": mode, "tests_run": len(coverage["tests"])}
+
+    def select(self, diff: str, per_file: bool = False) -> Optional[Dict[str, List[str]]]:
+        """
+        Perf tests affected by a diff against the indexed code
+
+        Changed lines are mapped to base-side line numbers and matched against
+        each test's recorded lines. Changes to module-level code (run at import)
+        or to files whose base version differs from the indexed one select every
+        test that touches the file.
+
+        Args:
+            diff: Git diff string
+            per_file: Select every test touching a changed file, ignoring lines
+
+        Returns:
+            Dictionary of node ID -> reasons, or None when the diff contains
+            changes the index cannot map (no index, conftest or non-Python files)
+        """
+        if not self.files:
+            return None
+
+        impacted: Dict[str, List[str]] = {}
+        base_lines = changed_base_lines(diff)
+        ignored = config.IMPACT_IGNORE_PATTERNS + config.DIFF_EXCLUDE_PATTERNS
+
+        for file_entry in parse_diff(diff):
+            path = file_entry["path"]
+            if not path or any(fnmatch(path, pattern) for pattern in ignored):
+                continue
+            if Path(path).name == "conftest.py":
+                logger.info(f"{path} changed, impact index cannot narrow the perf tests")
+                return None
+            if is_test_path(path):
+                continue  # Changed perf tests are selected directly
+            if not path.endswith(".py"):
+                logger.info(f"Non-Python change to {path}, impact index cannot narrow the perf tests")
+                return None
+
+            record = self.files.get(_base_path(file_entry))
+            if record is None:
+                continue  # No perf test executes this file
+
+            lines = base_lines.get(path, set())
+            blob = _base_blob(file_entry)
+            if per_file:
+                whole_file = f"changed file {path}"
+            elif blob and not record["sha"].startswith(blob):
+                whole_file = f"{path} changed since the index was built"
+            elif lines & record["imports"]:
+                whole_file = f"module-level change in {path}"
+            else:
+                whole_file = None
+
+            for test, test_lines in record["tests"].items():
+                if whole_file:
+                    impacted.setdefault(test, []).append(whole_file)
+                elif lines & test_lines:
+                    impacted.setdefault(test, []).append(f"covers {path}:{min(lines & test_lines)}")
+
+        logger.info(f"Impact index maps the diff to {len(impacted)}/{len(self.tests)} perf test(s)")
+        return impacted
+
+
+def update_impact_index(head_sha: str) -> Dict[str, Any]:
+    """Update the stored impact index, never failing the run it is part of"""
+    try:
+        return ImpactIndex().update(head_sha)
+    except Exception as e:
+        logger.error(f"Could not update impact index: {e}")
+        return {"mode": "failed", "tests_run": 0}
@@ -0,0 +1,159 @@
+"""
+PerfGuard AI Impact Recording Plugin
+pytest plugin recording which repository source lines each test executes
+
+Loaded with `-p impact_plugin` by impact_index.py; writes its results to the
+JSON file named by PERFGUARD_IMPACT_OUTPUT when the session ends.
+"""
+import os
+import sys
+import json
+import threading
+from typing import Dict, Optional, Set, Tuple
+from pathlib import Path
+
+import pytest
+
+OUTPUT_ENV = "PERFGUARD_IMPACT_OUTPUT"
+
+
+class LineRecorder:
+    """
+    Records executed (path, line) pairs of source files under a root directory
+
+    Uses sys.monitoring on Python 3.12+, where each line reports once per test and
+    is then disabled, and sys.settrace on older versions.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self.own_dir = Path(__file__).resolve().parent  # PerfGuard itself is never under test
+        self.lines: Set[Tuple[str, int]] = set()
+        self._paths: Dict[str, Optional[str]] = {}
+        self._monitoring = hasattr(sys, "monitoring")
+
+    def _tracked(self, filename: str) -> Optional[str]:
+        """Repository-relative path of a source file worth recording, else None"""
+        if filename not in self._paths:
+            relative = None
+            try:
+                path = Path(filename).resolve()
+                if path.suffix == ".py" and not str(path).startswith(sys.prefix) \
+                        and path.parent != self.own_dir:
+                    relative = path.relative_to(self.root).as_posix()
+                    parts = Path(relative).parts
+                    name = parts[-1]
+                    if name.startswith("test_") or name.endswith("_test.py") or name == "conftest.py" \
+                            or "tests" in parts or parts[0].startswith("."):
+                        relative = None
+            except (ValueError, OSError):
+                relative = None
+            self._paths[filename] = relative
+        return self._paths[filename]
+
+    def install(self):
+        if self._monitoring:
+            monitoring = sys.monitoring
+            self._tool = monitoring.COVERAGE_ID
+            monitoring.use_tool_id(self._tool, "perfguard-impact")
+            monitoring.register_callback(self._tool, monitoring.events.PY_START, self._on_start)
+            monitoring.register_callback(self._tool, monitoring.events.LINE, self._on_line)
+            monitoring.set_events(self._tool, monitoring.events.PY_START)
+        else:
+            threading.settrace(self._trace)
+            sys.settrace(self._trace)
+
+    def uninstall(self):
+        if self._monitoring:
+            monitoring = sys.monitoring
+            monitoring.set_events(self._tool, 0)
+            monitoring.register_callback(self._tool, monitoring.events.PY_START, None)
+            monitoring.register_callback(self._tool, monitoring.events.LINE, None)
+            monitoring.free_tool_id(self._tool)
+        else:
+            threading.settrace(None)
+            sys.settrace(None)
+
+    def reset(self) -> Set[Tuple[str, int]]:
+        """Return the lines recorded since the last reset and start a new set"""
+        lines, self.lines = self.lines, set()
+        if self._monitoring:
+            # Re-enable the per-location events disabled while recording the last test
+            sys.monitoring.restart_events()
+        else:
+            sys.settrace(self._trace)
+        return lines
+
+    # sys.monitoring callbacks: line events are only switched on for tracked code
+    def _on_start(self, code, offset):
+        if self._tracked(code.co_filename):
+            sys.monitoring.set_local_events(self._tool, code, sys.monitoring.events.LINE)
+        return sys.monitoring.DISABLE
+
+    def _on_line(self, code, line):
+        relative = self._tracked(code.co_filename)
+        if relative:
+            self.lines.add((relative, line))
+        return sys.monitoring.DISABLE
+
+    # sys.settrace fallback
+    def _trace(self, frame, event, arg):
+        relative = self._tracked(frame.f_code.co_filename)
+        if relative is None:
+            return None
+
+        def trace_lines(frame, event, arg):
+            if event == "line":
+                self.lines.add((relative, frame.f_lineno))
+            return trace_lines
+
+        return trace_lines
+
+
+def _by_file(lines: Set[Tuple[str, int]], into: Dict[str, Set[int]] = None) -> Dict[str, Set[int]]:
+    files = into if into is not None else {}
+    for path, line in lines:
+        if line > 0:  # Line 0 is the implicit start of a module, not source
+            files.setdefault(path, set()).add(line)
+    return files
+
+
+class ImpactPlugin:
+    """
+    Attributes the lines executed during each test's setup, call and teardown to it
+
+    Lines run outside any test (module imports during collection, mostly) are
+    kept separately: they affect every test that uses the module.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.recorder = LineRecorder(os.getcwd())
+        self.tests: Dict[str, Dict[str, list]] = {}
+        self.imports: Dict[str, Set[int]] = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        _by_file(self.recorder.reset(), self.imports)
+        yield
+        files = _by_file(self.recorder.reset())
+        self.tests[item.nodeid] = {path: sorted(lines) for path, lines in files.items()}
+
+    def pytest_sessionstart(self, session):
+        self.recorder.install()
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        _by_file(self.recorder.reset(), self.imports)
+        self.recorder.uninstall()
+        with open(self.output_path, 'w') as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "tests": self.tests,
+                "imports": {path: sorted(lines) for path, lines in self.imports.items()}
+            }, f)
+
+
+def pytest_configure(config):
+    output_path = os.environ.get(OUTPUT_ENV)
+    if output_path:
+        config.pluginmanager.register(ImpactPlugin(output_path), "perfguard-impact")
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+PerfGuard AI Local LLM Stand-in Server
+Serves the Anthropic Messages API and a Gemini generateContent shim on localhost,
+with configurable latency, error and rate-limit behavior for offline benchmarking
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from logger import get_logger
+from diff_compressor import HOTSPOT_SIGNALS
+
+logger = get_logger(__name__)
+
+GEMINI_PATH = re.compile(r"^/v1(beta)?/models/(?P<model>[^:/]+):generateContent")
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec string
+
+    fixed:S | uniform:LOW,HIGH | lognormal:MEDIAN,SIGMA | exponential:MEAN  (seconds)
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        if kind not in ("fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * rng.lognormvariate(0, sigma)
+        return rng.expovariate(1 / self.params[0])
+
+
+def rule_based_analysis(prompt: str) -> Dict[str, Any]:
+    """Deterministic stand-in for an LLM diff analysis, driven by hotspot signals"""
+    added = [line[1:] for line in prompt.splitlines() if line.startswith("+") and not line.startswith("+++")]
+    paths = sorted(set(re.findall(r"^\+\+\+ b/(\S+)", prompt, re.MULTILINE)))
+
+    score = 0
+    for line in added:
+        for pattern, weight in HOTSPOT_SIGNALS:
+            if pattern.search(line):
+                score += weight
+
+    risk = round(min(1.0, score / 20), 2)
+    return {
+        "risk_score": risk,
+        "critical_paths": paths[:5],
+        "suggested_benchmarks": [f"test_{Path(p).stem}" for p in paths[:3]],
+        "reasoning": f"Stub analysis: hotspot signal score {score} over {len(added)} added lines",
+        "suggestions": ["Review loops and blocking calls"] if score else [],
+        # Fields for the other prompt types, so every call path gets valid JSON
+        "justification": "Stub refinement",
+        "overall_risk": "high" if risk > 0.6 else "medium" if risk > 0.3 else "low",
+        "perf_impact": f"{int(risk * 30)}% slowdown",
+    }
+
+
+class StubBehavior:
+    """Shared, thread-safe request behavior for the stand-in server"""
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        fail_first: int = 0,
+        canned_response: Optional[str] = None,
+        seed: int = 0
+    ):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self.canned_response = canned_response
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def next_outcome(self) -> Tuple[float, str]:
+        """Pick latency and outcome ('ok', 'error' or 'rate_limit') for the next request"""
+        with self.lock:
+            self.request_count += 1
+            delay = self.latency.sample(self.rng)
+            if self.request_count <= self.fail_first:
+                return delay, "error"
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                return delay, "rate_limit"
+            if roll < self.rate_limit_rate + self.error_rate:
+                return delay, "error"
+            return delay, "ok"
+
+    def response_text(self, prompt: str) -> str:
+        if self.canned_response is not None:
+            return self.canned_response
+        return json.dumps(rule_based_analysis(prompt))
+
+
+def _make_handler(behavior: StubBehavior):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug("stub: " + format % args)
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON"}})
+                return
+
+            path = self.path.split("?", 1)[0]
+            if path == "/v1/messages":
+                self._handle_anthropic(request)
+            elif GEMINI_PATH.match(path):
+                self._handle_gemini(request, GEMINI_PATH.match(path).group("model"))
+            else:
+                self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+        def _handle_anthropic(self, request: Dict[str, Any]):
+            delay, outcome = behavior.next_outcome()
+            time.sleep(delay)
+
+            if outcome == "rate_limit":
+                self._send_json(
+                    429,
+                    {"type": "error", "error": {"type": "rate_limit_error", "message": "Stub rate limit"}},
+                    {"retry-after": str(behavior.retry_after)}
+                )
+                return
+            if outcome == "error":
+                self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Stub overloaded"}})
+                return
+
+            content = request.get("messages", [{}])[-1].get("content", "")
+            if isinstance(content, list):
+                content = " ".join(block.get("text", "") for block in content)
+            text = behavior.response_text(content)
+            self._send_json(200, {
+                "id": f"msg_stub_{behavior.request_count}",
+                "type": "message",
+                "role": "assistant",
+                "model": request.get("model", "stub"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": len(content) // 4, "output_tokens": len(text) // 4}
+            })
+
+        def _handle_gemini(self, request: Dict[str, Any], model: str):
+            delay, outcome = behavior.next_outcome()
+            time.sleep(delay)
+
+            if outcome == "rate_limit":
+                self._send_json(
+                    429,
+                    {"error": {"code": 429, "message": "Stub quota exceeded", "status": "RESOURCE_EXHAUSTED"}},
+                    {"retry-after": str(behavior.retry_after)}
+                )
+                return
+            if outcome == "error":
+                self._send_json(503, {"error": {"code": 503, "message": "Stub unavailable", "status": "UNAVAILABLE"}})
+                return
+
+            prompt = " ".join(
+                part.get("text", "")
+                for content in request.get("contents", [])
+                for part in content.get("parts", [])
+            )
+            text = behavior.response_text(prompt)
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": len(prompt) // 4,
+                    "candidatesTokenCount": len(text) // 4,
+                    "totalTokenCount": (len(prompt) + len(text)) // 4
+                },
+                "modelVersion": model
+            })
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **behavior_kwargs) -> ThreadingHTTPServer:
+    """
+    Start the stand-in server on a background thread
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port; see server.server_address)
+        **behavior_kwargs: StubBehavior options
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    behavior = StubBehavior(**behavior_kwargs)
+    server = ThreadingHTTPServer((host, port), _make_handler(behavior))
+    server.daemon_threads = True
+    server.behavior = behavior
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"LLM stub server listening on http://{host}:{server.server_address[1]}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Anthropic/Gemini stand-in for PerfGuard benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4",
+                        help="fixed:S | uniform:LOW,HIGH | lognormal:MEDIAN,SIGMA | exponential:MEAN")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 5xx responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail the first N requests")
+    parser.add_argument("--canned", help="File whose contents are returned as every response text")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        args.host,
+        args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        fail_first=args.fail_first,
+        canned_response=Path(args.canned).read_text() if args.canned else None,
+        seed=args.seed
+    )
+    print(f"Point PerfGuard at it with:\n"
+          f"  export ANTHROPIC_BASE_URL=http://{args.host}:{server.server_address[1]}\n"
+          f"  export PERFGUARD_GEMINI_ENDPOINT=http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,8 +7,9 @@ Orchestrates the full performance analysis workflow
 import os
 import sys
 import json
-import subprocess
-from typing import List, Dict, Any
+import time
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import locale
 
@@ -29,92 +30,14 @@ except:
 
 from config import config
 from logger import get_logger
-from ai_analyzer import AIAnalyzer
-from metrics_collector import collect_metrics
 from rules_engine import calculate_score
+from pipeline import Pipeline
+from git_diff import read_diff
+from tracing import tracer, span
 
 logger = get_logger(__name__)
 
 
-def get_git_diff(base_ref: str = "HEAD~1") -> str:
-    """
-    Get git diff from base reference
-
-    Args:
-        base_ref: Base git reference (default: HEAD~1)
-
-    Returns:
-        Git diff as string
-    """
-    try:
-        logger.info(f"Getting git diff from {base_ref}...")
-        result = subprocess.run(
-            ["git", "diff", base_ref],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',  # Replace invalid characters instead of failing
-            check=True,
-            timeout=30
-        )
-        diff = result.stdout
-
-        if not diff or diff.strip() == "":
-            logger.warning(f"No changes detected compared to {base_ref}")
-            # Try different base
-            result = subprocess.run(
-                ["git", "diff", "HEAD^"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=30
-            )
-            diff = result.stdout
-
-        logger.info(f"Git diff retrieved ({len(diff)} chars)")
-        return diff
-
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Git command failed: {e}")
-        logger.error(f"stderr: {e.stderr}")
-        return ""
-    except Exception as e:
-        logger.error(f"Error getting git diff: {e}")
-        return ""
-
-
-def get_changed_files(base_ref: str = "HEAD~1") -> List[str]:
-    """
-    Get list of changed files
-
-    Args:
-        base_ref: Base git reference
-
-    Returns:
-        List of changed file paths
-    """
-    try:
-        logger.info("Getting list of changed files...")
-        result = subprocess.run(
-            ["git", "diff", "--name-only", base_ref],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            check=True,
-            timeout=30
-        )
-
-        files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-        logger.info(f"Found {len(files)} changed files")
-        return files
-
-    except Exception as e:
-        logger.error(f"Error getting changed files: {e}")
-        return []
-
-
 def sanitize_output(text: str) -> str:
     """Sanitize output to prevent injection"""
     # Basic sanitization - remove potentially dangerous characters
@@ -161,7 +84,14 @@ def generate_markdown_report(score_data: Dict[str, Any], ai_response: Dict[str,
 **Verdict: {verdict}**
 **Status: {'❌ MERGE BLOCKED' if block else '✅ APPROVED'}**
 
----
+"""
+
+    refinement = score_data.get("score_refinement")
+    if refinement:
+        justification = sanitize_output(str(refinement.get("justification", "")))
+        report += f"*Refined from {refinement['raw_score']:.1f} near the pass threshold: {justification}*\n\n"
+
+    report += f"""---
 
 ### 📊 Performance Metrics Breakdown
 
@@ -180,10 +110,59 @@ def generate_markdown_report(score_data: Dict[str, Any], ai_response: Dict[str,
         report += f"- **{metric.replace('_', ' ').title()}**: {status_icon} {metric_score:.1f}/100\n"
         if baseline > 0:
             report += f"  - Current: `{current:.4f}` | Baseline: `{baseline:.4f}` | Change: `{change:+.2f}%`\n"
+        if data.get("calibration_factor"):
+            report += (f"  - Baseline scaled by `{data['calibration_factor']:.3f}` "
+                       f"for this runner's calibrated speed\n")
+        ab = data.get("ab")
+        if ab:
+            interval = f" ± {ab['ci_percent']:.2f}%" if ab.get("ci_percent") is not None else ""
+            verdict = "significant" if ab["significant"] else "within noise"
+            report += (f"  - A/B against merge-base `{ab['base_sha'][:12]}` on this runner: "
+                       f"`{ab['change_percent']:+.2f}%`{interval} over {ab['rounds']} interleaved rounds ({verdict})\n")
+        if "benchmarks_run" in data:
+            report += (f"  - Selected benchmarks: {data['benchmarks_run']} run, "
+                       f"{data.get('benchmarks_reused', 0)} reused, "
+                       f"{data['benchmarks_carried_over']} carried over from baseline\n")
+            reused = data.get("reused_benchmarks", [])
+            if reused:
+                names = ", ".join(f"`{name.partition('::')[2]}`" for name in reused[:10])
+                more = f" (+{len(reused) - 10} more)" if len(reused) > 10 else ""
+                report += f"  - Reused from an earlier run with identical code and environment: {names}{more}\n"
+
+    # Profile diff of the regressed benchmarks
+    profile_diff = score_data.get("profile_diff")
+    if profile_diff:
+        triggered = ", ".join(f"`{name}`" for name in profile_diff["triggered_by"])
+        report += f"\n### 🔬 Profile Diff\n\n"
+        report += (f"{triggered} scored below threshold; regressed benchmarks re-run under cProfile, "
+                   f"functions with the largest self time increase first (times in ms per run):\n")
+        for node_id, diff in profile_diff["benchmarks"].items():
+            base_total, head_total = diff["self_total"]
+            change = (head_total - base_total) / base_total * 100 if base_total > 0 else 0
+            report += f"\n**`{node_id.partition('::')[2] or node_id}`** against {diff['base']}: "
+            report += f"`{base_total * 1000:.2f}` → `{head_total * 1000:.2f}` total ({change:+.1f}%)\n\n"
+            report += "| Function | Self | Δ Self | Cumulative | Δ Cumulative | Calls |\n"
+            report += "|---|---|---|---|---|---|\n"
+            for row in diff["functions"]:
+                name = row["function"].replace("|", "\\|")
+                report += (
+                    f"| `{name}` "
+                    f"| {row['self'][0] * 1000:.2f} → {row['self'][1] * 1000:.2f} | {row['self_delta'] * 1000:+.2f} "
+                    f"| {row['cumulative'][0] * 1000:.2f} → {row['cumulative'][1] * 1000:.2f} "
+                    f"| {row['cumulative_delta'] * 1000:+.2f} "
+                    f"| {row['calls'][0]:.0f} → {row['calls'][1]:.0f} |\n"
+                )
 
     # AI Analysis section
     report += f"\n### 🤖 AI Analysis\n\n"
+    incremental = score_data.get("incremental")
+    if incremental:
+        report += (f"*Incremental: analyzed {incremental['changed_files']} file(s) changed since "
+                   f"`{incremental['since'][:12]}` and merged with the previous analysis*\n\n")
     report += f"**Risk Score**: {ai_response.get('risk_score', 0):.2f}/1.00\n\n"
+    if ai_response.get("overall_risk"):
+        perf_impact = sanitize_output(str(ai_response.get("perf_impact", "Unknown")))
+        report += f"**Overall Risk**: {ai_response['overall_risk'].upper()} | **Estimated Impact**: {perf_impact}\n\n"
 
     reasoning = sanitize_output(ai_response.get("reasoning", "No analysis available"))
     report += f"**Reasoning**: {reasoning}\n\n"
@@ -205,6 +184,39 @@ def generate_markdown_report(score_data: Dict[str, Any], ai_response: Dict[str,
             report += f"{i}. {clean_suggestion}\n"
         report += "\n"
 
+    # Generated benchmarks
+    generated = score_data.get("generated_benchmarks")
+    if generated and any(generated.values()):
+        report += f"### 🧪 Generated Benchmarks\n\n"
+        for label, key in (("Generated", "generated"), ("Reused", "reused"), ("Rejected", "rejected")):
+            for function in generated.get(key, []):
+                report += f"- {label}: `{function}`\n"
+        report += "\n"
+
+    # Provider telemetry
+    provider_telemetry = score_data.get("provider_telemetry")
+    if provider_telemetry and provider_telemetry.get("providers"):
+        report += f"### 📡 LLM Providers\n\n"
+        report += "| Provider | Calls | Retries | Tokens In / Out | Est. Cost | P50 | P95 |\n|---|---|---|---|---|---|---|\n"
+        for provider, entry in provider_telemetry["providers"].items():
+            report += (f"| {provider} | {entry['calls']} | {entry['retries']} | "
+                       f"{entry['input_tokens']} / {entry['output_tokens']} | ${entry['cost_usd']:.4f} | "
+                       f"{entry['latency_p50']:.2f}s | {entry['latency_p95']:.2f}s |\n")
+        report += (f"\nFallbacks: {provider_telemetry.get('fallbacks', 0)} | "
+                   f"Hedged requests: {provider_telemetry.get('hedges', 0)} | "
+                   f"Latency percentiles over the last {config.TELEMETRY_HISTORY_SIZE} calls\n\n")
+
+    # Pipeline timings
+    stage_timings = score_data.get("stage_timings")
+    if stage_timings and stage_timings.get("stages"):
+        critical = stage_timings.get("critical_path", [])
+        report += f"### ⏱️ Pipeline Timings ({stage_timings.get('total', 0):.1f}s total)\n\n"
+        report += "| Stage | Start | Duration | Critical Path |\n|---|---|---|---|\n"
+        for stage, timing in sorted(stage_timings["stages"].items(), key=lambda item: item[1]["start"]):
+            marker = "●" if stage in critical else ""
+            report += f"| {stage} | {timing['start']:.2f}s | {timing['duration']:.2f}s | {marker} |\n"
+        report += "\n"
+
     # Footer
     report += f"""---
 
@@ -215,8 +227,544 @@ def generate_markdown_report(score_data: Dict[str, Any], ai_response: Dict[str,
     return report
 
 
+def run_analysis(diff: str, changed_files: List[str]) -> Dict[str, Any]:
+    """
+    Analyze the diff, using local static analysis to skip the LLM where possible
+
+    The LLM is skipped when every change was scored locally and the local risk
+    is below config.LOCAL_RISK_SKIP_THRESHOLD, or when no API key is configured. Otherwise local findings are added to the LLM result.
+
+    Args:
+        diff: Git diff string
+        changed_files: List of changed file paths
+
+    Returns:
+        Analysis results dictionary
+    """
+    # Deferred so the SDKs are only imported once there is something to analyze
+    from ai_analyzer import AIAnalyzer
+    from static_analyzer import analyze_diff_locally
+
+    if not config.LOCAL_ANALYSIS_ENABLED:
+        return AIAnalyzer().analyze_diff(diff, changed_files)
+
+    with span("analysis.local") as local_span:
+        local_result = analyze_diff_locally(diff)
+        local_span.set(
+            risk=local_result["risk_score"],
+            findings=len(local_result["findings"]),
+            unanalyzed=len(local_result["unanalyzed"])
+        )
+    has_api_key = bool(config.ANTHROPIC_API_KEY or config.GOOGLE_API_KEY)
+
+    if local_result["unanalyzed"]:
+        logger.info(f"Local analysis could not score {len(local_result['unanalyzed'])} change(s), consulting the LLM")
+    elif local_result["risk_score"] < config.LOCAL_RISK_SKIP_THRESHOLD:
+        logger.info(
+            f"Local risk {local_result['risk_score']:.2f} below "
+            f"{config.LOCAL_RISK_SKIP_THRESHOLD}, skipping LLM analysis"
+        )
+        return local_result
+
+    if not has_api_key:
+        logger.warning("No AI API key configured, using local static analysis only")
+        return local_result
+
+    ai_response = AIAnalyzer().analyze_diff(diff, changed_files)
+
+    # Local findings are deterministic evidence; surface them alongside the LLM's.
+    # New lists: the response's own may be the caller's (changed_files on fallback)
+    for key in ("critical_paths", "suggestions"):
+        merged = list(ai_response.get(key, []))
+        for item in local_result[key]:
+            if item not in merged:
+                merged.append(item)
+        ai_response[key] = merged
+    ai_response["local_findings"] = local_result["findings"]
+
+    return ai_response
+
+
+def merge_with_prior(analysis: Dict[str, Any], incremental: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine the analysis of the re-analyzed files with the kept analyses of earlier pushes
+
+    Args:
+        analysis: Analysis of the PR diff of incremental["changed_files"]
+        incremental: Plan from pr_state.plan_incremental
+
+    Returns:
+        Analysis covering the whole PR, with the per-file "analysis_groups" it
+        was merged from (stored for the next push)
+    """
+    from ai_analyzer import AIAnalyzer
+
+    if incremental["unchanged"]:
+        return {**incremental["prior"]["analysis"], "analysis_groups": incremental["kept"]}
+
+    groups = list(incremental["kept"])
+    if incremental["changed_files"]:
+        groups.append({"files": incremental["changed_files"], "analysis": analysis})
+    if not groups:
+        return {**analysis, "analysis_groups": []}
+    merged = AIAnalyzer.merge_analysis_results([group["analysis"] for group in groups])
+    return {**analysis, **merged, "analysis_groups": groups}
+
+
+def refine_borderline_score(score_data: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Second LLM pass on the score, only when it lands near the pass/fail line
+
+    Fires when the score is within config.SCORE_REFINEMENT_BAND of MIN_PASSING_SCORE
+    and an API key is configured. The adjustment is capped at
+    config.SCORE_REFINEMENT_MAX_ADJUSTMENT and the verdict is recomputed.
+
+    Args:
+        score_data: Result of calculate_score
+        analysis: Analysis used for scoring
+
+    Returns:
+        score_data, refined in place when the second pass ran
+    """
+    score = score_data.get("performance_score", 0)
+    if (
+        not config.SCORE_REFINEMENT_ENABLED
+        or score_data.get("verdict") == "ERROR"
+        or abs(score - config.MIN_PASSING_SCORE) > config.SCORE_REFINEMENT_BAND
+        or not (config.ANTHROPIC_API_KEY or config.GOOGLE_API_KEY)
+    ):
+        return score_data
+
+    from ai_analyzer import AIAnalyzer
+    from rules_engine import determine_verdict
+
+    logger.info(f"Score {score} is within {config.SCORE_REFINEMENT_BAND} of the threshold, refining...")
+    metrics_summary = {
+        name: {key: metric[key] for key in ("current", "baseline", "change_percent", "delta") if key in metric}
+        for name, metric in score_data.get("metrics", {}).items()
+    }
+    refinement = AIAnalyzer().refine_score(score, metrics_summary, analysis.get("risk_score", 0))
+
+    try:
+        adjusted = float(refinement["adjusted_score"])
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring non-numeric refined score: {refinement['adjusted_score']!r}")
+        return score_data
+
+    limit = config.SCORE_REFINEMENT_MAX_ADJUSTMENT
+    adjusted = round(max(score - limit, min(score + limit, adjusted)), config.SCORE_PRECISION)
+    verdict, block_merge = determine_verdict(adjusted)
+
+    score_data["score_refinement"] = {
+        "raw_score": score,
+        "adjusted_score": adjusted,
+        "justification": refinement.get("justification", "")
+    }
+    score_data.update({"performance_score": adjusted, "verdict": verdict, "block_merge": block_merge})
+    logger.info(f"Refined score: {score} -> {adjusted} ({verdict})")
+    return score_data
+
+
+def run_pipeline(
+    diff: str,
+    changed_files: List[str],
+    git_start: float,
+    git_end: float,
+    incremental: Dict[str, Any] = None,
+    update_impact_index: bool = None,
+    head_sha: str = None,
+    force: bool = False,
+    base_ref: str = None
+) -> Dict[str, Any]:
+    """
+    Run analysis, metrics collection and scoring as a task DAG
+
+    The LLM call is mostly network wait and metrics collection is mostly pytest
+    subprocesses, so the two run concurrently and only scoring waits for both.
+    With benchmark selection enabled, the benchmarks instead wait for the
+    analysis and only run the ones it points at; memory, CPU and I/O cover the
+    whole suite either way and still overlap with the analysis.
+
+    For incremental PR runs only the files whose part of the PR changed are
+    analyzed and benchmarked; the result replaces their entries in the cached
+    per-file analysis of earlier pushes and is merged with the rest.
+
+    With config.CHECKPOINT_ENABLED each stage's output is saved under the
+    commit, diff and configuration, and a rerun after a crash or timeout
+    resumes after the last completed stage (and metrics collector).
+
+    Args:
+        diff: Git diff string
+        changed_files: List of changed file paths
+        git_start: perf_counter timestamp when the git stage started
+        git_end: perf_counter timestamp when the git stage finished
+        incremental: Optional plan from pr_state.plan_incremental
+        update_impact_index: Refresh the test impact index (default config.IMPACT_INDEX_UPDATE)
+        head_sha: Commit being analyzed (default: PR_HEAD_SHA or HEAD)
+        force: Recompute every stage instead of resuming from checkpoints
+        base_ref: Git reference the changes are diffed against; with
+            config.AB_BENCHMARKING execution time is measured against its
+            merge-base in this job instead of the stored baseline
+
+    Returns:
+        Score data including per-stage timings under "stage_timings"
+    """
+    from metrics_collector import collect_metrics, collect_suite_metrics
+    from telemetry import telemetry
+
+    # Telemetry covers one run; a daemon process serves many
+    telemetry.reset()
+
+    if incremental:
+        analysis_diff, analysis_files = incremental["diff"], incremental["changed_files"]
+        prior_metrics = incremental["prior"].get("metrics")
+    else:
+        analysis_diff, analysis_files, prior_metrics = diff, changed_files, None
+
+    checkpoints = None
+    if config.CHECKPOINT_ENABLED:
+        from checkpoint import CheckpointStore, run_key
+        from pr_state import resolve_head_sha
+
+        head_sha = head_sha or resolve_head_sha()
+        checkpoints = CheckpointStore(run_key(head_sha, diff, analysis_diff), force=force)
+
+    ab_base_ref = base_ref if config.AB_BENCHMARKING else None
+
+    pipeline = Pipeline(origin=git_start, checkpoints=checkpoints)
+    pipeline.add_result("git", {"diff": diff, "changed_files": changed_files}, git_start, git_end)
+
+    # Nothing left to analyze: no changes since the last analysis, or only reverts
+    unchanged = bool(incremental) and not analysis_diff.strip()
+
+    pipeline.add_stage(
+        "ai_analysis",
+        lambda results: (
+            {"risk_score": 0.0, "critical_paths": [], "suggested_benchmarks": [],
+             "reasoning": "No changes since the last analysis", "suggestions": []}
+            if unchanged else run_analysis(analysis_diff, analysis_files)
+        ),
+        depends_on=["git"]
+    )
+    analysis_stage = "ai_analysis"
+    if incremental:
+        analysis_stage = "full_analysis"
+        pipeline.add_stage(
+            analysis_stage,
+            lambda results: merge_with_prior(results["ai_analysis"], incremental),
+            depends_on=["ai_analysis"]
+        )
+
+    # Generated benchmarks must exist before metrics collection picks up the suite
+    metrics_deps = []
+    if config.GENERATE_BENCHMARKS and (config.ANTHROPIC_API_KEY or config.GOOGLE_API_KEY):
+        from bench_generator import generate_missing_benchmarks
+
+        # Writes test files into the checkout, which a fresh CI workspace lacks
+        pipeline.add_stage(
+            "generate_benchmarks",
+            lambda results: generate_missing_benchmarks(analysis_diff),
+            depends_on=["git"],
+            checkpoint=False
+        )
+        metrics_deps.append("generate_benchmarks")
+
+    # Memory, CPU and I/O cover the whole suite whatever the analysis selects,
+    # so they run while it is pending; benchmarks wait for them, so timings
+    # never share the CPU with another pytest run
+    pipeline.add_stage(
+        "suite_metrics",
+        lambda results: collect_suite_metrics(checkpoints=checkpoints),
+        depends_on=["git"] + metrics_deps
+    )
+    metrics_deps.append("suite_metrics")
+
+    if config.BENCHMARK_SELECTION_ENABLED:
+        # Benchmarks are picked from the analysis, so they wait for it; the
+        # smaller benchmark run more than makes up for the lost overlap
+        pipeline.add_stage(
+            "metrics",
+            lambda results: collect_metrics(
+                suggested_benchmarks=results["ai_analysis"].get("suggested_benchmarks", []),
+                changed_files=changed_files,
+                critical_paths=results["ai_analysis"].get("critical_paths", []),
+                selection_files=analysis_files,
+                prior_metrics=prior_metrics,
+                diff=analysis_diff,
+                checkpoints=checkpoints,
+                ab_base_ref=ab_base_ref,
+                suite_metrics=results["suite_metrics"]
+            ),
+            depends_on=["ai_analysis"] + metrics_deps
+        )
+    else:
+        pipeline.add_stage(
+            "metrics",
+            lambda results: collect_metrics(
+                changed_files=changed_files, checkpoints=checkpoints, ab_base_ref=ab_base_ref,
+                suite_metrics=results["suite_metrics"]
+            ),
+            depends_on=["git"] + metrics_deps
+        )
+    if update_impact_index is None:
+        update_impact_index = config.IMPACT_INDEX_UPDATE
+    if config.IMPACT_INDEX_ENABLED and update_impact_index:
+        from impact_index import update_impact_index as update_index
+        from pr_state import resolve_head_sha
+
+        # After metrics so the coverage run does not disturb benchmark timings
+        pipeline.add_stage(
+            "impact_index",
+            lambda results: update_index(head_sha or resolve_head_sha()),
+            depends_on=["metrics"]
+        )
+    pipeline.add_stage(
+        "score",
+        lambda results: calculate_score(results["metrics"], results[analysis_stage]),
+        depends_on=[analysis_stage, "metrics"]
+    )
+    # A second LLM pass that timed out falls back to the raw score, so always
+    # retry it rather than resuming with the fallback
+    pipeline.add_stage(
+        "refine",
+        lambda results: refine_borderline_score(results["score"], results[analysis_stage]),
+        depends_on=["score"],
+        checkpoint=False
+    )
+
+    if config.PROFILE_ON_REGRESSION:
+        from profiler import profile_regressions
+
+        # Only runs the profiler when a timing metric regressed; after the
+        # coverage run so the two do not compete for the CPU
+        pipeline.add_stage(
+            "profile",
+            lambda results: profile_regressions(results["score"].get("details", {}), results["metrics"], base_ref),
+            depends_on=["score"] + (["impact_index"] if "impact_index" in pipeline.stages else [])
+        )
+
+    logger.info("Running AI analysis and metrics collection...")
+    results = pipeline.run()
+    if checkpoints:
+        # Checkpoints only resume interrupted runs; a finished one is recomputed
+        checkpoints.discard()
+
+    score_data = results["refine"]
+    # Keep the full analysis (local findings etc.) for the report
+    score_data["ai_analysis"] = {**results[analysis_stage], **score_data.get("ai_analysis", {})}
+    score_data["stage_timings"] = pipeline.summary()
+    if telemetry.calls:
+        score_data["provider_telemetry"] = telemetry.flush()
+    if "impact_index" in results:
+        score_data["impact_index"] = results["impact_index"]
+    if "generate_benchmarks" in results:
+        score_data["generated_benchmarks"] = results["generate_benchmarks"]
+    if results.get("profile"):
+        score_data["profile_diff"] = results["profile"]
+    if incremental:
+        score_data["incremental"] = {
+            "since": incremental["since"],
+            "changed_files": len(analysis_files)
+        }
+
+    # Flag metrics that were not re-measured because only a benchmark subset ran
+    details = score_data.get("details", {})
+    for name, metric in results["metrics"].items():
+        if name in details:
+            for key in ("benchmarks_run", "benchmarks_reused",
+                        "reused_benchmarks", "benchmarks_carried_over", "ab", "calibration_factor"):
+                if key in metric:
+                    details[name][key] = metric[key]
+
+    timings = score_data["stage_timings"]
+    logger.info(
+        f"Pipeline finished in {timings['total']:.2f}s, "
+        f"critical path: {' -> '.join(timings['critical_path'])}"
+    )
+    return score_data
+
+
+def error_results(error: Exception) -> Tuple[Dict[str, Any], str]:
+    """Score data and markdown report for a run that failed with an exception"""
+    report = f"""## 🚨 PerfGuard AI Error
+
+An error occurred during performance analysis:
+
+```
+{str(error)}
+```
+
+**Action Required**: Manual review needed
+
+---
+
+*Generated by [PerfGuard AI](https://github.com/cloakofenigma/perfguard-ai)*
+"""
+    score_data = {
+        "performance_score": 0,
+        "verdict": "ERROR",
+        "block_merge": True,
+        "error": str(error)
+    }
+    return score_data, report
+
+
+def run_gate(
+    base_ref: str = "HEAD~1",
+    pr_number: str = None,
+    head_sha: str = None,
+    update_impact_index: bool = None,
+    force: bool = False
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Analyze the checkout in the working directory and score it, without exiting
+
+    Shared by the one-shot CLI and `main.py serve` jobs. Per-run options are
+    passed in rather than read from config so that jobs of a long-running
+    daemon do not inherit the daemon's environment.
+
+    Args:
+        base_ref: Git reference the changes are diffed against
+        pr_number: Pull request number, enables incremental analysis
+        head_sha: Commit being analyzed (default: PR_HEAD_SHA or HEAD)
+        update_impact_index: Refresh the test impact index (default config.IMPACT_INDEX_UPDATE)
+        force: Recompute every stage instead of resuming from checkpoints
+
+    Returns:
+        (score data, markdown report)
+    """
+    tracer.reset()
+    try:
+        with span("gate", base_ref=base_ref, pr_number=pr_number) as gate_span:
+            score_data, report = _run_gate(base_ref, pr_number, head_sha, update_impact_index, force)
+            gate_span.set(score=score_data.get("performance_score"), verdict=score_data.get("verdict"))
+            return score_data, report
+    finally:
+        tracer.write()
+
+
+def _run_gate(
+    base_ref: str,
+    pr_number: Optional[str],
+    head_sha: Optional[str],
+    update_impact_index: Optional[bool],
+    force: bool
+) -> Tuple[Dict[str, Any], str]:
+    # Step 1: Get git diff and changed files
+    git_start = time.perf_counter()
+    with span("git.read_diff", base_ref=base_ref) as git_span:
+        git_diff = read_diff(base_ref) or {"diff": "", "files": []}
+        git_span.set(files=len(git_diff["files"]), chars=len(git_diff["diff"]))
+    diff = git_diff["diff"]
+    changed_files = [entry["path"] for entry in git_diff["files"]]
+
+    # On PR pushes, only analyze what changed since the last analyzed commit
+    pr_store = incremental = None
+    if config.INCREMENTAL_ANALYSIS_ENABLED and pr_number and (diff or changed_files):
+        from pr_state import PRStateStore, resolve_head_sha, plan_incremental
+
+        with span("pr.plan_incremental") as plan_span:
+            pr_store = PRStateStore()
+            head_sha = head_sha or resolve_head_sha()
+            incremental = plan_incremental(pr_store, pr_number, head_sha, base_ref)
+            plan_span.set(incremental=bool(incremental))
+    git_end = time.perf_counter()
+
+    if not diff and not changed_files:
+        logger.warning("No changes detected, nothing to analyze")
+        # Create minimal report
+        score_data = {
+            "performance_score": 100,
+            "verdict": "PASS",
+            "block_merge": False,
+            "scores": {},
+            "details": {},
+            "metrics": {},
+            "ai_analysis": {
+                "risk_score": 0,
+                "critical_paths": [],
+                "reasoning": "No changes detected",
+                "suggestions": []
+            }
+        }
+        ai_response = score_data["ai_analysis"]
+    else:
+        # Steps 2-4: AI analysis and metrics collection overlap; scoring waits for both
+        score_data = run_pipeline(
+            diff, changed_files, git_start, git_end, incremental,
+            update_impact_index=update_impact_index, head_sha=head_sha, force=force,
+            base_ref=base_ref
+        )
+        ai_response = score_data["ai_analysis"]
+        groups = ai_response.pop("analysis_groups", None)
+        if groups is None:
+            groups = [{"files": changed_files, "analysis": dict(ai_response)}]
+
+        if pr_store and head_sha and score_data.get("verdict") != "ERROR":
+            pr_store.record(pr_number, head_sha, ai_response, score_data.get("metrics", {}), groups)
+
+    with span("report.generate"):
+        return score_data, generate_markdown_report(score_data, ai_response)
+
+
+def write_results(score_data: Dict[str, Any], report: str):
+    """Save the JSON score and markdown report where the workflow picks them up"""
+    with open(config.RESULTS_PATH, 'w') as f:
+        json.dump(score_data, f, indent=2)
+    logger.info(f"Score saved to {config.RESULTS_PATH}")
+
+    with open(config.REPORT_PATH, 'w') as f:
+        f.write(report)
+    logger.info(f"Report saved to {config.REPORT_PATH}")
+    if config.TRACE_ENABLED:
+        logger.info(f"Trace of this run: {config.TRACE_PATH}")
+
+
 def main():
     """Main execution flow"""
+    parser = argparse.ArgumentParser(description="PerfGuard AI performance gate")
+    subcommands = parser.add_subparsers(dest="command")
+    run_parser = subcommands.add_parser("run", help="Analyze the current checkout once (default)")
+    run_parser.add_argument("--base", default="HEAD~1", help="Git reference to diff against")
+    run_parser.add_argument("--force", action="store_true", help="Recompute every stage, ignoring checkpoints")
+    range_parser = subcommands.add_parser("range", help="Benchmark every commit of A..B (see range_runner.py)")
+    range_parser.add_argument("revisions", help="Commit range, e.g. v1.2.0..main")
+    range_parser.add_argument("--workers", type=int, default=config.RANGE_WORKERS, help="Parallel worktrees")
+    range_parser.add_argument("--force", action="store_true", help="Re-measure commits that already have results")
+    range_parser.add_argument("--remove-worktrees", action="store_true", help="Delete the worktrees when done")
+    subcommands.add_parser(
+        "baseline", help="Re-measure the perf suite and replace the stored baselines, with this runner's calibration"
+    )
+    serve_parser = subcommands.add_parser("serve", help="Run the warm analysis daemon (see server.py)")
+    serve_parser.add_argument("--socket", default=config.DAEMON_SOCKET_PATH, help="Unix socket to listen on")
+    serve_parser.add_argument("--port", type=int, help="Listen on localhost HTTP instead of the socket")
+    serve_parser.add_argument("--queue-size", type=int, default=config.DAEMON_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "range":
+        from range_runner import run_range
+        try:
+            summary = run_range(args.revisions, args.workers, args.force, args.remove_worktrees)
+        except (ValueError, RuntimeError) as e:
+            logger.error(str(e))
+            sys.exit(1)
+        except KeyboardInterrupt:
+            sys.exit(130)
+        sys.exit(1 if summary["failed"] else 0)
+
+    if args.command == "baseline":
+        from metrics_collector import MetricsCollector
+        measured = MetricsCollector().record_baselines()
+        failed = [name for name, metrics in measured.items() if metrics.get("failed")]
+        if failed:
+            logger.error(f"Could not measure {', '.join(failed)}, kept the previous baseline(s)")
+        sys.exit(1 if failed else 0)
+
+    if args.command == "serve":
+        from server import serve
+        serve(socket_path=args.socket, port=args.port, queue_size=args.queue_size)
+        return
+
     try:
         logger.info("=" * 60)
         logger.info("PerfGuard AI - Performance Analysis Starting")
@@ -229,58 +777,15 @@ def main():
             logger.error(f"Configuration error: {e}")
             sys.exit(1)
 
-        # Step 1: Get git diff and changed files
-        diff = get_git_diff()
-        changed_files = get_changed_files()
-
-        if not diff and not changed_files:
-            logger.warning("No changes detected, nothing to analyze")
-            # Create minimal report
-            score_data = {
-                "performance_score": 100,
-                "verdict": "PASS",
-                "block_merge": False,
-                "scores": {},
-                "details": {},
-                "metrics": {},
-                "ai_analysis": {
-                    "risk_score": 0,
-                    "critical_paths": [],
-                    "reasoning": "No changes detected",
-                    "suggestions": []
-                }
-            }
-            ai_response = score_data["ai_analysis"]
-        else:
-            # Step 2: AI Analysis
-            logger.info("Step 1/3: Running AI analysis...")
-            analyzer = AIAnalyzer()
-            ai_response = analyzer.analyze_diff(diff, changed_files)
-
-            # Step 3: Collect performance metrics
-            logger.info("Step 2/3: Collecting performance metrics...")
-            metrics = collect_metrics(
-                suggested_benchmarks=ai_response.get("suggested_benchmarks", []),
-                changed_files=changed_files
-            )
-
-            # Step 4: Calculate final score
-            logger.info("Step 3/3: Calculating performance score...")
-            score_data = calculate_score(metrics, ai_response)
+        score_data, report = run_gate(
+            base_ref=getattr(args, "base", "HEAD~1"),
+            pr_number=config.PR_NUMBER,
+            force=getattr(args, "force", False)
+        )
 
         # Step 5: Save results
         logger.info("Saving results...")
-
-        # Save JSON score
-        with open(config.RESULTS_PATH, 'w') as f:
-            json.dump(score_data, f, indent=2)
-        logger.info(f"Score saved to {config.RESULTS_PATH}")
-
-        # Generate and save markdown report
-        report = generate_markdown_report(score_data, ai_response)
-        with open(config.REPORT_PATH, 'w') as f:
-            f.write(report)
-        logger.info(f"Report saved to {config.REPORT_PATH}")
+        write_results(score_data, report)
 
         # Step 6: Print summary
         logger.info("=" * 60)
@@ -304,33 +809,8 @@ def main():
         logger.error(f"Fatal error in main execution: {e}", exc_info=True)
 
         # Create error report
-        error_report = f"""## 🚨 PerfGuard AI Error
-
-An error occurred during performance analysis:
-
-```
-{str(e)}
-```
-
-**Action Required**: Manual review needed
-
----
-
-*Generated by [PerfGuard AI](https://github.com/cloakofenigma/perfguard-ai)*
-"""
-
         try:
-            with open(config.REPORT_PATH, 'w') as f:
-                f.write(error_report)
-
-            error_score = {
-                "performance_score": 0,
-                "verdict": "ERROR",
-                "block_merge": True,
-                "error": str(e)
-            }
-            with open(config.RESULTS_PATH, 'w') as f:
-                json.dump(error_score, f, indent=2)
+            write_results(*error_results(e))
         except:
             pass
 
@@ -2,36 +2,92 @@
 PerfGuard AI Metrics Collector
 Collects real performance metrics using pytest-benchmark, memory-profiler, etc.
 """
-import pytest
 import subprocess
 import json
 import time
-import psutil
 import os
 import sys
-from typing import Dict, Any, List
+import hashlib
+from typing import Dict, Any, Callable, List, Optional
 from pathlib import Path
-from radon.complexity import cc_visit
-from radon.raw import analyze
-from memory_profiler import memory_usage
 from config import config
 from logger import get_logger
 from storage import BaselineStorage
+from tracing import span
+from checkpoint import CheckpointStore
+from calibration import get_calibration, normalize_baseline
+from perf_suite import test_environment
 
 logger = get_logger(__name__)
 
+# Cyclomatic complexity by file content hash, kept for the life of the process
+_complexity_cache: Dict[str, int] = {}
+
 
 class MetricsCollector:
     """Collects various performance metrics"""
 
-    def __init__(self):
+    def __init__(self, checkpoints: CheckpointStore = None):
         self.storage = BaselineStorage(config.BASELINE_STORAGE_PATH)
-
-    def collect_execution_time(self, test_path: str = None) -> Dict[str, float]:
+        self.checkpoints = checkpoints
+        self.calibration: Dict[str, float] = None
+        self.calibration_factors: Dict[str, float] = {}
+
+    def _measure(self, name: str, collect: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one collector, or load its result from an interrupted run of the same commit"""
+        if self.checkpoints is None:
+            return collect()
+        return self.checkpoints.resume(f"metrics.{name}", collect)
+
+    def _calibrate(self):
+        """Measure (or load today's) machine speed vector, attached to baselines saved by this run"""
+        try:
+            with span("calibration", "metrics"):
+                self.calibration = get_calibration()["vector"]
+        except Exception as e:
+            logger.warning(f"Machine calibration unavailable, comparing raw metrics: {e}")
+
+    def _stored_baseline(self, name: str) -> Optional[Dict[str, Any]]:
+        """Stored baseline of a metric, or None if it was measured with another collection method"""
+        baseline = self.storage.get_baseline(name)
+        expected = config.METRIC_METHOD_VERSIONS.get(name, 1)
+        if baseline and baseline.get("method_version", 1) != expected:
+            logger.warning(
+                f"Baseline for {name} was measured with method v{baseline.get('method_version', 1)}, "
+                f"current is v{expected}: re-establishing it"
+            )
+            return None
+        return baseline
+
+    def _baseline(self, name: str) -> Optional[Dict[str, Any]]:
+        """Stored baseline of a metric, rescaled to this machine's speed when both were calibrated"""
+        baseline = self._stored_baseline(name)
+        if not baseline or not self.calibration:
+            return baseline
+        normalized = normalize_baseline(name, baseline, self.calibration)
+        if "calibration_factor" in normalized:
+            self.calibration_factors[name] = normalized["calibration_factor"]
+        return normalized
+
+    def _save_baseline(self, name: str, metrics: Dict[str, Any]):
+        """Store a baseline with its collection method version and the speed vector of the machine that measured it"""
+        if metrics.get("failed"):
+            logger.warning(f"Collecting {name} failed, not storing it as the baseline")
+            return
+        metrics = {**metrics, "method_version": config.METRIC_METHOD_VERSIONS.get(name, 1)}
+        if self.calibration:
+            metrics["calibration"] = self.calibration
+        self.storage.save_baseline(name, metrics)
+
+    def collect_execution_time(self, test_path: str = None, node_ids: List[str] = None) -> Dict[str, Any]:
         """
         Collect execution time metrics using pytest-benchmark
 
-        Returns dict with current execution time
+        Args:
+            test_path: Optional specific test path
+            node_ids: Optional pytest node IDs to run instead of the whole suite
+
+        Returns dict with current execution time and per-benchmark means
         """
         logger.info("Collecting execution time metrics...")
 
@@ -45,40 +101,58 @@ class MetricsCollector:
                 "-v"
             ]
 
-            if test_path:
+            if node_ids:
+                cmd.extend(node_ids)
+            elif test_path:
                 cmd.append(test_path)
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            # A run that fails before writing results must not report the previous run's
+            Path("benchmark_results.json").unlink(missing_ok=True)
+
+            with span("pytest.benchmark", "metrics", tests=len(node_ids) if node_ids else "all") as run_span:
+                result = subprocess.run(
+                    cmd,
+                    env=test_environment(),
+                    capture_output=True,
+                    text=True,
+                    timeout=300
+                )
+                run_span.set(returncode=result.returncode)
 
             # Parse benchmark results
             if Path("benchmark_results.json").exists():
+                # pytest-benchmark leaves the file empty when no selected test is a benchmark
                 with open("benchmark_results.json", 'r') as f:
-                    data = json.load(f)
+                    data = json.loads(f.read() or "{}")
+
+                # Generated benchmarks come and go with the PR's changes, so they
+                # are reported separately and kept out of the suite mean
+                benchmarks, generated = {}, {}
+                for b in data.get("benchmarks", []):
+                    parts = Path(b["fullname"].partition("::")[0]).parts
+                    target = generated if config.GENERATED_TESTS_DIR in parts else benchmarks
+                    target[b["fullname"]] = b["stats"]["mean"]
+                if generated:
+                    logger.info(f"{len(generated)} generated benchmark(s) reported outside the suite mean")
 
-                benchmarks = data.get("benchmarks", [])
                 if benchmarks:
                     # Use P95 (95th percentile) or mean
-                    total_mean = sum(b["stats"]["mean"] for b in benchmarks) / len(benchmarks)
+                    total_mean = sum(benchmarks.values()) / len(benchmarks)
                     logger.info(f"Execution time (mean): {total_mean:.4f}s")
-                    return {"current": total_mean}
+                    return {"current": total_mean, "benchmarks": benchmarks, "generated_benchmarks": generated}
                 else:
                     logger.warning("No benchmarks found")
-                    return {"current": 0.0}
+                    return {"current": 0.0, "generated_benchmarks": generated}
             else:
                 logger.warning("No benchmark results file found")
-                return {"current": 0.0}
+                return {"current": 0.0, "failed": True}
 
         except subprocess.TimeoutExpired:
             logger.error("Benchmark execution timed out")
-            return {"current": float('inf')}
+            return {"current": float('inf'), "failed": True}
         except Exception as e:
             logger.error(f"Error collecting execution time: {e}")
-            return {"current": 0.0}
+            return {"current": 0.0, "failed": True}
 
     def collect_memory_usage(self, test_path: str = None) -> Dict[str, float]:
         """
@@ -89,26 +163,31 @@ class MetricsCollector:
         logger.info("Collecting memory usage metrics...")
 
         try:
-            def run_tests():
-                """Run tests and measure memory"""
-                cmd = [
-                    "pytest",
-                    "-m", config.PYTEST_MARKERS,
-                    "-v",
-                    "--tb=short"
-                ]
-                if test_path:
-                    cmd.append(test_path)
-
-                subprocess.run(cmd, capture_output=True, timeout=300)
-
-            # Measure memory usage
+            from memory_profiler import memory_usage
+
+            cmd = [
+                "pytest",
+                "-m", config.PYTEST_MARKERS,
+                "--benchmark-disable",
+                "-v",
+                "--tb=short"
+            ]
+            if test_path:
+                cmd.append(test_path)
+
+            # Measure the test process itself, not this orchestrator (which may be
+            # running the AI analysis concurrently)
+            proc = subprocess.Popen(
+                cmd, env=test_environment(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
             mem_usage = memory_usage(
-                (run_tests, ),
+                proc,
                 interval=0.1,
                 timeout=300,
+                include_children=True,
                 max_usage=True
             )
+            proc.wait(timeout=10)
 
             # Get peak memory
             if isinstance(mem_usage, list):
@@ -121,7 +200,7 @@ class MetricsCollector:
 
         except Exception as e:
             logger.error(f"Error collecting memory usage: {e}")
-            return {"current": 0.0}
+            return {"current": 0.0, "failed": True}
 
     def collect_cpu_utilization(self, test_path: str = None) -> Dict[str, float]:
         """
@@ -132,14 +211,15 @@ class MetricsCollector:
         logger.info("Collecting CPU utilization metrics...")
 
         try:
-            # Start monitoring
+            import psutil
+
             cpu_samples = []
-            process = psutil.Process()
 
             # Start test in subprocess
             cmd = [
                 "pytest",
                 "-m", config.PYTEST_MARKERS,
+                "--benchmark-disable",
                 "-v",
                 "--tb=short"
             ]
@@ -148,9 +228,12 @@ class MetricsCollector:
 
             proc = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                env=test_environment(),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
             )
+            # Monitor the test process, not this orchestrator
+            process = psutil.Process(proc.pid)
 
             # Monitor CPU while test runs
             start_time = time.time()
@@ -175,7 +258,7 @@ class MetricsCollector:
 
         except Exception as e:
             logger.error(f"Error collecting CPU utilization: {e}")
-            return {"current": 0.0}
+            return {"current": 0.0, "failed": True}
 
     def collect_io_latency(self, test_path: str = None) -> Dict[str, float]:
         """
@@ -186,38 +269,40 @@ class MetricsCollector:
         logger.info("Collecting I/O latency metrics...")
 
         try:
-            # Measure I/O operations during test execution
-            process = psutil.Process()
-
-            # Get initial I/O counters
-            io_start = process.io_counters()
-            start_time = time.time()
+            import psutil
 
             # Run tests
             cmd = [
                 "pytest",
                 "-m", config.PYTEST_MARKERS,
+                "--benchmark-disable",
                 "-v",
                 "--tb=short"
             ]
             if test_path:
                 cmd.append(test_path)
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                timeout=300
+            start_time = time.time()
+            proc = subprocess.Popen(
+                cmd, env=test_environment(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
+            process = psutil.Process(proc.pid)
+
+            # Sample the test process's own counters until it exits; the last
+            # sample approximates its total I/O (this orchestrator's I/O is excluded)
+            io_end = None
+            while proc.poll() is None and (time.time() - start_time) < 300:
+                try:
+                    io_end = process.io_counters()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    break
+                time.sleep(0.05)
 
-            # Get final I/O counters
+            proc.wait(timeout=10)
             end_time = time.time()
-            io_end = process.io_counters()
 
             # Calculate I/O metrics
-            total_io_ops = (
-                (io_end.read_count - io_start.read_count) +
-                (io_end.write_count - io_start.write_count)
-            )
+            total_io_ops = (io_end.read_count + io_end.write_count) if io_end else 0
 
             elapsed_time = end_time - start_time
 
@@ -231,7 +316,7 @@ class MetricsCollector:
 
         except Exception as e:
             logger.error(f"Error collecting I/O latency: {e}")
-            return {"current": 0.0}
+            return {"current": 0.0, "failed": True}
 
     def collect_code_complexity(self, file_paths: List[str]) -> Dict[str, Any]:
         """
@@ -248,6 +333,8 @@ class MetricsCollector:
         file_complexities = {}
 
         try:
+            from radon.complexity import cc_visit
+
             for file_path in file_paths:
                 if not file_path.endswith('.py'):
                     continue
@@ -259,10 +346,12 @@ class MetricsCollector:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     code = f.read()
 
-                # Calculate cyclomatic complexity
+                # Calculate cyclomatic complexity (once per distinct file content)
                 try:
-                    results = cc_visit(code)
-                    file_total = sum(item.complexity for item in results)
+                    key = hashlib.sha1(code.encode("utf-8")).hexdigest()
+                    if key not in _complexity_cache:
+                        _complexity_cache[key] = sum(item.complexity for item in cc_visit(code))
+                    file_total = _complexity_cache[key]
                     file_complexities[file_path] = file_total
                     total_complexity += file_total
                 except Exception as e:
@@ -276,51 +365,122 @@ class MetricsCollector:
 
         except Exception as e:
             logger.error(f"Error collecting code complexity: {e}")
-            return {"current": 0, "files": {}}
+            return {"current": 0, "files": {}, "failed": True}
 
-    def collect_all_metrics(
+    def _has_selection_baselines(self) -> bool:
+        """Whether the stored execution time baseline is detailed enough to carry unselected benchmarks over"""
+        exec_baseline = self._stored_baseline("execution_time")
+        return bool(exec_baseline and exec_baseline.get("benchmarks"))
+
+    def _merge_selected_benchmarks(
         self,
-        test_path: str = None,
-        changed_files: List[str] = None
+        exec_time: Dict[str, Any],
+        exec_baseline: Dict[str, Any],
+        prior_benchmarks: Dict[str, float] = None,
+        reused_benchmarks: Dict[str, float] = None
     ) -> Dict[str, Any]:
         """
-        Collect all performance metrics
+        Combine a partial benchmark run with the benchmarks that did not run
+
+        Benchmarks whose fingerprint matched a stored result use that result.
+        Other unselected benchmarks keep their value from the previous run of the
+        same PR when known, otherwise their baseline means, so the aggregate still
+        covers the whole suite and only the selected benchmarks can move it.
+        """
+        baseline_benchmarks = exec_baseline["benchmarks"]
+        fresh = exec_time.get("benchmarks", {})
+        prior_benchmarks = prior_benchmarks or {}
+        reused_benchmarks = reused_benchmarks or {}
+
+        merged = {
+            name: fresh.get(name, reused_benchmarks.get(name, prior_benchmarks.get(name, mean)))
+            for name, mean in baseline_benchmarks.items()
+        }
+        new_benchmarks = [name for name in fresh if name not in baseline_benchmarks]
+        if new_benchmarks:
+            logger.info(f"No baseline for {len(new_benchmarks)} new benchmark(s), not scored: {new_benchmarks}")
+
+        baseline = sum(baseline_benchmarks.values()) / len(baseline_benchmarks)
+        if exec_time["current"] == float('inf'):
+            current = float('inf')
+        else:
+            current = sum(merged.values()) / len(merged)
+
+        ran = len([name for name in fresh if name in baseline_benchmarks])
+        reused = sorted(name for name in reused_benchmarks if name in baseline_benchmarks and name not in fresh)
+        carried = len(merged) - ran - len(reused)
+        logger.info(f"Ran {ran} selected benchmark(s), reused {len(reused)}, carried over {carried}")
+        return {
+            "current": current,
+            "baseline": baseline,
+            "change_percent": (current - baseline) / baseline * 100 if baseline > 0 else 0,
+            "benchmarks": merged,
+            "benchmarks_run": ran,
+            "benchmarks_reused": len(reused),
+            "reused_benchmarks": reused,
+            "benchmarks_carried_over": carried
+        }
+
+    def record_baselines(self, test_path: str = None) -> Dict[str, Any]:
+        """
+        Measure the whole suite and replace the stored suite baselines
+
+        Baselines are otherwise only written when missing, so this is how existing
+        ones pick up this runner's speed vector (and the current collection method).
+        Collectors that fail keep their previous baseline.
 
         Args:
             test_path: Optional specific test path
-            changed_files: List of changed files for complexity analysis
 
         Returns:
-            Dictionary with all metrics and baseline comparisons
+            Dictionary of metric name -> measured values
         """
-        logger.info("=== Starting metrics collection ===")
+        if config.CALIBRATION_ENABLED:
+            self._calibrate()
+
+        measured = {
+            "execution_time": self.collect_execution_time(test_path),
+            "memory_rss": self.collect_memory_usage(test_path),
+            "cpu_utilization": self.collect_cpu_utilization(test_path),
+            "io_latency": self.collect_io_latency(test_path),
+        }
+        for name, metrics in measured.items():
+            self._save_baseline(name, metrics)
+
+        if config.PROFILE_ON_REGRESSION and not measured["execution_time"].get("failed"):
+            from profiler import capture_baseline_profiles
+
+            capture_baseline_profiles(
+                self.storage, list(measured["execution_time"].get("benchmarks", {})), self.calibration
+            )
+        return measured
 
-        metrics = {}
+    def collect_suite_metrics(self, test_path: str = None) -> Dict[str, Any]:
+        """
+        Memory, CPU and I/O, compared with their baselines
 
-        # 1. Execution Time
-        exec_time = self.collect_execution_time(test_path)
-        exec_baseline = self.storage.get_baseline("execution_time")
-        if exec_baseline:
-            metrics["execution_time"] = {
-                "current": exec_time["current"],
-                "baseline": exec_baseline["current"],
-                "change_percent": (
-                    (exec_time["current"] - exec_baseline["current"]) / exec_baseline["current"] * 100
-                    if exec_baseline["current"] > 0 else 0
-                )
-            }
-        else:
-            # First run - establish baseline
-            self.storage.save_baseline("execution_time", exec_time)
-            metrics["execution_time"] = {
-                "current": exec_time["current"],
-                "baseline": exec_time["current"],
-                "change_percent": 0.0
-            }
+        Suite-level: always measured over the whole suite (one pass per test,
+        benchmarking disabled), also when only selected benchmarks run, so they
+        need nothing from the analysis and can run while it is pending.
+
+        Args:
+            test_path: Optional specific test path
+
+        Returns:
+            Dictionary of metric name -> comparison with the baseline
+        """
+        if config.CALIBRATION_ENABLED and self.calibration is None:
+            self._calibrate()
+
+        metrics = {}
+        failed = []
 
         # 2. Memory Usage
-        memory = self.collect_memory_usage(test_path)
-        mem_baseline = self.storage.get_baseline("memory_rss")
+        with span("pytest.memory", "metrics"):
+            memory = self._measure("memory_rss", lambda: self.collect_memory_usage(test_path))
+        if memory.get("failed"):
+            failed.append("memory_rss")
+        mem_baseline = self._baseline("memory_rss")
         if mem_baseline:
             metrics["memory_rss"] = {
                 "current": memory["current"],
@@ -331,7 +491,7 @@ class MetricsCollector:
                 )
             }
         else:
-            self.storage.save_baseline("memory_rss", memory)
+            self._save_baseline("memory_rss", memory)
             metrics["memory_rss"] = {
                 "current": memory["current"],
                 "baseline": memory["current"],
@@ -339,8 +499,11 @@ class MetricsCollector:
             }
 
         # 3. CPU Utilization
-        cpu = self.collect_cpu_utilization(test_path)
-        cpu_baseline = self.storage.get_baseline("cpu_utilization")
+        with span("pytest.cpu", "metrics"):
+            cpu = self._measure("cpu_utilization", lambda: self.collect_cpu_utilization(test_path))
+        if cpu.get("failed"):
+            failed.append("cpu_utilization")
+        cpu_baseline = self._baseline("cpu_utilization")
         if cpu_baseline:
             metrics["cpu_utilization"] = {
                 "current": cpu["current"],
@@ -351,7 +514,7 @@ class MetricsCollector:
                 )
             }
         else:
-            self.storage.save_baseline("cpu_utilization", cpu)
+            self._save_baseline("cpu_utilization", cpu)
             metrics["cpu_utilization"] = {
                 "current": cpu["current"],
                 "baseline": cpu["current"],
@@ -359,8 +522,11 @@ class MetricsCollector:
             }
 
         # 4. I/O Latency
-        io_lat = self.collect_io_latency(test_path)
-        io_baseline = self.storage.get_baseline("io_latency")
+        with span("pytest.io", "metrics"):
+            io_lat = self._measure("io_latency", lambda: self.collect_io_latency(test_path))
+        if io_lat.get("failed"):
+            failed.append("io_latency")
+        io_baseline = self._baseline("io_latency")
         if io_baseline:
             metrics["io_latency"] = {
                 "current": io_lat["current"],
@@ -371,17 +537,160 @@ class MetricsCollector:
                 )
             }
         else:
-            self.storage.save_baseline("io_latency", io_lat)
+            self._save_baseline("io_latency", io_lat)
             metrics["io_latency"] = {
                 "current": io_lat["current"],
                 "baseline": io_lat["current"],
                 "change_percent": 0.0
             }
 
+        for name in failed:
+            metrics[name]["failed"] = True
+        for name, factor in self.calibration_factors.items():
+            if name in metrics:
+                metrics[name]["calibration_factor"] = factor
+        return metrics
+
+    def collect_all_metrics(
+        self,
+        test_path: str = None,
+        changed_files: List[str] = None,
+        selected_tests: List[str] = None,
+        prior_metrics: Dict[str, Any] = None,
+        ab_base_ref: str = None,
+        suite_metrics: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Collect all performance metrics
+
+        Args:
+            test_path: Optional specific test path
+            changed_files: List of changed files for complexity analysis
+            selected_tests: Optional pytest node IDs; when set, only these benchmarks
+                run and everything else is reused or carried over (memory, CPU and
+                I/O still cover the whole suite)
+            prior_metrics: Metrics from the previous run of the same PR, carried over
+                in preference to the baselines
+            ab_base_ref: Compare execution time with this ref's merge-base, measured
+                here in interleaved rounds, instead of the stored baseline
+            suite_metrics: Result of collect_suite_metrics when it already ran
+                (in a pipeline stage of its own); measured here otherwise
+
+        Returns:
+            Dictionary with all metrics and baseline comparisons
+        """
+        logger.info("=== Starting metrics collection ===")
+
+        metrics = {}
+
+        # Before the perf tests, so their load does not skew the calibration
+        if config.CALIBRATION_ENABLED:
+            self._calibrate()
+
+        with span("baselines.check_selection", "metrics"):
+            has_selection_baselines = self._has_selection_baselines()
+        if selected_tests is not None and not has_selection_baselines:
+            logger.info("Baselines have no per-benchmark data yet, running the full perf suite")
+            selected_tests = None
+
+        # Tests whose file, import closure and environment match a stored run are not re-run
+        cache = None
+        reused = {}
+        if config.BENCHMARK_REUSE_ENABLED and not ab_base_ref:
+            try:
+                from fingerprint import BenchmarkCache
+
+                cache = BenchmarkCache()
+                if has_selection_baselines:
+                    from test_selector import collect_perf_tests
+
+                    candidates = selected_tests if selected_tests is not None else collect_perf_tests(test_path)
+                    with span("benchmarks.reuse_lookup", "metrics", candidates=len(candidates)) as lookup_span:
+                        matched = cache.lookup(candidates)
+                        lookup_span.set(reused=len(matched))
+                    reused = {name: entry["mean"] for name, entry in matched.items() if entry["mean"] is not None}
+                    if matched:
+                        selected_tests = [name for name in candidates if name not in matched]
+            except Exception as e:
+                logger.warning(f"Benchmark reuse unavailable: {e}")
+                cache = None
+
+        # 1. Execution Time
+        prior_metrics = prior_metrics or {}
+        failed = []
+        ab_time = None
+        if ab_base_ref:
+            from ab_runner import run_ab
+
+            with span("benchmarks.ab", "metrics"):
+                ab_time = self._measure("execution_time_ab", lambda: run_ab(ab_base_ref, selected_tests))
+        if ab_time:
+            # Same-machine comparison with the merge-base replaces the stored baseline
+            metrics["execution_time"] = ab_time
+        else:
+            if selected_tests == []:
+                logger.info("All selected benchmarks reused, skipping the benchmark run")
+                exec_time = {"current": 0.0, "benchmarks": {}}
+            else:
+                def measure_execution_time():
+                    measured = self.collect_execution_time(test_path, selected_tests)
+                    if cache and not measured.get("failed"):
+                        cache.record(
+                            {**measured.get("benchmarks", {}), **measured.get("generated_benchmarks", {})},
+                            selected_tests
+                        )
+                    return measured
+
+                exec_time = self._measure("execution_time", measure_execution_time)
+                if exec_time.get("failed"):
+                    failed.append("execution_time")
+            exec_baseline = self._baseline("execution_time")
+            if selected_tests is not None:
+                metrics["execution_time"] = self._merge_selected_benchmarks(
+                    exec_time,
+                    exec_baseline,
+                    prior_metrics.get("execution_time", {}).get("benchmarks"),
+                    reused
+                )
+            elif exec_baseline:
+                metrics["execution_time"] = {
+                    "current": exec_time["current"],
+                    "baseline": exec_baseline["current"],
+                    "change_percent": (
+                        (exec_time["current"] - exec_baseline["current"]) / exec_baseline["current"] * 100
+                        if exec_baseline["current"] > 0 else 0
+                    ),
+                    "benchmarks": exec_time.get("benchmarks", {})
+                }
+            else:
+                # First run - establish baseline
+                self._save_baseline("execution_time", exec_time)
+                if config.PROFILE_ON_REGRESSION:
+                    from profiler import capture_baseline_profiles
+
+                    # Base side of the profile diff shown when a later run regresses
+                    capture_baseline_profiles(self.storage, list(exec_time.get("benchmarks", {})), self.calibration)
+                metrics["execution_time"] = {
+                    "current": exec_time["current"],
+                    "baseline": exec_time["current"],
+                    "change_percent": 0.0,
+                    "benchmarks": exec_time.get("benchmarks", {})
+                }
+            if exec_time.get("generated_benchmarks"):
+                metrics["execution_time"]["generated_benchmarks"] = exec_time["generated_benchmarks"]
+
+        # 2-4. Memory, CPU and I/O
+        if suite_metrics is None:
+            suite_metrics = self.collect_suite_metrics(test_path)
+        metrics.update(suite_metrics)
+
         # 5. Code Complexity (if files provided)
         if changed_files:
-            complexity = self.collect_code_complexity(changed_files)
-            comp_baseline = self.storage.get_baseline("complexity")
+            with span("radon.complexity", "metrics", files=len(changed_files)):
+                complexity = self._measure("complexity", lambda: self.collect_code_complexity(changed_files))
+            if complexity.get("failed"):
+                failed.append("complexity")
+            comp_baseline = self._baseline("complexity")
             if comp_baseline:
                 metrics["complexity"] = {
                     "current": complexity["current"],
@@ -389,33 +698,101 @@ class MetricsCollector:
                     "delta": complexity["current"] - comp_baseline["current"]
                 }
             else:
-                self.storage.save_baseline("complexity", complexity)
+                self._save_baseline("complexity", complexity)
                 metrics["complexity"] = {
                     "current": complexity["current"],
                     "baseline": complexity["current"],
                     "delta": 0
                 }
 
+        # Marked so checkpoints of the metrics stage are not reused for them either
+        for name in failed:
+            metrics[name]["failed"] = True
+
+        for name, factor in self.calibration_factors.items():
+            if name in metrics:
+                metrics[name]["calibration_factor"] = factor
+
         logger.info("=== Metrics collection complete ===")
         return metrics
 
 
 def collect_metrics(
     suggested_benchmarks: List[str] = None,
-    changed_files: List[str] = None
+    changed_files: List[str] = None,
+    critical_paths: List[str] = None,
+    selection_files: List[str] = None,
+    prior_metrics: Dict[str, Any] = None,
+    diff: str = None,
+    checkpoints: CheckpointStore = None,
+    ab_base_ref: str = None,
+    suite_metrics: Dict[str, Any] = None
 ) -> Dict[str, Any]:
     """
     Convenience function to collect metrics
 
+    With config.BENCHMARK_SELECTION_ENABLED, the suggested benchmarks and critical
+    paths are resolved to pytest node IDs and only those (plus the canaries) run.
+    When a test impact index exists and can map the diff, the perf tests covering
+    the changed lines are run instead of the suggestions.
+
     Args:
-        suggested_benchmarks: List of benchmark names (not used currently)
+        suggested_benchmarks: List of benchmark names suggested by the analysis
         changed_files: List of changed files for complexity
+        critical_paths: Critical paths from the analysis ("file.py" or "file.py::function")
+        selection_files: Files whose perf tests are selected (default: changed_files)
+        prior_metrics: Metrics from the previous run of the same PR to carry over
+        diff: Diff the selection is for, mapped through the impact index
+        checkpoints: Store of the current run; collectors that finished in an
+            interrupted run of the same commit are not run again
+        ab_base_ref: Measure execution time against this ref's merge-base in
+            interleaved rounds instead of comparing with the stored baseline
+        suite_metrics: Output of collect_suite_metrics, when it ran as a stage of its own
 
     Returns:
         Dictionary of collected metrics
     """
-    collector = MetricsCollector()
+    selected_tests = None
+    if config.BENCHMARK_SELECTION_ENABLED and (suggested_benchmarks or critical_paths or changed_files):
+        from test_selector import select_benchmarks
+
+        with span("benchmarks.select", "metrics") as select_span:
+            impacted = None
+            if config.IMPACT_INDEX_ENABLED and diff:
+                from impact_index import ImpactIndex
+                impacted = ImpactIndex().select(diff)
+
+            selection = select_benchmarks(
+                suggested_benchmarks,
+                critical_paths,
+                selection_files if selection_files is not None else changed_files,
+                impacted=impacted
+            )
+            select_span.set(selected=len(selection["selected"]), total=len(selection["all"]))
+        # Selecting everything is just a full run, which also measures memory/CPU/I/O
+        if selection["selected"] and len(selection["selected"]) < len(selection["all"]):
+            selected_tests = selection["selected"]
+
+    collector = MetricsCollector(checkpoints)
     return collector.collect_all_metrics(
         test_path=None,
-        changed_files=changed_files
+        changed_files=changed_files,
+        selected_tests=selected_tests,
+        prior_metrics=prior_metrics,
+        ab_base_ref=ab_base_ref,
+        suite_metrics=suite_metrics
     )
+
+
+def collect_suite_metrics(checkpoints: CheckpointStore = None) -> Dict[str, Any]:
+    """
+    Convenience function to collect memory, CPU and I/O over the whole suite
+
+    Args:
+        checkpoints: Store of the current run; collectors that finished in an
+            interrupted run of the same commit are not run again
+
+    Returns:
+        Dictionary of metric name -> comparison with the baseline
+    """
+    return MetricsCollector(checkpoints).collect_suite_metrics()
@@ -0,0 +1,35 @@
+"""
+PerfGuard AI Perf Suite
+What counts as test code, and the environment the perf suite's pytest subprocesses run in
+"""
+import os
+from typing import Dict
+from pathlib import Path
+from config import config
+
+# PerfGuard's own credentials, never passed to the perf suite: accepted
+# generated tests join it, so any pytest run may execute LLM-written code
+CREDENTIAL_ENV = (
+    "ANTHROPIC_API_KEY", "ANTHROPIC_AUTH_TOKEN", "GOOGLE_API_KEY", "GEMINI_API_KEY",
+    "GH_TOKEN", "GITHUB_TOKEN",
+)
+
+
+def test_environment() -> Dict[str, str]:
+    """
+    Environment for pytest subprocesses: this process's, minus PerfGuard's credentials
+
+    Everything else (DB_PASSWORD and the like) is passed through, as the
+    project's own benchmarks may need it.
+    """
+    return {key: value for key, value in os.environ.items() if key not in CREDENTIAL_ENV}
+
+
+def is_test_path(path: str) -> bool:
+    """Whether a repository path is test code (including generated perf tests)"""
+    parts = Path(path).parts
+    name = Path(path).name
+    return (
+        name.startswith("test_") or name.endswith("_test.py") or name == "conftest.py"
+        or "tests" in parts or config.GENERATED_TESTS_DIR in parts
+    )
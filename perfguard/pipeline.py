@@ -0,0 +1,148 @@
+"""
+PerfGuard AI Pipeline
+Runs analysis stages as a small dependency graph so independent stages overlap
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Callable, Iterable, Optional
+from logger import get_logger
+from tracing import span
+from checkpoint import CheckpointStore
+
+logger = get_logger(__name__)
+
+
+class Pipeline:
+    """
+    Minimal task DAG executed on a thread pool
+
+    Each stage is a callable taking the dict of results computed so far. A stage
+    starts as soon as all of its dependencies have finished, and per-stage start/end
+    offsets are recorded so the critical path can be reported. With a
+    CheckpointStore, stages that completed in an earlier run of the same
+    commit are loaded instead of run.
+    """
+
+    def __init__(self, max_workers: int = 4, origin: float = None, checkpoints: Optional[CheckpointStore] = None):
+        self.max_workers = max_workers
+        self.checkpoints = checkpoints
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.results: Dict[str, Any] = {}
+        # perf_counter timestamp that stage offsets are measured from
+        self._origin = origin if origin is not None else time.perf_counter()
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        checkpoint: bool = True
+    ):
+        """
+        Register a stage; dependencies must be registered before run()
+
+        checkpoint=False always runs the stage, for stages whose effect is outside
+        their return value or that are cheap enough to redo.
+        """
+        self.stages[name] = {"func": func, "depends_on": list(depends_on), "checkpoint": checkpoint}
+
+    def add_result(self, name: str, value: Any, start: float, end: float):
+        """
+        Register a stage that already ran outside the pool (e.g. the git diff)
+
+        Later stages may depend on it; start/end are perf_counter timestamps.
+        """
+        self.stages[name] = {"func": None, "depends_on": [], "checkpoint": False}
+        self.results[name] = value
+        self._record(name, start, end)
+
+    def _record(self, name: str, start: float, end: float):
+        self.timings[name] = {
+            "start": round(start - self._origin, 3),
+            "end": round(end - self._origin, 3),
+            "duration": round(end - start, 3),
+        }
+
+    def _timed(self, name: str, results: Dict[str, Any]) -> Any:
+        stage = self.stages[name]
+        start = time.perf_counter()
+        try:
+            with span(f"stage:{name}", "stage"):
+                if self.checkpoints is not None and stage["checkpoint"]:
+                    return self.checkpoints.resume(name, lambda: stage["func"](results))
+                return stage["func"](results)
+        finally:
+            self._record(name, start, time.perf_counter())
+            logger.info(f"Stage '{name}' finished in {self.timings[name]['duration']:.2f}s")
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Execute all stages, respecting dependencies
+
+        Returns:
+            Dictionary of stage name -> result
+
+        Raises:
+            Exception: The first stage failure (pending stages are cancelled)
+        """
+        for name, stage in self.stages.items():
+            missing = [dep for dep in stage["depends_on"] if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stage(s): {missing}")
+
+        results = self.results
+        remaining = {name: stage for name, stage in self.stages.items() if name not in results}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while remaining or running:
+                ready = [
+                    name for name, stage in remaining.items()
+                    if all(dep in results for dep in stage["depends_on"])
+                ]
+                for name in ready:
+                    del remaining[name]
+                    logger.info(f"Starting stage '{name}'")
+                    # Each stage sees a snapshot of the results it may depend on
+                    running[pool.submit(self._timed, name, dict(results))] = name
+
+                if not running:
+                    raise ValueError(f"Pipeline has a dependency cycle: {list(remaining)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        raise
+
+        return results
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined total wall time, following the latest-finishing dependency"""
+        if not self.timings:
+            return []
+
+        path = []
+        current = max(self.timings, key=lambda name: self.timings[name]["end"])
+        while current:
+            path.append(current)
+            deps = [d for d in self.stages.get(current, {}).get("depends_on", []) if d in self.timings]
+            current = max(deps, key=lambda name: self.timings[name]["end"]) if deps else None
+
+        return list(reversed(path))
+
+    def summary(self) -> Dict[str, Any]:
+        """Timings and critical path, suitable for JSON output"""
+        summary = {
+            "stages": self.timings,
+            "critical_path": self.critical_path(),
+            "total": round(max((t["end"] for t in self.timings.values()), default=0.0), 3),
+        }
+        if self.checkpoints is not None and self.checkpoints.resumed:
+            summary["resumed"] = sorted(self.checkpoints.resumed)
+        return summary
@@ -0,0 +1,223 @@
+"""
+PerfGuard AI Pull Request State
+Remembers the last analyzed commit per PR so later pushes only analyze the interdiff
+"""
+import os
+import json
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+from config import config
+from logger import get_logger
+from git_diff import read_diff
+
+logger = get_logger(__name__)
+
+
+class PRStateStore:
+    """
+    Per-PR analysis state kept in a local JSON file
+
+    Format: {"prs": {"<number>": {"head_sha", "analysis", "groups", "metrics", "updated"}}},
+    where "groups" is [{"files", "analysis"}]: the analyses the whole-PR analysis
+    was merged from, each with the files it covers
+    """
+
+    def __init__(self, state_path: str = None):
+        self.state_path = Path(state_path or config.PR_STATE_PATH)
+        self._state: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f).get("prs", {})
+        except Exception as e:
+            logger.warning(f"Could not load PR state: {e}")
+            return {}
+
+    def _save(self):
+        """Write state atomically so concurrent runs never read a partial file"""
+        try:
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"prs": self._state}, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Could not save PR state: {e}")
+
+    def get(self, pr_number: str) -> Optional[Dict[str, Any]]:
+        """Last recorded state for a PR, or None"""
+        return self._state.get(str(pr_number))
+
+    def record(
+        self,
+        pr_number: str,
+        head_sha: str,
+        analysis: Dict[str, Any],
+        metrics: Dict[str, Any],
+        groups: List[Dict[str, Any]]
+    ):
+        """
+        Store the full-PR analysis and metrics as of head_sha
+
+        Args:
+            pr_number: Pull request number
+            head_sha: Commit the analysis covers
+            analysis: Merged analysis for the whole PR
+            metrics: Metrics of the run, including per-benchmark means
+            groups: Per-file analyses the merged one was built from ([{"files", "analysis"}])
+        """
+        self._state[str(pr_number)] = {
+            "head_sha": head_sha,
+            "analysis": analysis,
+            "groups": groups,
+            "metrics": metrics,
+            "updated": datetime.now().isoformat()
+        }
+
+        if len(self._state) > config.PR_STATE_MAX_ENTRIES:
+            oldest = sorted(self._state, key=lambda pr: self._state[pr]["updated"])
+            for pr in oldest[:len(self._state) - config.PR_STATE_MAX_ENTRIES]:
+                del self._state[pr]
+
+        self._save()
+        logger.info(f"Recorded analysis of PR #{pr_number} at {head_sha[:12]}")
+
+
+def _git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", *args],
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        timeout=30
+    )
+
+
+def resolve_head_sha() -> Optional[str]:
+    """Commit being analyzed: the PR head when known, else HEAD"""
+    if config.PR_HEAD_SHA:
+        return config.PR_HEAD_SHA
+    result = _git("rev-parse", "HEAD")
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _changed_lines(entry: Dict[str, Any]) -> List[str]:
+    """Added and removed lines of a file's diff, without hunk positions"""
+    return [
+        line for hunk in entry["hunks"] for line in hunk.splitlines()
+        if line[:1] in "+-"
+    ]
+
+
+def _merge_base(base_ref: str, sha: str) -> Optional[str]:
+    result = _git("merge-base", base_ref, sha)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def get_interdiff(since_sha: str, head_sha: str, base_ref: str) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+    """
+    Files whose part of the PR changed between two pushes of the same PR
+
+    Compares the PR's own diffs (from its merge base with base_ref) at both
+    commits, so changes merged in from the base branch are not attributed to
+    the PR, and a file whose changes were reverted counts as changed too.
+
+    Returns:
+        (changed paths, {path: read_diff file entry} of the PR diff at head_sha),
+        or None when a full analysis is needed: since_sha is unknown or not an
+        ancestor of head_sha (a force-push), or the base branch was merged in
+    """
+    if _git("merge-base", "--is-ancestor", since_sha, head_sha).returncode != 0:
+        logger.info(f"{since_sha[:12]} is not an ancestor of {head_sha[:12]}, analyzing the full PR")
+        return None
+
+    merges = _git("rev-list", "--merges", f"{since_sha}..{head_sha}")
+    if merges.returncode != 0 or merges.stdout.strip():
+        logger.info(f"Merge commit since {since_sha[:12]}, analyzing the full PR")
+        return None
+    if _merge_base(base_ref, since_sha) != _merge_base(base_ref, head_sha):
+        logger.info(f"Merge base with {base_ref} moved since {since_sha[:12]}, analyzing the full PR")
+        return None
+
+    prior_pr = read_diff(base_ref, since_sha)
+    current_pr = read_diff(base_ref, head_sha)
+    if prior_pr is None or current_pr is None:
+        logger.warning(f"Could not diff {since_sha[:12]}..{head_sha[:12]}, analyzing the full PR")
+        return None
+
+    prior_files = {entry["path"]: entry for entry in prior_pr["files"]}
+    current_files = {entry["path"]: entry for entry in current_pr["files"]}
+    changed = [
+        path for path in sorted(set(prior_files) | set(current_files))
+        if path not in prior_files or path not in current_files
+        or _changed_lines(current_files[path]) != _changed_lines(prior_files[path])
+    ]
+    return changed, current_files
+
+
+def plan_incremental(
+    store: PRStateStore,
+    pr_number: str,
+    head_sha: str,
+    base_ref: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether this run can build on the previous analysis of the PR
+
+    The stored analysis is kept per group of files analyzed together. Groups
+    with a file whose part of the PR changed are analyzed again, over their
+    files' full PR diff, and replace the old entries; the other groups keep
+    their analysis. Files the push reverted drop out, so the risk can go down.
+
+    Args:
+        store: Per-PR state
+        pr_number: Pull request number
+        head_sha: Commit being analyzed
+        base_ref: Branch the PR targets
+
+    Returns:
+        None for a full analysis, otherwise a dict with the prior state,
+        "unchanged" (nothing changed since the last analysis), the groups kept
+        as they are ("kept") and the PR diff of the files to analyze again
+        ("diff", "changed_files")
+    """
+    prior = store.get(pr_number)
+    if not prior or not head_sha or prior.get("groups") is None:
+        return None
+
+    if prior["head_sha"] == head_sha:
+        logger.info(f"PR #{pr_number} already analyzed at {head_sha[:12]}, reusing the cached analysis")
+        return {
+            "prior": prior, "since": head_sha, "unchanged": True,
+            "kept": prior["groups"], "diff": "", "changed_files": []
+        }
+
+    interdiff = get_interdiff(prior["head_sha"], head_sha, base_ref)
+    if interdiff is None:
+        return None
+
+    changed, current_files = interdiff
+    affected = set(changed)
+    kept = []
+    for group in prior["groups"]:
+        if affected & set(group["files"]):
+            affected.update(group["files"])
+        else:
+            kept.append(group)
+    entries = [entry for path, entry in current_files.items() if path in affected]
+    diff = "".join(entry["header"] + "".join(entry["hunks"]) for entry in entries)
+    changed_files = [entry["path"] for entry in entries]
+
+    logger.info(
+        f"Incremental analysis of PR #{pr_number}: {len(changed)} file(s) changed since "
+        f"{prior['head_sha'][:12]}, re-analyzing {len(changed_files)}, keeping {len(kept)} analysis group(s)"
+    )
+    return {
+        "prior": prior, "since": prior["head_sha"], "unchanged": not changed,
+        "kept": kept, "diff": diff, "changed_files": changed_files
+    }
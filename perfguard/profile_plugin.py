@@ -0,0 +1,123 @@
+"""
+PerfGuard AI Profiling Plugin
+pytest plugin profiling each test's call phase with cProfile
+
+Loaded with `-p profile_plugin` by profiler.py; writes per-test function
+statistics to the JSON file named by PERFGUARD_PROFILE_OUTPUT when the
+session ends. Collection, fixtures and teardown are not profiled, and each
+test runs once unprofiled first, so lazy imports and first-call caches do not
+depend on which tests happened to run before it.
+"""
+import os
+import re
+import sys
+import json
+import pstats
+import cProfile
+from typing import Dict, List
+from pathlib import Path
+
+import pytest
+
+OUTPUT_ENV = "PERFGUARD_PROFILE_OUTPUT"
+_ADDRESS = re.compile(r" at 0x[0-9a-f]+")
+
+
+class FunctionNames:
+    """
+    Stable names for profiled functions: "path:function"
+
+    Repository files are named relative to the root, so a checkout in another
+    directory (a worktree of the base commit) yields the same names. Other
+    files (the standard library, installed packages, a virtualenv inside the
+    checkout) are named relative to their sys.path entry, so profiles from
+    runners with Python installed elsewhere match too. Line numbers are left
+    out because edits above a function shift them.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self._prefixes = {Path(prefix).resolve() for prefix in
+                          (sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix)}
+        # Longest first, so a file resolves against its innermost entry (site-packages, not lib/)
+        entries = {Path(entry or os.getcwd()).resolve() for entry in sys.path}
+        self._entries = sorted(entries, key=lambda entry: len(entry.parts), reverse=True)
+        self._paths: Dict[str, str] = {}
+
+    def _path(self, filename: str) -> str:
+        if filename not in self._paths:
+            path = filename
+            try:
+                resolved = Path(filename).resolve()
+                installed = any(resolved.is_relative_to(prefix) for prefix in self._prefixes)
+                if resolved.is_relative_to(self.root) and not installed:
+                    path = resolved.relative_to(self.root).as_posix()
+                else:
+                    entry = next((entry for entry in self._entries if resolved.is_relative_to(entry)), None)
+                    if entry is not None:
+                        path = resolved.relative_to(entry).as_posix()
+            except (ValueError, OSError):
+                pass
+            self._paths[filename] = path
+        return self._paths[filename]
+
+    def __call__(self, filename: str, function: str) -> str:
+        if filename == "~":  # Built-in functions, some named with an address that differs per process
+            return _ADDRESS.sub("", function)
+        return f"{self._path(filename)}:{function}"
+
+
+def function_stats(profile: cProfile.Profile, names: FunctionNames) -> Dict[str, List[float]]:
+    """
+    Flatten a profile to {name: [calls, self seconds, cumulative seconds]}
+
+    Functions sharing a name (same file, same function name) are summed.
+    """
+    functions: Dict[str, List[float]] = {}
+    for (filename, _, function), (_, calls, self_time, cumulative, _) in pstats.Stats(profile).stats.items():
+        entry = functions.setdefault(names(filename, function), [0, 0.0, 0.0])
+        entry[0] += calls
+        entry[1] += self_time
+        entry[2] += cumulative
+    return functions
+
+
+class ProfilePlugin:
+    """Runs each test's call phase under its own profiler"""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.names = FunctionNames(os.getcwd())
+        self.tests: Dict[str, Dict[str, List[float]]] = {}
+
+    @staticmethod
+    def _warm_up(item):
+        try:
+            item.runtest()
+        except Exception:
+            pass  # Reported by the profiled call
+        benchmark = getattr(item, "funcargs", {}).get("benchmark")
+        if benchmark is not None:
+            # pytest-benchmark's fixture refuses a second call once it has been used
+            benchmark._mode = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        self._warm_up(item)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.tests[item.nodeid] = function_stats(profile, self.names)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        with open(self.output_path, 'w') as f:
+            json.dump({"python": sys.version.split()[0], "tests": self.tests}, f)
+
+
+def pytest_configure(config):
+    output_path = os.environ.get(OUTPUT_ENV)
+    if output_path:
+        config.pluginmanager.register(ProfilePlugin(output_path), "perfguard-profile")
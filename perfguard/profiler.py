@@ -0,0 +1,324 @@
+"""
+PerfGuard AI Regression Profiler
+Re-runs regressed benchmarks under cProfile and diffs their function-level self and cumulative time against the base
+
+Runs only when a timing metric scores below config.PROFILE_SCORE_THRESHOLD,
+on the benchmarks that regressed most. The base side is the profile stored
+with the baseline when it was established (rescaled by the machine
+calibration when it was recorded on another runner), or else a fresh profile
+of the merge-base in a worktree. A/B runs always use the merge-base, as their
+timings do.
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+from storage import BaselineStorage
+from perf_suite import test_environment
+
+logger = get_logger(__name__)
+
+PLUGIN_DIR = str(Path(__file__).resolve().parent)
+OUTPUT_ENV = "PERFGUARD_PROFILE_OUTPUT"  # Read by profile_plugin.py
+
+
+def _profile_pass(cwd: str, node_ids: List[str]) -> Dict[str, Dict[str, List[float]]]:
+    """One run of the tests under profile_plugin: {node_id: {function: [calls, self, cumulative]}}"""
+    # Like an A/B round, the base may lack some of the tests: run the files that
+    # exist there, narrowed to the test names
+    targets = sorted({node_id.partition("::")[0] for node_id in node_ids})
+    targets = [path for path in targets if (Path(cwd) / path).exists()]
+    names = sorted({node_id.split("::")[-1].partition("[")[0] for node_id in node_ids})
+    if not targets:
+        return {}
+
+    fd, output_path = tempfile.mkstemp(prefix="perfguard-profile-", suffix=".json")
+    os.close(fd)
+    env = test_environment()
+    env[OUTPUT_ENV] = output_path
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PLUGIN_DIR, env.get("PYTHONPATH")]))
+    # Benchmarks run their function once: the call counts are the code's own, not the timer's calibration
+    cmd = [
+        sys.executable, "-m", "pytest", "-m", config.PYTEST_MARKERS,
+        "-p", "profile_plugin", "-p", "no:cacheprovider", "--benchmark-disable", "-q",
+        "-k", " or ".join(names)
+    ] + targets
+
+    try:
+        result = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True, timeout=config.PROFILE_TIMEOUT)
+        with open(output_path, 'r') as f:
+            tests = json.loads(f.read() or "{}").get("tests", {})
+        if result.returncode not in (0, 1):
+            logger.warning(f"Profiling run exited with {result.returncode}: {result.stdout[-500:]}")
+        return {node_id: functions for node_id, functions in tests.items() if node_id in node_ids}
+    except subprocess.TimeoutExpired:
+        logger.error(f"Profiling run timed out after {config.PROFILE_TIMEOUT}s")
+    except (OSError, ValueError) as e:
+        logger.error(f"Profiling run produced no results: {e}")
+    finally:
+        Path(output_path).unlink(missing_ok=True)
+    return {}
+
+
+def run_profile(node_ids: List[str], cwd: str = None, repeats: int = None) -> Dict[str, Dict[str, List[float]]]:
+    """
+    Profile tests, averaged over several passes
+
+    Args:
+        node_ids: pytest node IDs to profile
+        cwd: Checkout to run them in (default: the working directory)
+        repeats: Passes to average (default config.PROFILE_REPEATS)
+
+    Returns:
+        {node_id: {function: [calls, self seconds, cumulative seconds]}} per pass
+    """
+    cwd = cwd or os.getcwd()
+    repeats = repeats or config.PROFILE_REPEATS
+    totals: Dict[str, Dict[str, List[float]]] = {}
+    passes: Dict[str, int] = {}
+    for _ in range(repeats):
+        for node_id, functions in _profile_pass(cwd, node_ids).items():
+            passes[node_id] = passes.get(node_id, 0) + 1
+            target = totals.setdefault(node_id, {})
+            for name, stats in functions.items():
+                entry = target.setdefault(name, [0, 0.0, 0.0])
+                for i in range(3):
+                    entry[i] += stats[i]
+    return {
+        node_id: {name: [stats[0] / passes[node_id], stats[1] / passes[node_id], stats[2] / passes[node_id]]
+                  for name, stats in functions.items()}
+        for node_id, functions in totals.items()
+    }
+
+
+def _trim(functions: Dict[str, List[float]], limit: int) -> Dict[str, List[float]]:
+    """Keep the functions ranking in the top `limit` by self or by cumulative time"""
+    by_self = sorted(functions, key=lambda name: functions[name][1], reverse=True)[:limit]
+    by_cumulative = sorted(functions, key=lambda name: functions[name][2], reverse=True)[:limit]
+    return {name: functions[name] for name in set(by_self) | set(by_cumulative)}
+
+
+def capture_baseline_profiles(storage: BaselineStorage, node_ids: List[str], calibration: Dict[str, float] = None):
+    """
+    Profile benchmarks and store the result alongside the baseline
+
+    Args:
+        storage: Baseline store
+        node_ids: Benchmarks the baseline was established with
+        calibration: Speed vector of this machine, stored for later normalization
+    """
+    if not node_ids:
+        return
+    logger.info(f"Profiling {len(node_ids)} benchmark(s) for the baseline...")
+    try:
+        profiles = storage.get_profiles()
+        recorded = datetime.now().isoformat()
+        for node_id, functions in run_profile(node_ids).items():
+            profiles[node_id] = {
+                "functions": _trim(functions, config.PROFILE_STORED_FUNCTIONS),
+                # Before trimming, so it compares with a full head profile
+                "self_total": sum(stats[1] for stats in functions.values()),
+                "calibration": calibration,
+                "recorded": recorded,
+            }
+        storage.save_profiles(profiles)
+    except Exception as e:
+        logger.warning(f"Could not store baseline profiles: {e}")
+
+
+def _benchmark_changes(execution: Dict[str, Any], storage: BaselineStorage) -> Dict[str, float]:
+    """Per-benchmark execution time change in seconds, where a base value exists"""
+    ab = execution.get("ab")
+    if ab:
+        return {name: stats["head"] - stats["base"] for name, stats in ab.get("benchmarks", {}).items()}
+
+    baseline = storage.get_baseline("execution_time") or {}
+    if config.CALIBRATION_ENABLED and baseline.get("calibration"):
+        from calibration import get_calibration, normalize_baseline
+
+        try:
+            baseline = normalize_baseline("execution_time", baseline, get_calibration()["vector"])
+        except Exception as e:
+            logger.warning(f"Comparing benchmarks without calibration: {e}")
+    base = baseline.get("benchmarks") or {}
+    return {
+        name: mean - base[name]
+        for name, mean in execution.get("benchmarks", {}).items()
+        if base.get(name)
+    }
+
+
+def regressed_benchmarks(execution: Dict[str, Any], storage: BaselineStorage) -> List[str]:
+    """
+    Benchmarks to profile, most regressed first
+
+    Ranked by the time they added rather than by relative change: the suite
+    metric is a mean of benchmark means, and sub-millisecond benchmarks swing
+    by tens of percent on noise alone. Without per-benchmark base values, the
+    slowest ones.
+    """
+    changes = _benchmark_changes(execution, storage)
+    picked = [name for name in sorted(changes, key=changes.get, reverse=True) if changes[name] > 0]
+    if not changes:
+        current = execution.get("benchmarks", {})
+        picked = sorted(current, key=current.get, reverse=True)
+    return picked[:config.PROFILE_MAX_BENCHMARKS]
+
+
+def diff_profiles(
+    base: Dict[str, List[float]],
+    head: Dict[str, List[float]],
+    top_n: int = None,
+    base_self_total: float = None
+) -> Dict[str, Any]:
+    """
+    Function-level difference between two profiles of a benchmark
+
+    Args:
+        base: Base profile, possibly trimmed to its top functions
+        head: Full head profile
+        top_n: Rows to return (default config.PROFILE_TOP_N)
+        base_self_total: Self time of the base before it was trimmed; when set,
+            only functions kept in the base are compared, and the totals
+            compare the full profiles
+
+    Returns:
+        {"self_total": [base, head], "functions": top_n rows of {"function",
+        "calls", "self", "cumulative" ([base, head] each), "self_delta",
+        "cumulative_delta"}, largest self time increase first}
+    """
+    top_n = top_n or config.PROFILE_TOP_N
+    self_total = [
+        base_self_total if base_self_total is not None else sum(stats[1] for stats in base.values()),
+        sum(stats[1] for stats in head.values())
+    ]
+    names = set(base) | set(head)
+    if base_self_total is not None:
+        # Head functions outside the trimmed base would show as new
+        names = set(base)
+    empty = [0, 0.0, 0.0]
+    rows = []
+    for name in names:
+        before, after = base.get(name, empty), head.get(name, empty)
+        rows.append({
+            "function": name,
+            "calls": [before[0], after[0]],
+            "self": [before[1], after[1]],
+            "cumulative": [before[2], after[2]],
+            "self_delta": after[1] - before[1],
+            "cumulative_delta": after[2] - before[2],
+        })
+    rows.sort(key=lambda row: row["self_delta"], reverse=True)
+    return {
+        "self_total": self_total,
+        "functions": rows[:top_n],
+    }
+
+
+def _stored_base_profiles(storage: BaselineStorage, node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Baseline profiles of the benchmarks ({"functions", "self_total"}), rescaled to this machine's speed"""
+    stored = storage.get_profiles()
+    vector = None
+    if config.CALIBRATION_ENABLED:
+        from calibration import get_calibration
+
+        try:
+            vector = get_calibration()["vector"]
+        except Exception as e:
+            logger.warning(f"Comparing profiles without calibration: {e}")
+
+    profiles = {}
+    for node_id in node_ids:
+        if node_id not in stored:
+            continue
+        functions = stored[node_id]["functions"]
+        # Profiles stored before the total was kept compare the trimmed set on both sides
+        self_total = stored[node_id].get("self_total", sum(stats[1] for stats in functions.values()))
+        factor = None
+        if vector and stored[node_id].get("calibration"):
+            from calibration import speed_factor
+
+            factor = speed_factor("execution_time", vector, stored[node_id]["calibration"])
+        if factor and abs(factor - 1) >= config.CALIBRATION_MIN_CHANGE:
+            functions = {name: [calls, self_time * factor, cumulative * factor]
+                         for name, (calls, self_time, cumulative) in functions.items()}
+            self_total *= factor
+        profiles[node_id] = {"functions": functions, "self_total": self_total}
+    return profiles
+
+
+def profile_regressions(
+    details: Dict[str, Any],
+    metrics: Dict[str, Any],
+    base_ref: str = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Profile the most regressed benchmarks when a timing metric scored below threshold
+
+    Args:
+        details: Per-metric score details from calculate_score
+        metrics: Collected metrics (per-benchmark execution times)
+        base_ref: Git reference whose merge-base is profiled when no baseline profile is stored
+
+    Returns:
+        {"triggered_by", "benchmarks": {node_id: {"base", **diff_profiles}}},
+        or None when nothing regressed or nothing could be profiled
+    """
+    triggered = [
+        name for name in config.PROFILE_METRICS
+        if name in details and details[name].get("score", 100) < config.PROFILE_SCORE_THRESHOLD
+    ]
+    if not triggered:
+        return None
+
+    storage = BaselineStorage(config.BASELINE_STORAGE_PATH)
+    execution = metrics.get("execution_time", {})
+    node_ids = regressed_benchmarks(execution, storage)
+    if not node_ids:
+        logger.info("No regressed benchmark to profile")
+        return None
+    logger.info(f"{', '.join(triggered)} below threshold, profiling {len(node_ids)} benchmark(s)")
+
+    ab = execution.get("ab")
+    base_profiles, sources, base_totals = {}, {}, {}
+    if not ab:
+        for node_id, stored in _stored_base_profiles(storage, node_ids).items():
+            base_profiles[node_id] = stored["functions"]
+            base_totals[node_id] = stored["self_total"]
+            sources[node_id] = "baseline"
+
+    missing = [node_id for node_id in node_ids if node_id not in base_profiles]
+    if missing and base_ref:
+        from ab_runner import merge_base
+        from range_runner import WorktreePool, checkout
+
+        base_sha = ab["base_sha"] if ab else merge_base(base_ref)
+        try:
+            if not base_sha:
+                raise RuntimeError(f"no merge-base with {base_ref}")
+            worktree = WorktreePool(1, name="profile-base").prepare()[0]
+            checkout(worktree, base_sha)
+            profiled = run_profile(missing, cwd=worktree)
+            base_profiles.update(profiled)
+            sources.update({node_id: f"merge-base {base_sha[:12]}" for node_id in profiled})
+        except Exception as e:
+            logger.warning(f"Could not profile the base: {e}")
+
+    head_profiles = run_profile([node_id for node_id in node_ids if node_id in base_profiles])
+    benchmarks = {
+        node_id: {
+            "base": sources[node_id],
+            **diff_profiles(base_profiles[node_id], head_profiles[node_id], base_self_total=base_totals.get(node_id))
+        }
+        for node_id in node_ids if node_id in head_profiles
+    }
+    if not benchmarks:
+        logger.warning("No base profile available for the regressed benchmarks")
+        return None
+    return {"triggered_by": triggered, "benchmarks": benchmarks}
@@ -4,8 +4,12 @@ You are a performance engineer. Analyze this git diff for perf risks.
 
 Diff: {diff}
 
+Call graph of changed functions (callers and entry points):
+{context}
+
 Rules:
 - Identify hotspots (loops, I/O, allocations)
+- Weigh changes on hot paths (many entry points, called in loops) higher
 - Suggest 3-5 pytest benchmarks
 - Risk 0-1 (1=high)
 
@@ -19,6 +23,37 @@ JSON output only:
 }}
     """,
 
+    "combined_analysis": """
+You are a performance engineer. Analyze this git diff for perf risks and
+assess the overall PR risk in one pass.
+
+Changed files: {files}
+
+Diff: {diff}
+
+Call graph of changed functions (callers and entry points):
+{context}
+
+Rules:
+- Identify hotspots (loops, I/O, allocations)
+- Weigh changes on hot paths (many entry points, called in loops) higher
+- Suggest 3-5 pytest benchmarks
+- Risk 0-1 (1=high)
+- Overall risk is high/medium/low for the whole PR
+- Perf impact is an estimated % slowdown (or speedup)
+
+JSON output only:
+{{
+  "risk_score": 0.78,
+  "critical_paths": ["src/payment.py"],
+  "suggested_benchmarks": ["test_process_batch", "test_image_resize"],
+  "reasoning": "N+1 queries detected",
+  "suggestions": ["Add indexing to DB queries"],
+  "overall_risk": "high",
+  "perf_impact": "~20% slowdown on batch processing"
+}}
+    """,
+
     "score_refinement": """
 Refine this raw perf score (0-100) based on metrics and context.
 
@@ -36,16 +71,21 @@ JSON:
     """,
 
     "test_generator": """
-Generate pytest perf test for this function diff.
+Generate a pytest perf test for this function diff.
 
 Function: {code}
-Baseline: {baseline_time}s
+Import it with: {import_line}
+Time budget: {baseline_time}s per call
+
+Rules:
+- Use the pytest-benchmark `benchmark` fixture: result = benchmark({func_name}, ...)
+- Build small, realistic, deterministic inputs inline (no network, no files)
+- Assert the result is sane; do not assert on timings
+- Output only Python code, no explanations
 
-Output pytest code as string:
 @pytest.mark.perf
-def test_{func_name}():
+def test_{func_name}_perf(benchmark):
     ...
-    assert result < {baseline} * 1.15
     """,
 
     "risk_assessment": """
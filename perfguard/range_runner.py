@@ -0,0 +1,309 @@
+"""
+PerfGuard AI Commit Range Runner
+Benchmarks every commit of a range (`main.py range A..B`) on a pool of warm git worktrees
+
+Each worker process owns one worktree, imports pytest, pytest-benchmark and
+config.RANGE_PRELOAD_MODULES once, and forks a fresh child per commit to run
+the perf suite. The child starts with those imports already done but without
+any repository module loaded, so no code leaks from one commit into the next.
+Results stream into the baseline store's config.RANGE_TIMESERIES series as
+commits finish; commits already measured on this environment are skipped, so
+an interrupted backfill picks up where it stopped.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+from storage import BaselineStorage
+from perf_suite import test_environment
+
+logger = get_logger(__name__)
+
+# Worktree owned by this worker process (set by _init_worker)
+_worktree: Optional[str] = None
+
+
+def _git(*args: str, cwd: str = None, timeout: int = 120) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=timeout)
+
+
+def list_commits(revision_range: str) -> List[Dict[str, Any]]:
+    """
+    Commits of a range, oldest first
+
+    Args:
+        revision_range: "A..B" (commits after A up to B), or a single ref for just that commit
+
+    Returns:
+        List of {"sha", "subject", "committed"}
+    """
+    args = ["--reverse", revision_range] if ".." in revision_range else ["-1", revision_range]
+    result = _git("log", "--format=%H%x00%cI%x00%s", *args)
+    if result.returncode != 0:
+        raise ValueError(f"Invalid commit range {revision_range}: {result.stderr.strip()}")
+    commits = []
+    for line in result.stdout.splitlines():
+        sha, committed, subject = line.split("\0", 2)
+        commits.append({"sha": sha, "subject": subject, "committed": committed})
+    return commits
+
+
+class WorktreePool:
+    """
+    Detached git worktrees kept under the repository's git directory
+
+    Worktrees are reused across runs: switching one to another commit only
+    rewrites the files that differ, and ignored files (__pycache__, pytest
+    caches) survive, so later runs start warm. Keeping them inside the git
+    directory hides them from git status and pytest collection in the main
+    checkout.
+    """
+
+    def __init__(self, size: int, name: str = "worker"):
+        self.size = size
+        self.name = name
+        common_dir = _git("rev-parse", "--path-format=absolute", "--git-common-dir").stdout.strip()
+        self.root = Path(common_dir or ".git").resolve() / "perfguard-worktrees"
+
+    def prepare(self) -> List[str]:
+        """Create missing worktrees and return all of their paths"""
+        _git("worktree", "prune")
+        registered = _git("worktree", "list", "--porcelain").stdout
+        paths = []
+        for number in range(self.size):
+            path = self.root / f"{self.name}-{number}"
+            if f"worktree {path}\n" not in registered:
+                if path.exists():
+                    shutil.rmtree(path, ignore_errors=True)
+                self.root.mkdir(parents=True, exist_ok=True)
+                result = _git("worktree", "add", "--detach", "--quiet", str(path), "HEAD")
+                if result.returncode != 0:
+                    raise RuntimeError(f"Could not create worktree {path}: {result.stderr.strip()}")
+                logger.info(f"Created worktree {path}")
+            paths.append(str(path))
+        return paths
+
+    def remove(self):
+        """Delete the worktrees (they are otherwise kept warm for the next run)"""
+        for number in range(self.size):
+            path = self.root / f"{self.name}-{number}"
+            if path.exists():
+                _git("worktree", "remove", "--force", str(path))
+        _git("worktree", "prune")
+
+
+def checkout(worktree: str, sha: str):
+    """Switch a worktree to a commit, dropping untracked files left by the previous one"""
+    result = _git("checkout", "--quiet", "--force", "--detach", sha, cwd=worktree)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not check out {sha[:12]}: {result.stderr.strip()}")
+    _git("clean", "-fdq", cwd=worktree)
+
+
+def _init_worker(worktrees: "multiprocessing.Queue"):
+    """Claim a worktree and import the test tooling once"""
+    global _worktree
+    _worktree = worktrees.get()
+    # Ctrl+C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in ["pytest", "pytest_benchmark.plugin", *config.RANGE_PRELOAD_MODULES]:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _run_suite_forked(worktree: str, json_path: str, log_path: str, timeout: float) -> Optional[int]:
+    """
+    Run the perf suite in a fork of this warm worker
+
+    Returns:
+        pytest exit code, or None on timeout
+    """
+    import pytest
+
+    args = [
+        "-m", config.PYTEST_MARKERS,
+        "--benchmark-only",
+        f"--benchmark-json={json_path}",
+        "-p", "no:cacheprovider",
+        "-q",
+    ]
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            log = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.dup2(log, 1)
+            os.dup2(log, 2)
+            os.chdir(worktree)
+            sys.path.insert(0, worktree)
+            env = test_environment()
+            os.environ.clear()
+            os.environ.update(env)
+            code = int(pytest.main(args))
+        finally:
+            os._exit(code)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            return os.waitstatus_to_exitcode(status)
+        if time.monotonic() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+        time.sleep(0.05)
+
+
+def _run_suite_subprocess(worktree: str, json_path: str, log_path: str, timeout: float) -> Optional[int]:
+    """Run the perf suite in a new interpreter (platforms without fork)"""
+    cmd = [
+        sys.executable, "-m", "pytest",
+        "-m", config.PYTEST_MARKERS,
+        "--benchmark-only",
+        f"--benchmark-json={json_path}",
+        "-p", "no:cacheprovider",
+        "-q",
+    ]
+    with open(log_path, 'w') as log:
+        try:
+            return subprocess.run(
+                cmd, cwd=worktree, env=test_environment(), stdout=log, stderr=log, timeout=timeout
+            ).returncode
+        except subprocess.TimeoutExpired:
+            return None
+
+
+def benchmark_commit(commit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check out a commit in this worker's worktree and benchmark it (runs in a pool worker)
+
+    Returns:
+        The commit dict plus "status" ("ok", "failed" or "timeout"), "benchmarks"
+        (fullname -> mean seconds), "mean", "duration" and "error"
+    """
+    started = time.monotonic()
+    result = {**commit, "worker": os.path.basename(_worktree), "benchmarks": {}, "mean": None}
+    with tempfile.TemporaryDirectory(prefix="perfguard-range-") as scratch:
+        json_path = os.path.join(scratch, "benchmark.json")
+        log_path = os.path.join(scratch, "pytest.log")
+        try:
+            checkout(_worktree, commit["sha"])
+            run_suite = _run_suite_forked if hasattr(os, "fork") else _run_suite_subprocess
+            code = run_suite(_worktree, json_path, log_path, config.RANGE_COMMIT_TIMEOUT)
+        except Exception as e:
+            result.update(status="failed", error=str(e), duration=round(time.monotonic() - started, 2))
+            return result
+
+        benchmarks = []
+        if os.path.exists(json_path):
+            with open(json_path, 'r') as f:
+                benchmarks = json.loads(f.read() or "{}").get("benchmarks", [])
+        result["benchmarks"] = {b["fullname"]: b["stats"]["mean"] for b in benchmarks}
+        if benchmarks:
+            result["mean"] = sum(result["benchmarks"].values()) / len(benchmarks)
+
+        if code is None:
+            result.update(status="timeout", error=f"perf suite exceeded {config.RANGE_COMMIT_TIMEOUT}s")
+        elif code not in (0, 1) or not benchmarks:
+            # Exit code 1 only means some tests failed; the others still have timings
+            with open(log_path, 'r', errors="replace") as f:
+                tail = f.read()[-500:]
+            result.update(status="failed", error=f"pytest exited with {code}: {tail.strip()}")
+        else:
+            result.update(status="ok", error=None)
+    result["duration"] = round(time.monotonic() - started, 2)
+    return result
+
+
+def run_range(
+    revision_range: str,
+    workers: int = None,
+    force: bool = False,
+    remove_worktrees: bool = False
+) -> Dict[str, Any]:
+    """
+    Benchmark every commit of a range and record the results in the baseline store
+
+    Args:
+        revision_range: "A..B" as understood by git log
+        workers: Worktrees benchmarked in parallel (default config.RANGE_WORKERS)
+        force: Measure commits again even if this environment already has results
+        remove_worktrees: Delete the worktrees afterwards instead of keeping them warm
+
+    Returns:
+        Summary with "commits", "measured", "skipped", "failed" and "results"
+    """
+    from fingerprint import environment_key
+
+    storage = BaselineStorage(config.BASELINE_STORAGE_PATH)
+    environment = environment_key()
+    commits = list_commits(revision_range)
+
+    done = set()
+    if not force:
+        done = {
+            point["sha"] for point in storage.get_timeseries(config.RANGE_TIMESERIES)
+            if point.get("status") == "ok" and point.get("environment") == environment
+        }
+    pending = [commit for commit in commits if commit["sha"] not in done]
+    summary = {"commits": len(commits), "measured": 0, "skipped": len(commits) - len(pending), "failed": 0, "results": []}
+    logger.info(f"{len(commits)} commit(s) in {revision_range}, {len(pending)} to benchmark")
+    if not pending:
+        return summary
+
+    workers = max(1, min(workers or config.RANGE_WORKERS, len(pending)))
+    worktree_pool = WorktreePool(workers)
+    paths = worktree_pool.prepare()
+
+    # Spawned workers start clean; fork would copy this process's threads and locks
+    context = multiprocessing.get_context("spawn")
+    worktrees = context.Queue()
+    for path in paths:
+        worktrees.put(path)
+
+    started = time.monotonic()
+    pool = context.Pool(workers, initializer=_init_worker, initargs=(worktrees,))
+    try:
+        for number, result in enumerate(pool.imap_unordered(benchmark_commit, pending), start=1):
+            result.update(environment=environment, recorded=datetime.now().isoformat())
+            storage.append_timeseries(config.RANGE_TIMESERIES, [result], config.RANGE_HISTORY_SIZE)
+            summary["results"].append(result)
+            if result["status"] == "ok":
+                summary["measured"] += 1
+                mean = f"{result['mean']:.4f}s" if result["mean"] is not None else "n/a"
+                logger.info(
+                    f"[{number}/{len(pending)}] {result['sha'][:12]} {result['subject'][:50]}: "
+                    f"{len(result['benchmarks'])} benchmark(s), mean {mean} ({result['duration']:.1f}s)"
+                )
+            else:
+                summary["failed"] += 1
+                logger.warning(f"[{number}/{len(pending)}] {result['sha'][:12]} {result['status']}: {result['error']}")
+        pool.close()
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; finished commits are recorded and are skipped next time")
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        if remove_worktrees:
+            worktree_pool.remove()
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Benchmarked {summary['measured']} commit(s) in {elapsed:.0f}s "
+        f"({summary['failed']} failed, {summary['skipped']} already measured)"
+    )
+    return summary
@@ -0,0 +1,200 @@
+"""
+PerfGuard AI Provider Rate Limiter
+Token-bucket scheduler shared by every PerfGuard process on the host, with a
+priority queue so concurrent analyses use the provider budget without 429s
+"""
+import os
+import json
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from pathlib import Path
+from config import config
+from logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: coordination is limited to threads of one process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Longest single sleep while queued, so new higher-priority waiters and
+# cancellations are noticed promptly
+POLL_INTERVAL = 0.25
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateLimiter:
+    """
+    Per-provider token buckets persisted to a shared state file
+
+    Buckets refill at requests_per_minute / 60 tokens per second up to burst.
+    Callers queue as waiters; only the highest-priority (then oldest) waiter for
+    a provider may take a token, so low-priority work never starves urgent work.
+    All reads and writes happen under an exclusive flock on a sibling lock file.
+    """
+
+    def __init__(self, state_path: str = None, limits: Dict[str, Dict[str, float]] = None):
+        self.state_path = Path(state_path or config.RATE_LIMIT_STATE_PATH)
+        self.lock_path = self.state_path.with_suffix(".lock")
+        self.limits = limits if limits is not None else config.RATE_LIMITS
+        self._thread_lock = threading.Lock()
+        self._ids = itertools.count()
+
+    @contextmanager
+    def _locked_state(self):
+        """Read-modify-write the shared state under process and thread locks"""
+        with self._thread_lock:
+            with open(self.lock_path, 'a+') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    state = self._read()
+                    yield state
+                    self._write(state)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("buckets", {})
+        state.setdefault("waiters", {})
+        return state
+
+    def _write(self, state: Dict[str, Any]):
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _bucket(self, state: Dict[str, Any], provider: str, now: float) -> Dict[str, float]:
+        """Refill and return a provider's bucket"""
+        limit = self.limits[provider]
+        bucket = state["buckets"].setdefault(
+            provider, {"tokens": float(limit["burst"]), "updated": now, "blocked_until": 0.0}
+        )
+        rate = limit["requests_per_minute"] / 60
+        bucket["tokens"] = min(float(limit["burst"]), bucket["tokens"] + max(0.0, now - bucket["updated"]) * rate)
+        bucket["updated"] = now
+        return bucket
+
+    def _prune_waiters(self, state: Dict[str, Any], now: float):
+        """Drop waiters whose process died or that have waited implausibly long"""
+        for waiter_id, waiter in list(state["waiters"].items()):
+            if now - waiter["enqueued"] > config.RATE_LIMIT_MAX_WAIT * 2 or not pid_alive(waiter["pid"]):
+                del state["waiters"][waiter_id]
+
+    def acquire(
+        self,
+        provider: str,
+        priority: int = None,
+        cancel_event: threading.Event = None,
+        max_wait: float = None
+    ) -> bool:
+        """
+        Wait for permission to send one request to a provider
+
+        Args:
+            provider: Provider name ("anthropic" or "gemini")
+            priority: Higher runs first (default config.REQUEST_PRIORITY)
+            cancel_event: Stop waiting once set
+            max_wait: Seconds to wait at most (default config.RATE_LIMIT_MAX_WAIT)
+
+        Returns:
+            True when a request may be sent, False if cancelled or timed out
+        """
+        if not config.RATE_LIMIT_ENABLED or provider not in self.limits:
+            return True
+
+        priority = config.REQUEST_PRIORITY if priority is None else priority
+        max_wait = config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        waiter_id = f"{os.getpid()}-{threading.get_ident()}-{next(self._ids)}"
+        started = time.time()
+        waiter = {"provider": provider, "priority": priority, "enqueued": started, "pid": os.getpid()}
+        rate = self.limits[provider]["requests_per_minute"] / 60
+        logged = False
+
+        try:
+            while True:
+                if cancel_event and cancel_event.is_set():
+                    return False
+
+                now = time.time()
+                with self._locked_state() as state:
+                    self._prune_waiters(state, now)
+                    state["waiters"].setdefault(waiter_id, waiter)
+                    bucket = self._bucket(state, provider, now)
+
+                    queue = sorted(
+                        (w for w in state["waiters"].items() if w[1]["provider"] == provider),
+                        key=lambda item: (-item[1]["priority"], item[1]["enqueued"])
+                    )
+                    position = [w[0] for w in queue].index(waiter_id)
+
+                    if position == 0 and now >= bucket["blocked_until"] and bucket["tokens"] >= 1:
+                        bucket["tokens"] -= 1
+                        del state["waiters"][waiter_id]
+                        if logged:
+                            logger.info(f"{provider} rate limit slot acquired after {now - started:.1f}s")
+                        return True
+
+                    if now < bucket["blocked_until"]:
+                        delay = bucket["blocked_until"] - now
+                    elif position == 0:
+                        delay = (1 - bucket["tokens"]) / rate
+                    else:
+                        delay = POLL_INTERVAL
+
+                if now - started + delay > max_wait:
+                    logger.warning(f"⏳ Gave up waiting for {provider} rate limit after {now - started:.1f}s")
+                    return False
+
+                if not logged:
+                    logger.info(f"⏳ Waiting for {provider} rate limit (queue position {position + 1})")
+                    logged = True
+
+                sleep_for = min(delay, POLL_INTERVAL)
+                if cancel_event:
+                    cancel_event.wait(sleep_for)
+                else:
+                    time.sleep(sleep_for)
+        finally:
+            with self._locked_state() as state:
+                state["waiters"].pop(waiter_id, None)
+
+    def penalize(self, provider: str, retry_after: Optional[float] = None):
+        """
+        Pause a provider for every process after it returned 429
+
+        Args:
+            provider: Provider name
+            retry_after: Server hint in seconds (default config.RATE_LIMIT_429_PENALTY)
+        """
+        if not config.RATE_LIMIT_ENABLED or provider not in self.limits:
+            return
+
+        pause = retry_after if retry_after is not None else config.RATE_LIMIT_429_PENALTY
+        now = time.time()
+        with self._locked_state() as state:
+            bucket = self._bucket(state, provider, now)
+            bucket["tokens"] = 0.0
+            bucket["blocked_until"] = max(bucket["blocked_until"], now + pause)
+        logger.warning(f"⏳ {provider} rate limited, pausing all PerfGuard requests for {pause:.1f}s")
+
@@ -3,13 +3,32 @@ PerfGuard AI Rules Engine
 Calculates performance scores based on weighted metrics
 """
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from config import config
 from logger import get_logger
 
 logger = get_logger(__name__)
 
 
+def determine_verdict(score: float) -> Tuple[str, bool]:
+    """
+    Map a final score to a verdict
+
+    Returns:
+        (verdict, block_merge)
+    """
+    block_merge = score < config.MIN_PASSING_SCORE
+    if score >= 90:
+        verdict = "EXCELLENT"
+    elif score >= config.MIN_PASSING_SCORE:
+        verdict = "PASS"
+    elif score >= 70:
+        verdict = "WARNING"
+    else:
+        verdict = "BLOCKED"
+    return verdict, block_merge
+
+
 def calculate_metric_score(
     metric_name: str,
     current_value: float,
@@ -246,15 +265,7 @@ def calculate_score(metrics: Dict[str, Any], ai_response: Dict[str, Any]) -> Dic
         final_score = round(raw_score, config.SCORE_PRECISION)
 
         # Determine verdict
-        block_merge = final_score < config.MIN_PASSING_SCORE
-        if final_score >= 90:
-            verdict = "EXCELLENT"
-        elif final_score >= config.MIN_PASSING_SCORE:
-            verdict = "PASS"
-        elif final_score >= 70:
-            verdict = "WARNING"
-        else:
-            verdict = "BLOCKED"
+        verdict, block_merge = determine_verdict(final_score)
 
         logger.info(f"Final Score: {final_score}/100 - {verdict}")
 
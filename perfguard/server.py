@@ -0,0 +1,330 @@
+"""
+PerfGuard AI Daemon
+Keeps the baseline store, LLM clients and caches warm between gate runs and
+serves analysis jobs over a Unix socket or localhost HTTP (`main.py serve`)
+
+API (JSON over HTTP/1.1):
+    GET    /health               Daemon status and queue depth
+    POST   /jobs                 Queue a run: {"cwd", "base_ref", "pr_number", "head_sha", "update_impact_index", "force"}
+    GET    /jobs/<id>?wait=S     Job state, long-polling up to S seconds for it to finish
+    DELETE /jobs/<id>            Cancel a job that has not started
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import signal
+import socket
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Longest a single GET /jobs/<id> request blocks; clients poll again after it
+MAX_LONG_POLL = 60
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class Job:
+    """One gate run requested by a client"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.options = options
+        self.state = "queued"
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.score: Optional[Dict[str, Any]] = None
+        self.report: Optional[str] = None
+        self.exit_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "score": self.score,
+            "report": self.report,
+        }
+
+
+class JobRunner:
+    """
+    Bounded job queue drained by a single worker thread
+
+    All jobs run against the checkout in the daemon's working directory, in
+    this process, so warm state (parsed baselines, SDK clients, LLM response,
+    complexity and call-graph caches) carries over from one job to the next.
+    Jobs run one at a time: they share the checkout and process-wide state
+    (benchmark_results.json, the trace and telemetry, score and report files),
+    and concurrent benchmark runs would disturb each other's timings anyway.
+    """
+
+    def __init__(self, queue_size: int = None):
+        self.queue: "queue.Queue[Job]" = queue.Queue(maxsize=queue_size or config.DAEMON_QUEUE_SIZE)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.repo_root = os.path.realpath(os.getcwd())
+        self.started = time.time()
+        self.completed = 0
+
+    def start(self):
+        threading.Thread(target=self._work, name="perfguard-worker", daemon=True).start()
+
+    def submit(self, options: Dict[str, Any]) -> Optional[Job]:
+        """Queue a job, or return None when the queue is full"""
+        job = Job(options)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            return None
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+        logger.info(f"Queued job {job.id} ({self.queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; running jobs are left to finish"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state != "queued":
+                return False
+            job.state = "cancelled"
+            job.finished = time.time()
+        job.done.set()
+        logger.info(f"Cancelled job {job_id}")
+        return True
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond config.DAEMON_JOB_HISTORY (lock held)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - config.DAEMON_JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            with self.lock:
+                if job.state == "cancelled":
+                    continue
+                job.state = "running"
+                job.started = time.time()
+            try:
+                self._run(job)
+            finally:
+                with self.lock:
+                    job.finished = time.time()
+                    self.completed += 1
+                    self._prune()
+                job.done.set()
+                logger.info(f"Job {job.id} {job.state} in {job.finished - job.started:.1f}s")
+
+    def _run(self, job: Job):
+        from main import run_gate, error_results
+
+        options = job.options
+        try:
+            job.score, job.report = run_gate(
+                base_ref=options.get("base_ref") or "HEAD~1",
+                pr_number=options.get("pr_number"),
+                head_sha=options.get("head_sha"),
+                update_impact_index=options.get("update_impact_index"),
+                force=bool(options.get("force"))
+            )
+            job.exit_code = 1 if job.score.get("block_merge") else 0
+            job.state = "done"
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            job.score, job.report = error_results(e)
+            job.exit_code = 1
+            job.error = str(e)
+            job.state = "failed"
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            running = sum(1 for job in self.jobs.values() if job.state == "running")
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "repo_root": self.repo_root,
+            "uptime": round(time.time() - self.started, 1),
+            "queued": self.queue.qsize(),
+            "running": running,
+            "completed": self.completed,
+        }
+
+
+def warm_up():
+    """Load what every job needs up front: SDK clients, baselines, call graph, radon"""
+    started = time.perf_counter()
+    from ai_analyzer import AIAnalyzer
+    from storage import BaselineStorage
+    from call_graph import call_graph_context
+    import main  # noqa: F401 (pipeline, scoring and report modules)
+
+    AIAnalyzer()
+    BaselineStorage(config.BASELINE_STORAGE_PATH).load_baselines()
+    call_graph_context("")
+    try:
+        import radon.complexity  # noqa: F401
+    except ImportError:
+        pass
+    logger.info(f"Warm state loaded in {time.perf_counter() - started:.2f}s")
+
+
+def _make_handler(runner: JobRunner):
+    class DaemonHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def address_string(self):
+            # Unix socket peers have no address
+            return self.client_address[0] if self.client_address else "local"
+
+        def log_message(self, format, *args):
+            logger.debug("daemon: " + format % args)
+
+        def _send_json(self, status: int, body: Dict[str, Any]):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _job_id(self, path: str) -> Optional[str]:
+            parts = path.strip("/").split("/")
+            return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send_json(200, runner.status())
+                return
+
+            job = runner.get(self._job_id(url.path) or "")
+            if job is None:
+                self._send_json(404, {"error": f"unknown path {url.path}"})
+                return
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                wait = 0.0
+            if wait > 0:
+                job.done.wait(min(wait, MAX_LONG_POLL))
+            self._send_json(200, job.to_dict())
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/jobs":
+                self._send_json(404, {"error": f"unknown path {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                options = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+
+            cwd = options.get("cwd")
+            if cwd and os.path.realpath(cwd) != runner.repo_root:
+                self._send_json(400, {"error": f"daemon serves {runner.repo_root}, not {cwd}"})
+                return
+
+            job = runner.submit(options)
+            if job is None:
+                self._send_json(503, {"error": "job queue is full"})
+                return
+            self._send_json(202, job.to_dict())
+
+        def do_DELETE(self):
+            job_id = self._job_id(urlparse(self.path).path)
+            if job_id and runner.cancel(job_id):
+                self._send_json(200, runner.get(job_id).to_dict())
+            else:
+                self._send_json(409, {"error": "job is not queued"})
+
+    return DaemonHandler
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP over a Unix domain socket"""
+    daemon_threads = True
+
+
+def _socket_in_use(socket_path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str = None, port: int = None, queue_size: int = None):
+    """
+    Run the daemon until SIGINT/SIGTERM
+
+    Args:
+        socket_path: Unix socket to listen on (default config.DAEMON_SOCKET_PATH)
+        port: Listen on 127.0.0.1:port instead of a Unix socket
+        queue_size: Queued jobs accepted (default config.DAEMON_QUEUE_SIZE)
+    """
+    config.validate()
+    runner = JobRunner(queue_size)
+    warm_up()
+    runner.start()
+
+    handler = _make_handler(runner)
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        server.daemon_threads = True
+        where = f"http://127.0.0.1:{server.server_address[1]}"
+    else:
+        socket_path = socket_path or config.DAEMON_SOCKET_PATH
+        if os.path.exists(socket_path):
+            if _socket_in_use(socket_path):
+                raise RuntimeError(f"Another daemon is listening on {socket_path}")
+            os.unlink(socket_path)
+        # Jobs run code from the checkout, so only the owner may connect
+        previous_umask = os.umask(0o177)
+        try:
+            server = UnixHTTPServer(socket_path, handler)
+        finally:
+            os.umask(previous_umask)
+        where = socket_path
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    logger.info(f"PerfGuard daemon serving {runner.repo_root} on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not port and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        logger.info("PerfGuard daemon stopped")
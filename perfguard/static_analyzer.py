@@ -0,0 +1,267 @@
+"""
+PerfGuard AI Static Hotspot Analyzer
+Local AST analysis of changed Python functions; lets trivial PRs skip the LLM round trip
+"""
+import ast
+from fnmatch import fnmatch
+from typing import Dict, Any, List, Set
+from pathlib import Path
+from config import config
+from logger import get_logger
+from diff_parser import changed_lines
+
+logger = get_logger(__name__)
+
+# Calls that look like per-item lookups/queries when made inside a loop
+LOOKUP_PREFIXES = ("get_", "fetch", "load", "query", "find", "lookup", "select", "retrieve", "read_")
+LOOKUP_METHODS = {"execute", "executemany", "fetchone", "fetchall", "query", "filter", "urlopen"}
+COPY_CALLS = {"copy", "deepcopy"}
+
+# Risk contributed by each finding (combined as 1 - prod(1 - w))
+FINDING_WEIGHTS = {
+    "time_sleep": 0.3,
+    "sleep_in_loop": 0.45,
+    "nested_loops": 0.25,
+    "deeply_nested_loops": 0.45,
+    "string_concat_in_loop": 0.15,
+    "n_plus_one": 0.35,
+    "large_copy": 0.2,
+}
+
+SUGGESTIONS = {
+    "time_sleep": "Remove blocking time.sleep calls from request/processing paths",
+    "sleep_in_loop": "Avoid blocking calls inside loops (N+1 pattern); batch or parallelize the work",
+    "nested_loops": "Replace nested loops with a dict/set lookup or vectorized operation",
+    "deeply_nested_loops": "Reduce O(n^3) nested loops; precompute or use closed-form math",
+    "string_concat_in_loop": "Build strings with ''.join() instead of += inside loops",
+    "n_plus_one": "Batch per-item lookups into a single query (N+1 pattern)",
+    "large_copy": "Avoid copying large objects repeatedly; share references or stream the data",
+}
+
+
+def _call_name(node: ast.Call) -> str:
+    """Dotted name of a call target, e.g. 'time.sleep' or 'get_movie_by_id'"""
+    func = node.func
+    parts = []
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+    return ".".join(reversed(parts))
+
+
+def _is_stringy(node: ast.AST) -> bool:
+    """True if an expression is (or is built from) a string literal"""
+    if isinstance(node, ast.JoinedStr):
+        return True
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, str)
+    if isinstance(node, ast.BinOp):
+        return _is_stringy(node.left) or _is_stringy(node.right)
+    if isinstance(node, ast.Call):
+        return _call_name(node) == "str"
+    return False
+
+
+def _large_range(node: ast.AST) -> bool:
+    """True for comprehension iterables like range(10000)"""
+    if isinstance(node, ast.Call) and _call_name(node) == "range" and node.args:
+        bound = node.args[-1] if len(node.args) > 1 else node.args[0]
+        return isinstance(bound, ast.Constant) and isinstance(bound.value, int) \
+            and bound.value >= config.LARGE_ITERATION_COUNT
+    return False
+
+
+class _HotspotVisitor(ast.NodeVisitor):
+    """Collects hotspot findings within a single function body"""
+
+    def __init__(self):
+        self.loop_depth = 0
+        self.findings: List[Dict[str, Any]] = []
+
+    def _add(self, kind: str, node: ast.AST, detail: str):
+        self.findings.append({"kind": kind, "line": getattr(node, "lineno", 0), "detail": detail})
+
+    def _visit_loop(self, node):
+        self.loop_depth += 1
+        if self.loop_depth == 2:
+            self._add("nested_loops", node, "nested loop")
+        elif self.loop_depth == 3:
+            self._add("deeply_nested_loops", node, "loop nested 3+ levels deep")
+        self.generic_visit(node)
+        self.loop_depth -= 1
+
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+
+    def visit_FunctionDef(self, node):
+        # Nested function bodies are analyzed on their own
+        return
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_AugAssign(self, node):
+        if self.loop_depth and isinstance(node.op, ast.Add) and _is_stringy(node.value):
+            self._add("string_concat_in_loop", node, "string built with += in a loop")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node)
+        short = name.rsplit(".", 1)[-1]
+
+        if name in ("time.sleep", "sleep"):
+            if self.loop_depth:
+                self._add("sleep_in_loop", node, "time.sleep inside a loop")
+            else:
+                self._add("time_sleep", node, "blocking time.sleep call")
+        elif self.loop_depth and (short.startswith(LOOKUP_PREFIXES) or short in LOOKUP_METHODS):
+            self._add("n_plus_one", node, f"per-item lookup '{name}' inside a loop")
+        elif self.loop_depth and short in COPY_CALLS:
+            self._add("large_copy", node, f"'{name}' copy inside a loop")
+
+        self.generic_visit(node)
+
+    def _visit_comprehension(self, node):
+        generators = node.generators
+        if any(_large_range(gen.iter) for gen in generators):
+            for child in ast.walk(node):
+                if isinstance(child, ast.Call) and _call_name(child).rsplit(".", 1)[-1] in COPY_CALLS:
+                    self._add("large_copy", node, "copies made across a large comprehension")
+                    break
+        self.generic_visit(node)
+
+    visit_ListComp = _visit_comprehension
+    visit_SetComp = _visit_comprehension
+    visit_DictComp = _visit_comprehension
+    visit_GeneratorExp = _visit_comprehension
+
+
+def analyze_function(node: ast.AST) -> List[Dict[str, Any]]:
+    """Return hotspot findings for a single function definition node"""
+    visitor = _HotspotVisitor()
+    for statement in node.body:
+        visitor.visit(statement)
+    return visitor.findings
+
+
+def changed_functions(source: str, lines: Set[int]) -> List[ast.AST]:
+    """Function definitions in source that overlap any of the given line numbers"""
+    tree = ast.parse(source)
+    functions = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            if any(start <= line <= node.end_lineno for line in lines):
+                functions.append(node)
+    return functions
+
+
+def _outside_functions(source: str, lines: Set[int], functions: List[ast.AST]) -> List[int]:
+    """Changed lines, other than blank and comment lines, not inside any of the given functions"""
+    source_lines = source.splitlines()
+    spans = [
+        (min([d.lineno for d in f.decorator_list] + [f.lineno]), f.end_lineno)
+        for f in functions
+    ]
+    outside = []
+    for line in sorted(lines):
+        text = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+        if not text or text.startswith("#"):
+            continue
+        if not any(start <= line <= end for start, end in spans):
+            outside.append(line)
+    return outside
+
+
+def risk_from_findings(findings: List[Dict[str, Any]]) -> float:
+    """Combine findings into a 0-1 risk score (each distinct kind counts once per function)"""
+    remaining = 1.0
+    for finding in findings:
+        remaining *= 1 - FINDING_WEIGHTS.get(finding["kind"], 0.1)
+    return round(1 - remaining, 3)
+
+
+def analyze_diff_locally(diff: str, repo_root: str = ".") -> Dict[str, Any]:
+    """
+    Statically analyze the Python functions touched by a diff
+
+    Args:
+        diff: Git diff string
+        repo_root: Repository root the diff paths are relative to
+
+    Returns:
+        Dictionary in the same shape as AIAnalyzer.analyze_diff, plus "findings"
+        and "unanalyzed": changes the analysis could not score (non-Python code
+        files, unparsable or deleted files, changed lines outside any function).
+        A low risk_score only means low risk when "unanalyzed" is empty.
+    """
+    logger.info("Running local static hotspot analysis...")
+
+    findings = []
+    function_risks = {}
+    unanalyzed = []
+    not_code = config.IMPACT_IGNORE_PATTERNS + config.DIFF_EXCLUDE_PATTERNS
+
+    for path, lines in changed_lines(diff).items():
+        if any(fnmatch(path, pattern) for pattern in not_code):
+            continue
+        if not path.endswith(".py"):
+            unanalyzed.append(path)
+            continue
+        file_path = Path(repo_root) / path
+        if not file_path.exists():
+            unanalyzed.append(f"{path} (deleted)")
+            continue
+
+        try:
+            source = file_path.read_text(encoding="utf-8")
+            functions = changed_functions(source, lines)
+        except (SyntaxError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not parse {path}: {e}")
+            unanalyzed.append(f"{path} (unparsable)")
+            continue
+
+        outside = _outside_functions(source, lines, functions)
+        if outside:
+            unanalyzed.append(f"{path}:{outside[0]} (outside any function)")
+
+        for function in functions:
+            function_findings = analyze_function(function)
+            if not function_findings:
+                continue
+            qualified = f"{path}::{function.name}"
+            kinds = {f["kind"]: f for f in function_findings}
+            function_risks[qualified] = risk_from_findings(list(kinds.values()))
+            for finding in function_findings:
+                findings.append({"function": qualified, **finding})
+
+    risk_score = max(function_risks.values(), default=0.0)
+    critical_paths = sorted(function_risks, key=function_risks.get, reverse=True)
+
+    kinds_seen = []
+    for finding in findings:
+        if finding["kind"] not in kinds_seen:
+            kinds_seen.append(finding["kind"])
+
+    if findings:
+        summary = ", ".join(sorted({f"{f['detail']} ({f['function']})" for f in findings})[:5])
+        reasoning = f"Local static analysis found {len(findings)} hotspot(s): {summary}"
+    else:
+        reasoning = "Local static analysis found no performance hotspots in changed Python functions"
+    if unanalyzed:
+        reasoning += f"; not analyzed: {', '.join(unanalyzed[:5])}"
+
+    logger.info(f"Local analysis: risk={risk_score}, hotspots={len(findings)}, unanalyzed={len(unanalyzed)}")
+
+    return {
+        "risk_score": risk_score,
+        "critical_paths": critical_paths,
+        "suggested_benchmarks": [],
+        "reasoning": reasoning,
+        "suggestions": [SUGGESTIONS[kind] for kind in kinds_seen],
+        "findings": findings,
+        "unanalyzed": unanalyzed,
+        "source": "local"
+    }
@@ -4,13 +4,41 @@ Handles baseline metrics storage and comparison
 """
 import json
 import os
-from typing import Dict, Any, Optional
+import copy
+import threading
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 from datetime import datetime
 from logger import get_logger
+from tracing import span
 
 logger = get_logger(__name__)
 
+# Parsed store contents per resolved path, reused while the file is unchanged
+# (a long-running daemon otherwise re-parses the whole store for every lookup)
+_parsed: Dict[str, Any] = {}
+_parsed_lock = threading.Lock()
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    """Contents of a local state file (kept out of git, cached by CI), or {} if there is none yet"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable state file {path}: {e}")
+        return {}
+
+
+def save_state(path: str, data: Dict[str, Any]):
+    """Replace a local state file atomically, so a concurrent run never reads a partial file"""
+    tmp_path = Path(path).with_suffix(f".{os.getpid()}.tmp")
+    with span("state.write", "storage", path=str(path)), open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
 
 class BaselineStorage:
     """Manages baseline metrics storage and retrieval"""
@@ -25,13 +53,35 @@ class BaselineStorage:
             self.storage_path.write_text(json.dumps({"baselines": {}, "metadata": {}}))
             logger.info(f"Created baseline storage at {self.storage_path}")
 
+    def _read(self) -> Dict[str, Any]:
+        """
+        Parsed store contents, re-read only when the file changed on disk
+
+        The returned dictionary is shared between callers: copy what you hand out.
+        """
+        stat = self.storage_path.stat()
+        key = str(self.storage_path.resolve())
+        with _parsed_lock:
+            cached = _parsed.get(key)
+            if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+                return cached[1]
+        with span("baselines.parse", "storage", bytes=stat.st_size), open(self.storage_path, 'r') as f:
+            data = json.load(f)
+        with _parsed_lock:
+            _parsed[key] = ((stat.st_mtime_ns, stat.st_size), data)
+        return data
+
+    def _forget(self):
+        """Drop the parsed contents after a write (mtime alone can miss rapid rewrites)"""
+        with _parsed_lock:
+            _parsed.pop(str(self.storage_path.resolve()), None)
+
     def load_baselines(self) -> Dict[str, Any]:
         """Load all baselines from storage"""
         try:
-            with open(self.storage_path, 'r') as f:
-                data = json.load(f)
+            data = self._read()
             logger.info(f"Loaded {len(data.get('baselines', {}))} baselines")
-            return data.get("baselines", {})
+            return copy.deepcopy(data.get("baselines", {}))
         except Exception as e:
             logger.error(f"Failed to load baselines: {e}")
             return {}
@@ -57,8 +107,9 @@ class BaselineStorage:
             data["metadata"]["total_baselines"] = len(data["baselines"])
 
             # Save back
-            with open(self.storage_path, 'w') as f:
+            with span("baselines.write", "storage", section="baselines"), open(self.storage_path, 'w') as f:
                 json.dump(data, f, indent=2)
+            self._forget()
 
             logger.info(f"Saved baseline for {test_name}")
         except Exception as e:
@@ -120,9 +171,63 @@ class BaselineStorage:
             "changes": changes
         }
 
+    def append_timeseries(self, name: str, points: List[Dict[str, Any]], max_points: int = None):
+        """Append points to a named time series, keeping the newest max_points"""
+        try:
+            with open(self.storage_path, 'r') as f:
+                data = json.load(f)
+
+            series = data.setdefault("timeseries", {}).setdefault(name, [])
+            series.extend(points)
+            if max_points:
+                del series[:-max_points]
+
+            with span("baselines.write", "storage", section="timeseries"), open(self.storage_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            self._forget()
+
+            logger.info(f"Appended {len(points)} point(s) to {name}")
+        except Exception as e:
+            logger.error(f"Failed to append time series: {e}")
+            raise
+
+    def get_timeseries(self, name: str) -> List[Dict[str, Any]]:
+        """Get all stored points of a named time series"""
+        try:
+            return copy.deepcopy(self._read().get("timeseries", {}).get(name, []))
+        except Exception as e:
+            logger.error(f"Failed to load time series: {e}")
+            return []
+
+    def get_profiles(self) -> Dict[str, Any]:
+        """Get stored baseline profiles keyed by benchmark (empty if none yet)"""
+        try:
+            return copy.deepcopy(self._read().get("profiles", {}))
+        except Exception as e:
+            logger.error(f"Failed to load profiles: {e}")
+            return {}
+
+    def save_profiles(self, profiles: Dict[str, Any]):
+        """Replace the stored baseline profiles"""
+        try:
+            with open(self.storage_path, 'r') as f:
+                data = json.load(f)
+
+            data["profiles"] = profiles
+
+            with span("baselines.write", "storage", section="profiles"), open(self.storage_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            self._forget()
+
+            logger.info(f"Saved baseline profiles ({len(profiles)} benchmarks)")
+        except Exception as e:
+            logger.error(f"Failed to save profiles: {e}")
+            raise
+
     def clear_baselines(self):
         """Clear all baselines (use with caution)"""
         self.storage_path.write_text(json.dumps({"baselines": {}, "metadata": {}}))
+        self._forget()
         logger.warning("All baselines cleared")
 
     def export_baselines(self, export_path: str):
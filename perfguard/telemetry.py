@@ -0,0 +1,187 @@
+"""
+PerfGuard AI Provider Telemetry
+Records latency, token usage, retries and fallbacks for every LLM provider call
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from config import config
+from logger import get_logger
+from storage import load_state, save_state
+
+logger = get_logger(__name__)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank pct-th percentile of samples (0.0 without samples)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ProviderTelemetry:
+    """
+    Per-run record of provider calls
+
+    A call is one provider invocation including its retries: status is "ok",
+    "failed" or "cancelled" (a hedge that lost the race), latency is the
+    successful attempt's time or the total time spent on a failed call.
+
+    Earlier runs' calls are kept in config.TELEMETRY_PATH: a local state file
+    cached between CI runs, which also drives the hedge delay.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+        self.fallbacks = 0
+        self.hedges = 0
+        self._history: Optional[List[Dict[str, Any]]] = None  # Loaded on first use
+
+    def record_call(
+        self,
+        provider: str,
+        status: str,
+        latency: float,
+        attempts: int,
+        input_tokens: int = 0,
+        output_tokens: int = 0
+    ):
+        """Record one provider call"""
+        with self._lock:
+            self.calls.append({
+                "timestamp": datetime.now().isoformat(),
+                "provider": provider,
+                "status": status,
+                "latency": round(latency, 4),
+                "attempts": attempts,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            })
+
+    def record_fallback(self, hedged: bool = False):
+        """Record that a backup provider was called, as a hedge or after a failure"""
+        with self._lock:
+            if hedged:
+                self.hedges += 1
+            else:
+                self.fallbacks += 1
+
+    def reset(self):
+        with self._lock:
+            self.calls = []
+            self.fallbacks = 0
+            self.hedges = 0
+
+    def _stored(self) -> List[Dict[str, Any]]:
+        """Call records of earlier runs"""
+        with self._lock:
+            if self._history is None:
+                self._history = load_state(config.TELEMETRY_PATH).get("calls", [])
+            return self._history
+
+    @staticmethod
+    def _latencies(calls: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """Successful call latencies per provider, oldest first"""
+        latencies: Dict[str, List[float]] = {}
+        for call in calls:
+            if call.get("status") == "ok":
+                latencies.setdefault(call["provider"], []).append(call["latency"])
+        return latencies
+
+    def hedge_delay(self, provider: str) -> float:
+        """
+        How long to wait on a provider before hedging to the next one
+
+        Uses the configured percentile of the provider's last
+        config.HEDGE_LATENCY_SAMPLES successful calls (earlier runs and this
+        one) once enough exist, otherwise config.HEDGE_DEFAULT_DELAY.
+        """
+        history = self._stored()
+        with self._lock:
+            calls = history + self.calls
+        samples = self._latencies(calls).get(provider, [])[-config.HEDGE_LATENCY_SAMPLES:]
+
+        delay = config.HEDGE_DEFAULT_DELAY
+        if len(samples) >= config.HEDGE_MIN_SAMPLES:
+            delay = percentile(samples, config.HEDGE_PERCENTILE)
+        return max(config.HEDGE_MIN_DELAY, min(delay, config.API_TIMEOUT))
+
+    def summarize(self, history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Per-provider summary of this run
+
+        Args:
+            history: Earlier call records; latency percentiles are computed over
+                the history plus this run so a handful of calls still gives P95
+
+        Returns:
+            Dictionary with "providers" (calls, failures, retries, tokens, cost,
+            latency_p50/latency_p95), "fallbacks" and "hedges"
+        """
+        with self._lock:
+            calls = list(self.calls)
+            fallbacks, hedges = self.fallbacks, self.hedges
+
+        latencies = self._latencies((history or []) + calls)
+
+        providers = {}
+        for call in calls:
+            entry = providers.setdefault(call["provider"], {
+                "calls": 0, "failures": 0, "retries": 0,
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+            })
+            entry["calls"] += 1
+            entry["failures"] += call["status"] == "failed"
+            entry["retries"] += max(0, call["attempts"] - 1)
+            entry["input_tokens"] += call["input_tokens"]
+            entry["output_tokens"] += call["output_tokens"]
+
+        for provider, entry in providers.items():
+            prices = config.PROVIDER_TOKEN_PRICES.get(provider, {"input": 0.0, "output": 0.0})
+            entry["cost_usd"] = round(
+                (entry["input_tokens"] * prices["input"] + entry["output_tokens"] * prices["output"]) / 1_000_000,
+                4
+            )
+            samples = latencies.get(provider, [])
+            entry["latency_samples"] = len(samples)
+            entry["latency_p50"] = percentile(samples, 50)
+            entry["latency_p95"] = percentile(samples, 95)
+
+        return {"providers": providers, "fallbacks": fallbacks, "hedges": hedges}
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Append this run's calls to config.TELEMETRY_PATH and summarize
+
+        Returns:
+            Summary from summarize(), with percentiles over the stored history
+        """
+        with self._lock:
+            calls = list(self.calls)
+
+        # Re-read: other PerfGuard processes may have flushed since it was loaded
+        history = load_state(config.TELEMETRY_PATH).get("calls", [])
+        stored = (history + calls)[-config.TELEMETRY_HISTORY_SIZE:]
+        try:
+            if calls:
+                save_state(config.TELEMETRY_PATH, {"calls": stored})
+        except Exception as e:
+            logger.warning(f"Could not store provider telemetry: {e}")
+        with self._lock:
+            self._history = stored
+
+        summary = self.summarize(history)
+        for provider, entry in summary["providers"].items():
+            logger.info(
+                f"📈 {provider}: {entry['calls']} call(s), {entry['retries']} retries, "
+                f"{entry['input_tokens']}/{entry['output_tokens']} tokens in/out, "
+                f"P50 {entry['latency_p50']:.2f}s P95 {entry['latency_p95']:.2f}s"
+            )
+        return summary
+
+
+# Shared by every AIAnalyzer in the process; main flushes it once per run
+telemetry = ProviderTelemetry()
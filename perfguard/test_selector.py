@@ -0,0 +1,243 @@
+"""
+PerfGuard AI Benchmark Selection
+Resolves AI-suggested benchmark names and critical paths to concrete pytest node IDs
+"""
+import ast
+import difflib
+import subprocess
+from fnmatch import fnmatch
+from typing import Dict, Any, List, Set
+from pathlib import Path
+from config import config
+from logger import get_logger
+from perf_suite import is_test_path, test_environment
+
+logger = get_logger(__name__)
+
+PERFGUARD_DIR = Path(__file__).resolve().parent
+
+
+def collect_perf_tests(test_path: str = None) -> List[str]:
+    """
+    List perf test node IDs via pytest --collect-only
+
+    Args:
+        test_path: Optional path to restrict collection to
+
+    Returns:
+        List of node IDs like "sample-app/tests/test_perf.py::test_api_get_all_movies"
+    """
+    # -qq offsets the -v in pytest.ini addopts so pytest prints bare node IDs
+    cmd = ["pytest", "-m", config.PYTEST_MARKERS, "--collect-only", "-qq", "-p", "no:cacheprovider"]
+    if test_path:
+        cmd.append(test_path)
+
+    try:
+        result = subprocess.run(cmd, env=test_environment(), capture_output=True, text=True, timeout=120)
+    except Exception as e:
+        logger.error(f"Could not collect perf tests: {e}")
+        return []
+
+    return [line.strip() for line in result.stdout.splitlines() if "::" in line and not line.startswith(" ")]
+
+
+def _test_references(node_ids: List[str]) -> Dict[str, Set[str]]:
+    """Identifiers referenced by each test (function body names/attributes plus module imports)"""
+    references: Dict[str, Set[str]] = {}
+    parsed: Dict[str, ast.Module] = {}
+
+    for node_id in node_ids:
+        file_path, _, test_name = node_id.partition("::")
+        test_name = test_name.split("[", 1)[0]
+        if file_path not in parsed:
+            try:
+                parsed[file_path] = ast.parse(Path(file_path).read_text(encoding="utf-8"))
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                parsed[file_path] = None
+        tree = parsed[file_path]
+
+        names = set()
+        if tree is not None:
+            for node in tree.body:
+                if isinstance(node, ast.ImportFrom) and node.module:
+                    names.add(node.module.split(".")[-1])
+                elif isinstance(node, ast.Import):
+                    names.update(alias.name.split(".")[-1] for alias in node.names)
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == test_name:
+                    for child in ast.walk(node):
+                        if isinstance(child, ast.Name):
+                            names.add(child.id)
+                        elif isinstance(child, ast.Attribute):
+                            names.add(child.attr)
+                        elif isinstance(child, ast.Constant) and isinstance(child.value, str):
+                            names.add(child.value)
+        references[node_id] = names
+
+    return references
+
+
+def _function_name(node_id: str) -> str:
+    return node_id.partition("::")[2].split("[", 1)[0]
+
+
+def _match_benchmark_name(name: str, node_ids: List[str]) -> List[str]:
+    """Node IDs for a suggested benchmark name: exact, then substring, then close match"""
+    name = name.split("::")[-1].strip()
+    if not name:
+        return []
+
+    exact = [n for n in node_ids if _function_name(n) == name]
+    if exact:
+        return exact
+
+    lowered = name.lower()
+    partial = [n for n in node_ids if lowered in _function_name(n).lower()]
+    if partial:
+        return partial
+
+    function_names = sorted({_function_name(n) for n in node_ids})
+    close = difflib.get_close_matches(name, function_names, n=2, cutoff=config.BENCHMARK_MATCH_CUTOFF)
+    return [n for n in node_ids if _function_name(n) in close]
+
+
+def find_covering_tests(symbols: List[str], node_ids: List[str] = None) -> Dict[str, List[str]]:
+    """
+    Perf tests that reference each symbol (function name)
+
+    Args:
+        symbols: Function names to look up
+        node_ids: Perf test node IDs (collected when omitted)
+
+    Returns:
+        Dictionary of symbol -> node IDs referencing it (empty list when uncovered)
+    """
+    if node_ids is None:
+        node_ids = collect_perf_tests()
+    references = _test_references(node_ids)
+    return {
+        symbol: [node_id for node_id, names in references.items() if symbol in names]
+        for symbol in symbols
+    }
+
+
+def _changed_sources(changed_files: List[str]) -> List[str]:
+    """Changed non-test Python files of the code under test (PerfGuard's own files excluded)"""
+    ignored = config.IMPACT_IGNORE_PATTERNS + config.DIFF_EXCLUDE_PATTERNS
+    sources = []
+    for path in changed_files:
+        if not path.endswith(".py") or is_test_path(path) or any(fnmatch(path, p) for p in ignored):
+            continue
+        if PERFGUARD_DIR in Path(path).resolve().parents:
+            continue
+        sources.append(path)
+    return sources
+
+
+def find_importing_tests(sources: List[str], node_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Perf tests whose test file loads each source file, directly or transitively
+
+    A test file with an unresolvable import counts as loading every file.
+
+    Args:
+        sources: Repository-relative source paths
+        node_ids: Perf test node IDs
+
+    Returns:
+        Dictionary of source path -> node IDs (empty list when no test loads it)
+    """
+    from fingerprint import Fingerprinter
+
+    fingerprinter = Fingerprinter()
+    closures = {}
+    for node_id in node_ids:
+        test_file = node_id.partition("::")[0]
+        if test_file not in closures:
+            closures[test_file] = fingerprinter.closure(test_file)
+    return {
+        source: [
+            node_id for node_id in node_ids
+            if closures[node_id.partition("::")[0]] is None or source in closures[node_id.partition("::")[0]]
+        ]
+        for source in sources
+    }
+
+
+def select_benchmarks(
+    suggested_benchmarks: List[str] = None,
+    critical_paths: List[str] = None,
+    changed_files: List[str] = None,
+    node_ids: List[str] = None,
+    impacted: Dict[str, List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Resolve suggestions and critical paths to the perf tests worth running
+
+    - Suggested names match test function names (exact, substring, or close match)
+    - "file.py::function" critical paths select tests that reference the function
+    - Module-level critical paths select tests that import the module
+    - Perf tests defined in changed files are always selected
+    - Changed source files select the tests that import them; a changed source
+      file no test imports selects the whole suite, since it may be loaded in
+      ways the import scan cannot see
+    - config.CANARY_BENCHMARKS always run
+
+    When impacted (node ID -> reasons, from ImpactIndex.select) is given, it
+    replaces the suggestion and critical-path heuristics: coverage says exactly
+    which tests execute the changed lines.
+
+    Returns:
+        Dictionary with "selected" node IDs, "all" collected node IDs and "reasons"
+    """
+    if node_ids is None:
+        node_ids = collect_perf_tests()
+
+    reasons: Dict[str, List[str]] = {}
+
+    def add(node_id: str, reason: str):
+        reasons.setdefault(node_id, []).append(reason)
+
+    if impacted is not None:
+        suggested_benchmarks = critical_paths = None
+        for node_id in node_ids:
+            for reason in impacted.get(node_id, []):
+                add(node_id, reason)
+
+    for name in suggested_benchmarks or []:
+        for node_id in _match_benchmark_name(str(name), node_ids):
+            add(node_id, f"suggested: {name}")
+
+    references = _test_references(node_ids) if critical_paths else {}
+    for path in critical_paths or []:
+        path = str(path)
+        module_path, _, function = path.partition("::")
+        if function:
+            symbol = function.split(".")[-1]
+            kind = "function"
+        else:
+            symbol = Path(module_path).stem
+            kind = "module"
+        for node_id, names in references.items():
+            if symbol and symbol in names:
+                add(node_id, f"critical {kind}: {path}")
+
+    for changed in changed_files or []:
+        for node_id in node_ids:
+            if node_id.partition("::")[0] == changed:
+                add(node_id, f"changed test file: {changed}")
+
+    if impacted is None:
+        for source, covering in find_importing_tests(_changed_sources(changed_files or []), node_ids).items():
+            for node_id in covering or node_ids:
+                add(node_id, f"changed module: {source}" if covering else f"unmapped change: {source}")
+
+    for name in config.CANARY_BENCHMARKS:
+        for node_id in _match_benchmark_name(name, node_ids):
+            add(node_id, "canary")
+
+    selected = [n for n in node_ids if n in reasons]
+    logger.info(f"Selected {len(selected)}/{len(node_ids)} perf benchmarks")
+    for node_id in selected:
+        logger.info(f"  {node_id} ({'; '.join(reasons[node_id])})")
+
+    return {"selected": selected, "all": node_ids, "reasons": reasons}
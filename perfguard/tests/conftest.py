@@ -0,0 +1,10 @@
+"""
+PerfGuard AI unit tests
+
+PerfGuard's modules import each other by bare name, as main.py runs them;
+run with `pytest perfguard/tests`.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,88 @@
+import pytest
+
+import ab_runner
+from ab_runner import paired_change, run_ab
+from config import config
+
+
+@pytest.mark.unit
+def test_consistent_slowdown_is_significant():
+    result = paired_change([1.0, 2.0, 1.5, 1.2], [1.1, 2.2, 1.65, 1.32])
+
+    assert result["change_percent"] == pytest.approx(10.0)
+    assert result["ci_percent"] == pytest.approx(0.0, abs=1e-9)
+    assert result["significant"] and result["rounds"] == 4
+
+
+@pytest.mark.unit
+def test_noisy_rounds_are_within_noise():
+    result = paired_change([1.0, 1.0, 1.0], [1.2, 0.9, 1.0])
+
+    assert result["change_percent"] == pytest.approx(10 / 3)
+    assert result["ci_percent"] > abs(result["change_percent"])
+    assert not result["significant"]
+
+
+@pytest.mark.unit
+def test_single_or_empty_rounds_have_no_interval():
+    assert paired_change([1.0], [2.0]) == {"change_percent": 100.0, "ci_percent": None, "significant": False, "rounds": 1}
+    assert paired_change([0.0], [1.0])["rounds"] == 0
+
+
+@pytest.fixture
+def ab(monkeypatch):
+    """run_ab against canned rounds: {"base": [round, ...], "head": [round, ...]}"""
+    rounds = {"base": [], "head": []}
+
+    class Pool:
+        def __init__(self, size, name):
+            pass
+
+        def prepare(self):
+            return ["/worktree/base"]
+
+    monkeypatch.setattr(ab_runner, "merge_base", lambda base_ref: "b" * 40)
+    monkeypatch.setattr(ab_runner, "WorktreePool", Pool)
+    monkeypatch.setattr(ab_runner, "checkout", lambda worktree, sha: None)
+    monkeypatch.setattr(
+        ab_runner, "_run_round",
+        lambda cwd, node_ids: rounds["base" if cwd == "/worktree/base" else "head"].pop(0)
+    )
+    monkeypatch.setattr(config, "AB_REQUIRE_SIGNIFICANCE", True)
+    return rounds
+
+
+@pytest.mark.unit
+def test_run_ab_pairs_benchmarks_measured_on_both_sides(ab):
+    ab["base"] = [{"t::a": 1.0, "t::b": 2.0}, {"t::a": 1.2, "t::b": 2.4}]
+    ab["head"] = [{"t::a": 1.1, "t::b": 2.2, "t::new": 5.0}, {"t::a": 1.32, "t::b": 2.64, "t::new": 5.0}]
+
+    result = run_ab("main", rounds=2)
+
+    assert result["change_percent"] == pytest.approx(10.0)
+    assert result["current"] / result["baseline"] == pytest.approx(1.1)
+    assert sorted(result["benchmarks"]) == ["t::a", "t::b"]
+    assert result["ab"]["unpaired"] == ["t::new"]
+    assert result["ab"]["base_sha"] == "b" * 40
+
+
+@pytest.mark.unit
+def test_run_ab_reports_no_change_within_noise(ab):
+    ab["base"] = [{"t::a": 1.0}, {"t::a": 1.0}, {"t::a": 1.0}]
+    ab["head"] = [{"t::a": 1.2}, {"t::a": 0.9}, {"t::a": 1.0}]
+
+    result = run_ab("main", rounds=3)
+
+    assert result["change_percent"] == 0.0
+    assert result["baseline"] == result["current"]
+    assert result["ab"]["change_percent"] == pytest.approx(10 / 3)
+
+
+@pytest.mark.unit
+def test_run_ab_falls_back_without_paired_benchmarks(ab, monkeypatch):
+    ab["base"] = [{}]
+    ab["head"] = [{"t::a": 1.0}]
+    assert run_ab("main", rounds=1) is None
+
+    monkeypatch.setattr(ab_runner, "merge_base", lambda base_ref: None)
+    assert run_ab("main", rounds=1) is None
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+import calibration
+import metrics_collector
+from calibration import get_calibration, normalize_baseline, speed_factor
+from config import config
+from metrics_collector import MetricsCollector
+
+RECORDED = {"python": 1.0, "memory": 1.0, "syscall": 1.0}
+
+
+@pytest.mark.unit
+def test_speed_factor_is_a_weighted_geometric_mean():
+    current = {"python": 2.0, "memory": 1.0, "syscall": 1.0}
+
+    assert speed_factor("execution_time", current, RECORDED) == pytest.approx(2 ** 0.6)
+    assert speed_factor("cpu_utilization", current, RECORDED) == pytest.approx(math.sqrt(2))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("metric, current, recorded", [
+    ("memory_rss", RECORDED, RECORDED),                         # Not normalized
+    ("execution_time", {"python": 1.0}, RECORDED),              # Incomplete vector
+    ("execution_time", RECORDED, None),                         # Baseline without calibration
+    ("execution_time", {**RECORDED, "python": 0.0}, RECORDED),  # Unusable measurement
+])
+def test_speed_factor_is_none_when_it_cannot_be_computed(metric, current, recorded):
+    assert speed_factor(metric, current, recorded) is None
+
+
+@pytest.mark.unit
+def test_normalize_baseline_scales_the_suite_and_each_benchmark():
+    baseline = {"current": 1.0, "benchmarks": {"t::a": 0.5}, "calibration": RECORDED}
+    slower = {"python": 1.5, "memory": 1.5, "syscall": 1.5}
+
+    normalized = normalize_baseline("execution_time", baseline, slower)
+
+    assert normalized["current"] == pytest.approx(1.5)
+    assert normalized["benchmarks"]["t::a"] == pytest.approx(0.75)
+    assert normalized["calibration_factor"] == pytest.approx(1.5)
+    assert baseline["current"] == 1.0
+
+
+@pytest.mark.unit
+def test_small_speed_differences_are_left_as_noise():
+    baseline = {"current": 1.0, "calibration": RECORDED}
+    close = {"python": 1.01, "memory": 1.01, "syscall": 1.01}
+
+    assert normalize_baseline("execution_time", baseline, close) is baseline
+
+
+@pytest.mark.unit
+def test_calibration_is_measured_once_per_host_and_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALIBRATION_CACHE_PATH", str(tmp_path / "calibration.json"))
+    monkeypatch.setattr(calibration, "host_key", lambda: "runner-1")
+    measured = []
+    monkeypatch.setattr(calibration, "measure", lambda: measured.append(1) or dict(RECORDED))
+
+    first = get_calibration()
+    assert get_calibration() == first
+    get_calibration(force=True)
+
+    assert len(measured) == 2
+
+
+@pytest.mark.unit
+def test_rebaseline_records_the_runner_calibration(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BASELINE_STORAGE_PATH", str(tmp_path / "baselines.json"))
+    monkeypatch.setattr(config, "CALIBRATION_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILE_ON_REGRESSION", False)
+    monkeypatch.setattr(metrics_collector, "get_calibration", lambda: {"vector": RECORDED})
+    collector = MetricsCollector()
+    collector._save_baseline("execution_time", {"current": 9.0, "benchmarks": {"t::a": 9.0}})
+    for collect in ("collect_execution_time", "collect_memory_usage", "collect_cpu_utilization", "collect_io_latency"):
+        monkeypatch.setattr(collector, collect, lambda test_path=None: {"current": 1.0, "benchmarks": {"t::a": 1.0}})
+
+    collector.record_baselines()
+
+    stored = collector.storage.get_baseline("execution_time")
+    assert stored["current"] == 1.0
+    assert stored["calibration"] == RECORDED
+    assert stored["method_version"] == config.METRIC_METHOD_VERSIONS.get("execution_time", 1)
@@ -0,0 +1,32 @@
+import pytest
+
+from checkpoint import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore("run", directory=str(tmp_path))
+
+
+@pytest.mark.unit
+def test_completed_stage_is_resumed(store):
+    assert store.resume("score", lambda: {"performance_score": 90}) == {"performance_score": 90}
+
+    assert store.resume("score", lambda: {"performance_score": 10}) == {"performance_score": 90}
+    assert store.resumed == ["score"]
+
+
+@pytest.mark.unit
+def test_failed_collector_results_are_not_saved(store):
+    store.resume("metrics", lambda: {"memory_rss": {"current": 0, "failed": True}})
+
+    assert store.load("metrics") is None
+
+
+@pytest.mark.unit
+def test_finished_run_is_not_replayed(store):
+    store.resume("score", lambda: {"performance_score": 90})
+    store.discard()
+
+    assert store.load("score") is None
+    assert store.resume("score", lambda: {"performance_score": 10}) == {"performance_score": 10}
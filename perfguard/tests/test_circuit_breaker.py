@@ -0,0 +1,103 @@
+import os
+import time
+
+import pytest
+
+from ai_analyzer import AIAnalyzer
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from config import config
+
+
+@pytest.fixture
+def breaker(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(config, "CIRCUIT_RESET_TIMEOUT", 60)
+    return CircuitBreaker(str(tmp_path / "circuit.json"))
+
+
+def as_caller(breaker, monkeypatch, thread):
+    monkeypatch.setattr(breaker, "_caller", lambda: f"{os.getpid()}-{thread}")
+
+
+def trip(breaker):
+    breaker.record_failure("anthropic")
+    breaker.record_failure("anthropic")
+    with breaker._locked_state() as state:
+        state["anthropic"]["opened_at"] = time.time() - config.CIRCUIT_RESET_TIMEOUT - 1
+
+
+@pytest.mark.unit
+def test_failures_open_the_circuit(breaker):
+    breaker.record_failure("anthropic")
+    assert breaker.state("anthropic") == CLOSED
+    breaker.record_failure("anthropic")
+
+    assert breaker.state("anthropic") == OPEN
+    assert not breaker.allow("anthropic")
+
+
+@pytest.mark.unit
+def test_half_open_admits_exactly_one_probe(breaker, monkeypatch):
+    trip(breaker)
+
+    as_caller(breaker, monkeypatch, 1)
+    assert breaker.allow("anthropic")
+    assert breaker.allow("anthropic")  # The owner may retry
+    as_caller(breaker, monkeypatch, 2)
+    assert not breaker.allow("anthropic")
+    assert breaker.state("anthropic") == HALF_OPEN
+
+
+@pytest.mark.unit
+def test_probe_outcome_closes_or_reopens(breaker, monkeypatch):
+    trip(breaker)
+    assert breaker.allow("anthropic")
+    breaker.record_failure("anthropic")
+    assert breaker.state("anthropic") == OPEN
+
+    trip(breaker)
+    assert breaker.allow("anthropic")
+    breaker.record_success("anthropic")
+    assert breaker.state("anthropic") == CLOSED
+
+
+@pytest.mark.unit
+def test_released_probe_goes_to_the_next_caller(breaker, monkeypatch):
+    trip(breaker)
+    as_caller(breaker, monkeypatch, 1)
+    assert breaker.allow("anthropic")
+
+    as_caller(breaker, monkeypatch, 2)
+    breaker.release_probe("anthropic")  # Not the owner: no effect
+    assert not breaker.allow("anthropic")
+
+    as_caller(breaker, monkeypatch, 1)
+    breaker.release_probe("anthropic")
+    as_caller(breaker, monkeypatch, 2)
+    assert breaker.allow("anthropic")
+    assert breaker.state("anthropic") == HALF_OPEN
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("outcome", [None, RuntimeError("cancelled or client error")])
+def test_provider_call_releases_the_probe_on_every_exit(breaker, monkeypatch, outcome):
+    analyzer = AIAnalyzer.__new__(AIAnalyzer)
+    analyzer.anthropic_client = object()
+    analyzer.circuit_breaker = breaker
+
+    def attempts(prompt, max_retries, cancel_event=None):
+        if outcome is not None:
+            raise outcome
+        return None
+
+    analyzer._anthropic_attempts = attempts
+    trip(breaker)
+
+    if outcome is None:
+        assert analyzer._call_anthropic("prompt", 1) is None
+    else:
+        with pytest.raises(RuntimeError):
+            analyzer._call_anthropic("prompt", 1)
+
+    as_caller(breaker, monkeypatch, "other")
+    assert breaker.allow("anthropic")
@@ -0,0 +1,100 @@
+import pytest
+
+from ai_analyzer import AIAnalyzer
+from config import config
+from diff_parser import chunk_diff, parse_diff
+
+
+def file_diff(path, lines, start=1):
+    body = "".join(f"+line {n} of {path}\n" for n in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -{start},0 +{start},{lines} @@\n{body}"
+    )
+
+
+@pytest.fixture
+def chars(monkeypatch):
+    monkeypatch.setattr(config, "CHARS_PER_TOKEN", 1)
+
+
+@pytest.mark.unit
+def test_small_diff_is_one_chunk(chars):
+    diff = file_diff("a.py", 3)
+
+    assert chunk_diff(diff, max_tokens=10_000) == [diff]
+    assert chunk_diff("  \n", max_tokens=10_000) == []
+
+
+@pytest.mark.unit
+def test_files_are_packed_whole_within_the_budget(chars):
+    files = [file_diff(f"m{n}.py", 5) for n in range(4)]
+    budget = len(files[0]) * 2 + 10
+
+    chunks = chunk_diff("".join(files), max_tokens=budget)
+
+    assert chunks == [files[0] + files[1], files[2] + files[3]]
+
+
+@pytest.mark.unit
+def test_oversized_file_is_split_on_hunks_with_its_header(chars):
+    diff = file_diff("big.py", 20) + file_diff("big.py", 20, start=100).split("+++ b/big.py\n", 1)[1]
+    hunks = parse_diff(diff)[0]["hunks"]
+    assert len(hunks) == 2
+
+    chunks = chunk_diff(diff, max_tokens=len(diff) - 10)
+
+    assert len(chunks) == 2
+    for chunk, hunk in zip(chunks, hunks):
+        assert chunk.startswith("diff --git a/big.py b/big.py")
+        assert chunk.endswith(hunk)
+
+
+@pytest.mark.unit
+def test_oversized_hunk_is_split_on_lines(chars):
+    diff = file_diff("huge.py", 200)
+    budget = 800
+
+    chunks = chunk_diff(diff, max_tokens=budget)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= budget for chunk in chunks)
+    added = [line for chunk in chunks for line in chunk.splitlines() if line.startswith("+line")]
+    assert added == [f"+line {n} of huge.py" for n in range(200)]
+
+
+def result(risk, **fields):
+    return {"risk_score": risk, "critical_paths": [], "suggested_benchmarks": [], "reasoning": "", "suggestions": [],
+            **fields}
+
+
+@pytest.mark.unit
+def test_merge_takes_the_highest_risk_and_unions_lists():
+    merged = AIAnalyzer.merge_analysis_results([
+        result(0.2, critical_paths=["a.py::f"], suggestions=["Cache the lookup"], reasoning="first"),
+        result(0.7, critical_paths=["a.py::f", "b.py::g"], suggestions=["cache the lookup "], reasoning="second"),
+    ])
+
+    assert merged["risk_score"] == 0.7
+    assert merged["critical_paths"] == ["a.py::f", "b.py::g"]
+    assert merged["suggestions"] == ["Cache the lookup"]
+    assert merged["reasoning"] == "first second"
+
+
+@pytest.mark.unit
+def test_weighted_merge_and_overall_risk(monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_RISK_MERGE", "weighted")
+
+    merged = AIAnalyzer.merge_analysis_results([
+        result(0.2, overall_risk="medium", perf_impact="Small"),
+        result(0.8, overall_risk="high", perf_impact="Large"),
+    ], weights=[3, 1])
+
+    assert merged["risk_score"] == pytest.approx(0.35)
+    assert merged["overall_risk"] == "high"
+    assert merged["perf_impact"] == "Large"
+
+
+@pytest.mark.unit
+def test_merge_of_nothing_is_a_valid_result():
+    assert AIAnalyzer.merge_analysis_results([])["risk_score"] == 0.5
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from config import config
+from impact_index import ImpactIndex
+
+
+@pytest.mark.unit
+def test_index_lives_in_its_own_state_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    baselines = tmp_path / config.BASELINE_STORAGE_PATH
+    baselines.write_text(json.dumps({"baselines": {}, "metadata": {}}))
+
+    index = ImpactIndex()
+    index.commit = "abc"
+    index.tests = {"tests/test_perf.py::test_a"}
+    index.files = {"app.py": {"sha": "123", "imports": {1, 2}, "tests": {"tests/test_perf.py::test_a": {5, 6, 7}}}}
+    index.save()
+
+    reloaded = ImpactIndex()
+    assert reloaded.commit == "abc"
+    assert reloaded.files["app.py"]["tests"] == {"tests/test_perf.py::test_a": {5, 6, 7}}
+    assert "impact_index" not in json.loads(baselines.read_text())
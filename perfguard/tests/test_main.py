@@ -0,0 +1,84 @@
+import pytest
+
+import ai_analyzer
+import static_analyzer
+from config import config
+from main import run_analysis
+
+
+class FakeAnalyzer:
+    calls = 0
+
+    def analyze_diff(self, diff, changed_files):
+        FakeAnalyzer.calls += 1
+        return {"risk_score": 0.9, "critical_paths": [], "suggestions": [], "reasoning": "llm"}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    FakeAnalyzer.calls = 0
+    monkeypatch.setattr(ai_analyzer, "AIAnalyzer", FakeAnalyzer)
+    monkeypatch.setattr(config, "LOCAL_ANALYSIS_ENABLED", True)
+    monkeypatch.setattr(config, "ANTHROPIC_API_KEY", "test-key")
+    return FakeAnalyzer
+
+
+def _local(monkeypatch, risk, unanalyzed):
+    result = {
+        "risk_score": risk, "critical_paths": [], "suggested_benchmarks": [], "reasoning": "local",
+        "suggestions": [], "findings": [], "unanalyzed": unanalyzed, "source": "local"
+    }
+    monkeypatch.setattr(static_analyzer, "analyze_diff_locally", lambda diff: result)
+
+
+@pytest.mark.unit
+def test_low_local_risk_skips_the_llm(llm, monkeypatch):
+    _local(monkeypatch, 0.0, [])
+
+    assert run_analysis("diff", ["mod.py"])["source"] == "local"
+    assert llm.calls == 0
+
+
+@pytest.mark.unit
+def test_unanalyzed_changes_go_to_the_llm(llm, monkeypatch):
+    _local(monkeypatch, 0.0, ["web/app.js"])
+
+    assert run_analysis("diff", ["web/app.js"])["risk_score"] == 0.9
+    assert llm.calls == 1
+
+
+@pytest.mark.unit
+def test_suite_metrics_overlap_with_the_analysis(monkeypatch):
+    import threading
+
+    import main
+    import metrics_collector
+
+    for name, value in (("CHECKPOINT_ENABLED", False), ("GENERATE_BENCHMARKS", False),
+                        ("BENCHMARK_SELECTION_ENABLED", True), ("IMPACT_INDEX_ENABLED", False),
+                        ("PROFILE_ON_REGRESSION", False)):
+        monkeypatch.setattr(config, name, value)
+    suite_started = threading.Event()
+
+    def analysis(diff, changed_files):
+        # Returns only once the suite collectors started, i.e. while the analysis was pending
+        assert suite_started.wait(5)
+        return {"risk_score": 0.1, "critical_paths": [], "suggested_benchmarks": ["test_a"]}
+
+    def suite_metrics(checkpoints=None):
+        suite_started.set()
+        return {"memory_rss": {"current": 1.0, "baseline": 1.0, "change_percent": 0.0}}
+
+    def metrics(suggested_benchmarks=None, suite_metrics=None, **kwargs):
+        return {**suite_metrics, "execution_time": {"benchmarks_run": len(suggested_benchmarks)}}
+
+    monkeypatch.setattr(main, "run_analysis", analysis)
+    monkeypatch.setattr(metrics_collector, "collect_suite_metrics", suite_metrics)
+    monkeypatch.setattr(metrics_collector, "collect_metrics", metrics)
+    monkeypatch.setattr(main, "calculate_score", lambda metrics, analysis: {"metrics": metrics, "details": {}})
+    monkeypatch.setattr(main, "refine_borderline_score", lambda score, analysis: score)
+
+    score = main.run_pipeline("diff", ["app.py"], 0.0, 0.0)
+
+    assert score["metrics"]["memory_rss"]["current"] == 1.0
+    assert score["metrics"]["execution_time"]["benchmarks_run"] == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from config import config
+from metrics_collector import MetricsCollector
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BASELINE_STORAGE_PATH", str(tmp_path / "baselines.json"))
+    monkeypatch.setattr(config, "CALIBRATION_ENABLED", False)
+    monkeypatch.setattr(config, "BENCHMARK_REUSE_ENABLED", False)
+    monkeypatch.setattr(config, "PROFILE_ON_REGRESSION", False)
+    return MetricsCollector()
+
+
+@pytest.mark.unit
+def test_subset_run_still_measures_suite_level_metrics(collector, monkeypatch):
+    collector._save_baseline("execution_time", {"current": 2.0, "benchmarks": {"t.py::a": 1.0, "t.py::b": 1.0}})
+    for name in ("memory_rss", "cpu_utilization", "io_latency"):
+        collector._save_baseline(name, {"current": 100.0})
+
+    suite_runs = []
+
+    def suite(test_path=None):
+        suite_runs.append(test_path)
+        return {"current": 120.0}
+
+    monkeypatch.setattr(collector, "collect_execution_time", lambda test_path, node_ids: {
+        "current": 1.0, "benchmarks": {"t.py::a": 1.0}
+    })
+    monkeypatch.setattr(collector, "collect_memory_usage", suite)
+    monkeypatch.setattr(collector, "collect_cpu_utilization", suite)
+    monkeypatch.setattr(collector, "collect_io_latency", suite)
+
+    metrics = collector.collect_all_metrics(selected_tests=["t.py::a"])
+
+    assert suite_runs == [None, None, None]
+    for name in ("memory_rss", "cpu_utilization", "io_latency"):
+        assert metrics[name]["change_percent"] == pytest.approx(20.0)
+    assert metrics["execution_time"]["benchmarks_run"] == 1
+
+
+@pytest.mark.unit
+def test_reused_benchmarks_do_not_skip_suite_level_metrics(collector, monkeypatch):
+    import fingerprint
+    import test_selector
+
+    class FullyReused:
+        def lookup(self, node_ids):
+            return {name: {"mean": 1.0, "recorded": ""} for name in node_ids}
+
+    monkeypatch.setattr(config, "BENCHMARK_REUSE_ENABLED", True)
+    monkeypatch.setattr(fingerprint, "BenchmarkCache", FullyReused)
+    monkeypatch.setattr(test_selector, "collect_perf_tests", lambda test_path: ["t.py::a", "t.py::b"])
+    collector._save_baseline("execution_time", {"current": 1.0, "benchmarks": {"t.py::a": 1.0, "t.py::b": 1.0}})
+
+    suite_runs = []
+
+    def suite(test_path=None):
+        suite_runs.append(test_path)
+        return {"current": 100.0}
+
+    monkeypatch.setattr(collector, "collect_execution_time", lambda *args: pytest.fail("all benchmarks were reused"))
+    monkeypatch.setattr(collector, "collect_memory_usage", suite)
+    monkeypatch.setattr(collector, "collect_cpu_utilization", suite)
+    monkeypatch.setattr(collector, "collect_io_latency", suite)
+
+    metrics = collector.collect_all_metrics()
+
+    assert suite_runs == [None, None, None]
+    assert metrics["execution_time"]["benchmarks_reused"] == 2
@@ -0,0 +1,28 @@
+import pytest
+
+import perf_suite
+
+
+@pytest.mark.unit
+def test_only_perfguard_credentials_are_scrubbed(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-test")
+    monkeypatch.setenv("GH_TOKEN", "ghp-test")
+    monkeypatch.setenv("DB_PASSWORD", "hunter2")
+    monkeypatch.setenv("STRIPE_SECRET_KEY", "sk-stripe")
+
+    env = perf_suite.test_environment()
+
+    assert "ANTHROPIC_API_KEY" not in env and "GH_TOKEN" not in env
+    assert env["DB_PASSWORD"] == "hunter2"
+    assert env["STRIPE_SECRET_KEY"] == "sk-stripe"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("path, expected", [
+    ("tests/test_api.py", True),
+    ("app/conftest.py", True),
+    ("perfguard_generated_tests/test_slow.py", True),
+    ("app/contest.py", False),
+])
+def test_is_test_path(path, expected):
+    assert perf_suite.is_test_path(path) is expected
@@ -0,0 +1,116 @@
+import subprocess
+
+import pytest
+
+from main import merge_with_prior
+from pr_state import PRStateStore, get_interdiff, plan_incremental
+
+
+def git(*args):
+    return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def commit(files, message):
+    for path, content in files.items():
+        with open(path, "w") as f:
+            f.write(content)
+    git("add", "-A")
+    git("commit", "-qm", message)
+    return git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    (tmp_path / "repo").mkdir()
+    monkeypatch.chdir(tmp_path / "repo")
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "dev")
+    commit({"slow.py": "def f():\n    return 1\n", "other.py": "x = 1\n", "lib.py": "y = 1\n"}, "base")
+    git("checkout", "-qb", "pr")
+    return tmp_path
+
+
+@pytest.fixture
+def store(repo):
+    return PRStateStore(str(repo / "state.json"))
+
+
+def analysis(risk):
+    return {"risk_score": risk, "critical_paths": [], "suggested_benchmarks": [], "reasoning": "", "suggestions": []}
+
+
+@pytest.mark.unit
+def test_interdiff_lists_files_whose_pr_diff_changed(repo):
+    first = commit({"slow.py": "def f():\n    return 2\n", "other.py": "x = 2\n"}, "p1")
+    second = commit({"other.py": "x = 3\n"}, "p2")
+
+    changed, current = get_interdiff(first, second, "main")
+
+    assert changed == ["other.py"]
+    assert sorted(current) == ["other.py", "slow.py"]
+
+
+@pytest.mark.unit
+def test_interdiff_ignores_changes_merged_from_the_base_branch(repo):
+    first = commit({"slow.py": "def f():\n    return 2\n"}, "p1")
+    git("checkout", "-q", "main")
+    commit({"lib.py": "y = 2\n"}, "main moves on")
+    git("checkout", "-q", "pr")
+    git("merge", "-q", "--no-edit", "main")
+
+    assert get_interdiff(first, git("rev-parse", "HEAD"), "main") is None
+
+
+@pytest.mark.unit
+def test_interdiff_counts_a_revert_as_a_change(repo):
+    first = commit({"slow.py": "def f():\n    return 2\n"}, "p1")
+    second = commit({"slow.py": "def f():\n    return 1\n"}, "revert")
+
+    changed, current = get_interdiff(first, second, "main")
+
+    assert changed == ["slow.py"]
+    assert current == {}
+
+
+@pytest.mark.unit
+def test_same_size_fix_replaces_the_stale_high_risk(store):
+    first = commit({
+        "slow.py": "import time\ndef f():\n    time.sleep(5)\n",
+        "other.py": "x = 2\n",
+    }, "p1")
+    store.record("7", first, analysis(0.9), {}, [
+        {"files": ["slow.py"], "analysis": analysis(0.9)},
+        {"files": ["other.py"], "analysis": analysis(0.1)},
+    ])
+    second = commit({"slow.py": "import time\ndef f():\n    pass\n"}, "fix in place")
+
+    plan = plan_incremental(store, "7", second, "main")
+
+    assert plan["changed_files"] == ["slow.py"]
+    assert [group["files"] for group in plan["kept"]] == [["other.py"]]
+    merged = merge_with_prior(analysis(0.05), plan)
+    assert merged["risk_score"] == 0.1
+    assert [group["files"] for group in merged["analysis_groups"]] == [["other.py"], ["slow.py"]]
+
+
+@pytest.mark.unit
+def test_reverted_file_drops_out_of_the_analysis(store):
+    first = commit({"slow.py": "import time\ndef f():\n    time.sleep(5)\n"}, "p1")
+    store.record("7", first, analysis(0.9), {}, [{"files": ["slow.py"], "analysis": analysis(0.9)}])
+    second = commit({"slow.py": "def f():\n    return 1\n"}, "revert")
+
+    plan = plan_incremental(store, "7", second, "main")
+
+    assert plan["diff"] == "" and not plan["unchanged"]
+    merged = merge_with_prior(analysis(0.0), plan)
+    assert merged["risk_score"] == 0.0
+    assert merged["analysis_groups"] == []
+
+
+@pytest.mark.unit
+def test_state_without_groups_needs_a_full_analysis(store):
+    first = commit({"slow.py": "def f():\n    return 2\n"}, "p1")
+    store._state["7"] = {"head_sha": first, "analysis": analysis(0.9), "metrics": {}, "updated": ""}
+
+    assert plan_incremental(store, "7", commit({"other.py": "x = 2\n"}, "p2"), "main") is None
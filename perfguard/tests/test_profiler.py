@@ -0,0 +1,72 @@
+import json
+import sys
+import sysconfig
+from pathlib import Path
+
+import pytest
+
+from config import config
+from profile_plugin import FunctionNames
+from profiler import _stored_base_profiles, _trim, diff_profiles
+from storage import BaselineStorage
+
+
+def profile(**self_times):
+    return {name: [1, seconds, seconds] for name, seconds in self_times.items()}
+
+
+@pytest.mark.unit
+def test_trimmed_base_does_not_create_phantom_functions():
+    full_base = profile(hot=1.0, warm=0.5, cold=0.1)
+    base = _trim(full_base, 2)
+    head = profile(hot=1.5, warm=0.5, cold=0.1)
+
+    result = diff_profiles(base, head, base_self_total=1.6)
+
+    assert {row["function"] for row in result["functions"]} == {"hot", "warm"}
+    assert result["functions"][0]["self_delta"] == pytest.approx(0.5)
+    assert result["self_total"] == pytest.approx([1.6, 2.1])
+
+
+@pytest.mark.unit
+def test_untrimmed_profiles_show_new_functions():
+    result = diff_profiles(profile(hot=1.0), profile(hot=1.0, added=0.4))
+
+    assert result["functions"][0]["function"] == "added"
+    assert result["self_total"] == pytest.approx([1.0, 1.4])
+
+
+@pytest.mark.unit
+def test_stored_profile_keeps_its_untrimmed_total(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CALIBRATION_ENABLED", False)
+    path = tmp_path / "baselines.json"
+    path.write_text(json.dumps({"baselines": {}, "profiles": {
+        "t.py::a": {"functions": profile(hot=1.0), "self_total": 1.6},
+        "t.py::b": {"functions": profile(hot=1.0, warm=0.5)},
+    }}))
+
+    stored = _stored_base_profiles(BaselineStorage(str(path)), ["t.py::a", "t.py::b"])
+
+    assert stored["t.py::a"]["self_total"] == 1.6
+    assert stored["t.py::b"]["self_total"] == pytest.approx(1.5)
+
+
+@pytest.mark.unit
+def test_function_names_are_stable_across_installs(tmp_path):
+    names = FunctionNames(str(tmp_path))
+    stdlib = Path(sysconfig.get_paths()["stdlib"])
+
+    assert names(str(tmp_path / "pkg" / "mod.py"), "f") == "pkg/mod.py:f"
+    assert names(str(stdlib / "json" / "decoder.py"), "decode") == "json/decoder.py:decode"
+    assert names("~", "<built-in method time.sleep>") == "<built-in method time.sleep>"
+
+
+@pytest.mark.unit
+def test_virtualenv_inside_the_checkout_is_named_by_sys_path(tmp_path, monkeypatch):
+    site = tmp_path / ".venv" / "lib" / "site-packages"
+    monkeypatch.setattr(sys, "prefix", str(tmp_path / ".venv"))
+    monkeypatch.setattr(sys, "path", [str(site), *sys.path])
+
+    names = FunctionNames(str(tmp_path))
+
+    assert names(str(site / "requests" / "api.py"), "get") == "requests/api.py:get"
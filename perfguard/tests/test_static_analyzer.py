@@ -0,0 +1,63 @@
+import pytest
+
+from static_analyzer import analyze_diff_locally
+
+
+def _diff(path, added, start=1):
+    body = "".join(f"+{line}\n" for line in added)
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -{start},0 +{start},{len(added)} @@\n{body}"
+    )
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.unit
+def test_low_risk_function_change_is_fully_analyzed(repo):
+    (repo / "mod.py").write_text("def f(items):\n    return sorted(items)\n")
+
+    result = analyze_diff_locally(_diff("mod.py", ["    return sorted(items)"], start=2))
+
+    assert result["risk_score"] == 0.0
+    assert result["unanalyzed"] == []
+
+
+@pytest.mark.unit
+def test_hotspot_is_scored(repo):
+    (repo / "mod.py").write_text("import time\n\ndef f():\n    time.sleep(5)\n")
+
+    result = analyze_diff_locally(_diff("mod.py", ["    time.sleep(5)"], start=4))
+
+    assert result["risk_score"] > 0.2
+    assert result["critical_paths"] == ["mod.py::f"]
+
+
+@pytest.mark.unit
+def test_module_level_change_is_unanalyzed(repo):
+    (repo / "mod.py").write_text("import time\n\nCACHE = build_cache()\n\n# comment\n")
+
+    result = analyze_diff_locally(_diff("mod.py", ["CACHE = build_cache()", "", "# comment"], start=3))
+
+    assert result["risk_score"] == 0.0
+    assert result["unanalyzed"] == ["mod.py:3 (outside any function)"]
+
+
+@pytest.mark.unit
+def test_non_python_code_is_unanalyzed_but_docs_are_not(repo):
+    diff = _diff("web/app.js", ["slowLoop();"]) + _diff("README.md", ["docs"])
+
+    result = analyze_diff_locally(diff)
+
+    assert result["unanalyzed"] == ["web/app.js"]
+
+
+@pytest.mark.unit
+def test_deleted_file_is_unanalyzed(repo):
+    result = analyze_diff_locally(_diff("gone.py", ["x = 1"]))
+
+    assert result["unanalyzed"] == ["gone.py (deleted)"]
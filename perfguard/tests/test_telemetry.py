@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from config import config
+from telemetry import ProviderTelemetry, percentile
+
+
+@pytest.fixture
+def telemetry(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TELEMETRY_PATH", str(tmp_path / "telemetry.json"))
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(config, "HEDGE_PERCENTILE", 90)
+    monkeypatch.setattr(config, "HEDGE_MIN_DELAY", 0)
+    return ProviderTelemetry()
+
+
+def ok(provider, latency):
+    return {"provider": provider, "status": "ok", "latency": latency, "attempts": 1,
+            "input_tokens": 0, "output_tokens": 0}
+
+
+@pytest.mark.unit
+def test_percentile():
+    assert percentile([], 95) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(n) for n in range(1, 101)], 95) == 95.0
+
+
+@pytest.mark.unit
+def test_hedge_delay_defaults_until_enough_history(telemetry):
+    telemetry.record_call("anthropic", "ok", 1.0, 1)
+
+    assert telemetry.hedge_delay("anthropic") == config.HEDGE_DEFAULT_DELAY
+
+
+@pytest.mark.unit
+def test_hedge_delay_follows_stored_and_current_calls(telemetry, tmp_path):
+    stored = [ok("anthropic", 1.0), ok("anthropic", 2.0), ok("gemini", 9.0)]
+    (tmp_path / "telemetry.json").write_text(json.dumps({"calls": stored}))
+    telemetry.record_call("anthropic", "ok", 3.0, 1)
+    telemetry.record_call("anthropic", "failed", 30.0, 3)
+
+    assert telemetry.hedge_delay("anthropic") == 3.0
+
+
+@pytest.mark.unit
+def test_flush_keeps_history_in_its_state_file(telemetry, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TELEMETRY_HISTORY_SIZE", 2)
+    (tmp_path / "telemetry.json").write_text(json.dumps({"calls": [ok("anthropic", 1.0), ok("anthropic", 2.0)]}))
+    telemetry.record_call("anthropic", "ok", 3.0, 1)
+
+    summary = telemetry.flush()
+
+    stored = json.loads((tmp_path / "telemetry.json").read_text())["calls"]
+    assert [call["latency"] for call in stored] == [2.0, 3.0]
+    assert summary["providers"]["anthropic"]["latency_samples"] == 3
@@ -0,0 +1,182 @@
+"""
+PerfGuard AI Tracing
+Nestable spans over PerfGuard's own stages, written as a Chrome/Perfetto trace-event file
+
+Usage:
+    with span("pytest.benchmark", tests=12) as s:
+        ...
+        s.set(returncode=0)
+
+Open perfguard_trace.json in https://ui.perfetto.dev or chrome://tracing. Spans
+on one thread nest by time; each worker thread gets its own track.
+"""
+import os
+import json
+import time
+import threading
+from functools import wraps
+from typing import Dict, Any, List, Optional
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Span:
+    """One timed region; attributes appear under "args" in the trace viewer"""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def set(self, **attrs) -> "Span":
+        """Add attributes known only once the work has run (status, counts, sizes)"""
+        self.args.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._emit({
+            "ph": "X",
+            "name": self.name,
+            "cat": self.category,
+            "ts": (self.start - self.tracer.origin_ns) / 1000,
+            "dur": (end - self.start) / 1000,
+            "args": self.args,
+        })
+        return False
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled: every operation is a no-op"""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects trace events for one run
+
+    Timestamps are perf_counter_ns offsets from reset(), in microseconds as the
+    trace-event format expects. Appending to a list is atomic under the GIL, so
+    spans from pipeline, chunk-analysis and hedging threads need no lock.
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = config.TRACE_ENABLED if enabled is None else enabled
+        self.reset()
+
+    def reset(self):
+        """Start a new trace (one per gate run)"""
+        self.events: List[Dict[str, Any]] = []
+        self.origin_ns = time.perf_counter_ns()
+        self.started_at = time.time()
+        self._threads: Dict[int, str] = {}
+
+    def span(self, name: str, category: str = "perfguard", **attrs) -> Span:
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, category, attrs)
+
+    def instant(self, name: str, category: str = "perfguard", **attrs):
+        """A point-in-time marker (cache hits, fallbacks)"""
+        if not self.enabled:
+            return
+        self._emit({
+            "ph": "i",
+            "s": "t",
+            "name": name,
+            "cat": category,
+            "ts": (time.perf_counter_ns() - self.origin_ns) / 1000,
+            "args": attrs,
+        })
+
+    def _emit(self, event: Dict[str, Any]):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        if thread.ident not in self._threads:
+            self._threads[thread.ident] = thread.name
+        self.events.append(event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The trace as a trace-event JSON object"""
+        pid = os.getpid()
+        metadata = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "perfguard"}}]
+        metadata += [
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._threads.items())
+        ]
+        return {
+            "traceEvents": metadata + sorted(self.events, key=lambda event: event["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"started_at": self.started_at},
+        }
+
+    def write(self, path: str = None) -> Optional[str]:
+        """
+        Write the trace file (nothing when disabled or empty)
+
+        Returns:
+            The path written, or None
+        """
+        if not self.enabled or not self.events:
+            return None
+        path = path or config.TRACE_PATH
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+            logger.info(f"Trace with {len(self.events)} spans saved to {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"Could not write trace: {e}")
+            return None
+
+
+def traced(name: str = None, category: str = "perfguard"):
+    """Decorator wrapping every call of a function in a span"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Shared by every module in the process; run_gate() resets and writes it once per run
+tracer = Tracer()
+
+
+def span(name: str, category: str = "perfguard", **attrs) -> Span:
+    """Shorthand for tracer.span()"""
+    return tracer.span(name, category, **attrs)